@@ -0,0 +1,314 @@
+"""Measure events/s, graph construction and JIT time and peak memory of the rdframework helpers on synthetic
+NanoAOD-like input, at several thread counts, and compare against stored baselines"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import re
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from synthetic import generate
+
+DIR = Path(__file__).parent.resolve()
+
+# Each benchmark builds its graph on the input dataframe and returns the final node and an expression to Sum, so
+# that the columns it defines are actually read. Benchmarks needing selected leptons include their selection.
+ERA = "2018"
+
+
+def _electrons(df: Any) -> Any:
+    from rdframework.objects.leptons import select_electrons_cutBased
+
+    return select_electrons_cutBased(df, "Electron", "selElectron", None, "tight", 15.0)
+
+
+def _muons(df: Any) -> Any:
+    from rdframework.objects.leptons import select_muons_cutBased
+
+    return select_muons_cutBased(df, "Muon", "selMuon", None, "tight", "tight", 15.0)
+
+
+def _pv_met_filter(df: Any) -> tuple[Any, str]:
+    from rdframework.filters.cuts import PV_MET_filter
+
+    return PV_MET_filter(df, ERA, True), "MET_pt"
+
+
+def _select_jets(df: Any) -> tuple[Any, str]:
+    from rdframework.objects.jets import select_jets
+
+    df = select_jets(df, "Jet", "selJet", None, None, 0.4, 30.0, 2.5, "tight", "loose")
+    return df, "Sum(selJet_pt)"
+
+
+def _select_jets_cleaned(df: Any) -> tuple[Any, str]:
+    from rdframework.objects.jets import select_jets
+
+    df = _muons(_electrons(df))
+    df = select_jets(
+        df, "Jet", "selJet", None, ["selMuon", "selElectron"], 0.4, 30.0, 2.5, "tight"
+    )
+    return df, "Sum(selJet_pt)"
+
+
+def _select_electrons(df: Any) -> tuple[Any, str]:
+    return _electrons(df), "Sum(selElectron_pt)"
+
+
+def _select_electrons_inverted(df: Any) -> tuple[Any, str]:
+    from rdframework.objects.leptons import select_electrons_cutBased
+
+    df = select_electrons_cutBased(
+        df,
+        "Electron",
+        "selElectron",
+        None,
+        "tight",
+        15.0,
+        invert_cuts=["GsfEleRelPFIsoScaledCut"],
+    )
+    return df, "Sum(selElectron_pt)"
+
+
+def _select_muons(df: Any) -> tuple[Any, str]:
+    return _muons(df), "Sum(selMuon_pt)"
+
+
+def _met_xy_corrector(df: Any) -> tuple[Any, str]:
+    from rdframework.corrections.met import MET_xy_corrector
+
+    return MET_xy_corrector(df, ERA, True), "MET_rdf_xycorr_pt"
+
+
+def _lepton_channel_categorization(df: Any) -> tuple[Any, str]:
+    from rdframework.filters.categorization import lepton_channel_categorization
+
+    df = lepton_channel_categorization(
+        _muons(_electrons(df)), "selMuon", "selElectron", ERA, True
+    )
+    return df, "channel_emu_OS + channel_ee_OS + channel_mumu_OS"
+
+
+def _dilepton_trigger_selection(df: Any) -> tuple[Any, str]:
+    from rdframework.filters.categorization import dilepton_trigger_selection
+
+    df = dilepton_trigger_selection(
+        _muons(_electrons(df)), "selMuon", "selElectron", ERA, True
+    )
+    return df, "trig_emu + trig_ee + trig_mumu"
+
+
+BENCHMARKS: dict[str, Callable[[Any], tuple[Any, str]]] = {
+    "PV_MET_filter": _pv_met_filter,
+    "select_jets": _select_jets,
+    "select_jets_cleaned": _select_jets_cleaned,
+    "select_electrons_cutBased": _select_electrons,
+    "select_electrons_cutBased_inverted": _select_electrons_inverted,
+    "select_muons_cutBased": _select_muons,
+    "MET_xy_corrector": _met_xy_corrector,
+    "lepton_channel_categorization": _lepton_channel_categorization,
+    "dilepton_trigger_selection": _dilepton_trigger_selection,
+}
+
+# Metrics where larger is better, all others are costs
+HIGHER_IS_BETTER = {"events_per_second"}
+
+JIT_LOG = re.compile(
+    r"Just-in-time compilation phase completed.* in ([0-9.eE+-]+) seconds"
+)
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 1024.0**2 if sys.platform == "darwin" else peak / 1024.0
+
+
+def worker(name: str, threads: int, files: list[str]) -> dict[str, float]:
+    """Run a single benchmark in this process, which should be fresh so the peak memory is its own"""
+    import ROOT
+
+    if threads > 1:
+        ROOT.EnableImplicitMT(threads)
+    start = time.perf_counter()
+    df = ROOT.RDataFrame("Events", files)
+    entries = df.Count()
+    node, value = BENCHMARKS[name](df)
+    total = node.Define("bench_value", f"static_cast<double>({value})").Sum(
+        "bench_value"
+    )
+    build = time.perf_counter() - start
+
+    verbosity = ROOT.Experimental.RLogScopedVerbosity(  # noqa: F841
+        ROOT.Detail.RDF.RDFLogChannel(), ROOT.Experimental.ELogLevel.kInfo
+    )
+    start = time.perf_counter()
+    total.GetValue()
+    run = time.perf_counter() - start
+    return {
+        "entries": float(entries.GetValue()),
+        "build_seconds": build,
+        "run_seconds": run,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def measure(name: str, threads: int, files: list[str]) -> dict[str, float]:
+    """Run one benchmark in a subprocess and derive the reported metrics"""
+    proc = subprocess.run(
+        [
+            sys.executable,
+            __file__,
+            "--worker",
+            name,
+            "--threads",
+            str(threads),
+            "--files",
+            *files,
+        ],
+        cwd=DIR,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(
+            f"benchmark {name} ({threads} threads) failed:\n{proc.stderr}"
+        )
+    raw = json.loads(proc.stdout.strip().splitlines()[-1])
+    jit = sum(float(m) for m in JIT_LOG.findall(proc.stderr))
+    loop = max(raw["run_seconds"] - jit, 1e-9)
+    return {
+        "events_per_second": raw["entries"] / loop,
+        "build_seconds": raw["build_seconds"],
+        "jit_seconds": jit,
+        "peak_rss_mb": raw["peak_rss_mb"],
+    }
+
+
+def compare(
+    results: dict[str, dict[str, dict[str, float]]],
+    baseline: dict[str, dict[str, dict[str, float]]],
+    tolerance: float,
+) -> list[str]:
+    """Return a description of every metric worse than its baseline by more than the relative tolerance"""
+    regressions = []
+    for name, per_threads in results.items():
+        for threads, metrics in per_threads.items():
+            reference = baseline.get(name, {}).get(threads)
+            if not reference:
+                continue
+            for metric, value in metrics.items():
+                ref = reference.get(metric)
+                if not ref:
+                    continue
+                change = (value - ref) / ref
+                worse = -change if metric in HIGHER_IS_BETTER else change
+                if worse > tolerance:
+                    regressions.append(
+                        f"{name} [{threads} threads] {metric}: {value:.4g} vs baseline {ref:.4g} ({change:+.1%})"
+                    )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--benchmarks", nargs="*", default=list(BENCHMARKS), choices=list(BENCHMARKS)
+    )
+    parser.add_argument("--threads", nargs="*", type=int, default=[1, 4, 16])
+    parser.add_argument(
+        "--files", nargs="*", help="input files, generated synthetic input by default"
+    )
+    parser.add_argument(
+        "--events", type=int, default=500000, help="synthetic events to generate"
+    )
+    parser.add_argument("--mean-jets", type=float, default=6.0)
+    parser.add_argument("--mean-leptons", type=float, default=1.5)
+    parser.add_argument("--data-dir", default=str(DIR / "data"))
+    parser.add_argument("--baseline", default=str(DIR / "baseline.json"))
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(worker(args.worker, args.threads[0], args.files)))
+        return 0
+
+    files = args.files
+    if not files:
+        data_dir = Path(args.data_dir)
+        data_dir.mkdir(parents=True, exist_ok=True)
+        path = (
+            data_dir
+            / f"synthetic_{args.events}_j{args.mean_jets}_l{args.mean_leptons}.root"
+        )
+        if not path.exists():
+            print(f"Generating {path}")
+            generate(
+                str(path),
+                args.events,
+                mean_jets=args.mean_jets,
+                mean_electrons=args.mean_leptons,
+                mean_muons=args.mean_leptons,
+            )
+        files = [str(path)]
+
+    results: dict[str, dict[str, dict[str, float]]] = {}
+    print(
+        f"{'benchmark':40s} {'threads':>7s} {'events/s':>12s} {'build s':>8s} {'JIT s':>8s} {'peak MB':>8s}"
+    )
+    for name in args.benchmarks:
+        for threads in args.threads:
+            m = measure(name, threads, files)
+            results.setdefault(name, {})[str(threads)] = m
+            print(
+                f"{name:40s} {threads:7d} {m['events_per_second']:12.0f} {m['build_seconds']:8.3f}"
+                f" {m['jit_seconds']:8.3f} {m['peak_rss_mb']:8.0f}"
+            )
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        stored = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+        stored.setdefault("results", {})
+        for name, per_threads in results.items():
+            stored["results"].setdefault(name, {}).update(per_threads)
+        stored["machine"] = {
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+        }
+        stored["input"] = {
+            "files": files if args.files else None,
+            "events": args.events,
+        }
+        baseline_path.write_text(json.dumps(stored, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline written to {baseline_path}")
+        return 0
+    if not baseline_path.exists():
+        # nothing was compared, which must not pass as a clean run
+        print(
+            f"NO BASELINE at {baseline_path}: nothing compared, run with --update-baseline on the reference"
+            " machine and commit it"
+        )
+        return 2
+    baseline = json.loads(baseline_path.read_text())["results"]
+    for name, per_threads in results.items():
+        for threads in per_threads:
+            if not baseline.get(name, {}).get(threads):
+                print(f"NO BASELINE {name} [{threads} threads]: not compared")
+    regressions = compare(results, baseline, args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
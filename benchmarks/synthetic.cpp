@@ -0,0 +1,115 @@
+#include <ROOT/RVec.hxx>
+#include <RtypesCore.h>
+
+#include <algorithm>
+#include <cmath>
+#include <cstdint>
+#include <random>
+
+namespace synth {
+
+using ROOT::VecOps::RVec;
+
+// A generator seeded only from (seed, entry, tag), so the output does not depend on the number of threads
+inline std::mt19937_64 Engine(ULong64_t seed, ULong64_t entry, unsigned int tag)
+{
+  std::seed_seq seq{static_cast<std::uint32_t>(seed), static_cast<std::uint32_t>(entry),
+                    static_cast<std::uint32_t>(entry >> 32), tag};
+  return std::mt19937_64(seq);
+}
+
+inline int Multiplicity(ULong64_t seed, ULong64_t entry, unsigned int tag, double mean, int max)
+{
+  auto rng = Engine(seed, entry, tag);
+  const int n = std::poisson_distribution<int>(mean)(rng);
+  return n < max ? n : max;
+}
+
+// Falling pt spectrum above min_pt, sorted descending as in NanoAOD
+inline RVec<float> Pt(ULong64_t seed, ULong64_t entry, unsigned int tag, int n, double min_pt, double slope)
+{
+  auto rng = Engine(seed, entry, tag);
+  std::exponential_distribution<double> dist(1.0 / slope);
+  RVec<float> pt(n);
+  for (auto& v : pt) v = min_pt + dist(rng);
+  return Reverse(Sort(pt));
+}
+
+inline RVec<float> Uniform(ULong64_t seed, ULong64_t entry, unsigned int tag, int n, double low, double high)
+{
+  auto rng = Engine(seed, entry, tag);
+  std::uniform_real_distribution<double> dist(low, high);
+  RVec<float> out(n);
+  for (auto& v : out) v = dist(rng);
+  return out;
+}
+
+inline RVec<float> Gaus(ULong64_t seed, ULong64_t entry, unsigned int tag, int n, double mean, double sigma)
+{
+  auto rng = Engine(seed, entry, tag);
+  std::normal_distribution<double> dist(mean, sigma);
+  RVec<float> out(n);
+  for (auto& v : out) v = dist(rng);
+  return out;
+}
+
+// Integer codes drawn from [low, high]
+inline RVec<int> Codes(ULong64_t seed, ULong64_t entry, unsigned int tag, int n, int low, int high)
+{
+  auto rng = Engine(seed, entry, tag);
+  std::uniform_int_distribution<int> dist(low, high);
+  RVec<int> out(n);
+  for (auto& v : out) v = dist(rng);
+  return out;
+}
+
+inline RVec<int> Charges(ULong64_t seed, ULong64_t entry, unsigned int tag, int n)
+{
+  auto codes = Codes(seed, entry, tag, n, 0, 1);
+  return 2 * codes - 1;
+}
+
+inline RVec<bool> Flags(ULong64_t seed, ULong64_t entry, unsigned int tag, int n, double efficiency)
+{
+  auto rng = Engine(seed, entry, tag);
+  std::bernoulli_distribution dist(efficiency);
+  RVec<bool> out(n);
+  for (std::size_t i = 0; i < out.size(); ++i) out[i] = dist(rng);
+  return out;
+}
+
+inline bool Flag(ULong64_t seed, ULong64_t entry, unsigned int tag, double efficiency)
+{
+  auto rng = Engine(seed, entry, tag);
+  return std::bernoulli_distribution(efficiency)(rng);
+}
+
+inline float Value(ULong64_t seed, ULong64_t entry, unsigned int tag, double mean, double sigma)
+{
+  auto rng = Engine(seed, entry, tag);
+  return std::normal_distribution<double>(mean, sigma)(rng);
+}
+
+// 10 cuts of 3 bits each, every cut passing at a random level between 0 and 4
+inline RVec<int> VidBitmap(ULong64_t seed, ULong64_t entry, unsigned int tag, int n)
+{
+  auto rng = Engine(seed, entry, tag);
+  std::uniform_int_distribution<int> dist(0, 4);
+  RVec<int> out(n, 0);
+  for (auto& v : out) {
+    for (int shift = 0; shift < 30; shift += 3) v |= dist(rng) << shift;
+  }
+  return out;
+}
+
+// Lepton to jet association, -1 (no jet) for about a third of the leptons
+inline RVec<int> JetIdx(ULong64_t seed, ULong64_t entry, unsigned int tag, int n, int njets)
+{
+  auto rng = Engine(seed, entry, tag);
+  std::uniform_int_distribution<int> dist(-(njets / 2) - 1, njets - 1);
+  RVec<int> out(n);
+  for (auto& v : out) v = njets > 0 ? std::max(dist(rng), -1) : -1;
+  return out;
+}
+
+} // namespace synth
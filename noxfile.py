@@ -28,6 +28,16 @@ def tests(session: nox.Session) -> None:
     session.run("pytest", *session.posargs)
 
 
+@nox.session
+def bench(session: nox.Session) -> None:
+    """
+    Run the throughput benchmarks (requires ROOT). Pass "--update-baseline" to record a new baseline.
+    """
+    session.install(".")
+    session.chdir("benchmarks")
+    session.run("python", "run_benchmarks.py", *session.posargs)
+
+
 @nox.session
 def docs(session: nox.Session) -> None:
     """
@@ -0,0 +1,5 @@
+"Code related to the ROOT-free columnar backend: NumPy implementations of the helpers on flat-array-plus-offsets jagged columns"
+
+from __future__ import annotations
+
+__all__ = ["events", "selections"]
@@ -0,0 +1,465 @@
+"""NumPy implementations of the rdframework helpers, with the same signatures and defined columns as the RDataFrame
+versions, which dispatch here when passed ColumnarEvents"""
+
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+
+from rdframework.columnar.events import ColumnarEvents, JaggedArray
+from rdframework.filters.cuts import MET_filter_flags
+from rdframework.objects.jets import (
+    btag_working_points,
+    jet_id_level,
+    jet_pu_id_level,
+)
+from rdframework.objects.leptons import (
+    VID_CUT_NAMES,
+    electron_id_level,
+    muon_iso_level,
+)
+
+
+def _f64(values: Any) -> Any:
+    # RDataFrame compares float branches against double literals after promotion, so compare in double here too
+    return np.asarray(values, dtype=np.float64)
+
+
+def _delta_phi(phi1: Any, phi2: Any) -> Any:
+    # As ROOT::VecOps::DeltaPhi
+    r = np.fmod(phi2 - phi1, 2.0 * np.pi)
+    r = np.where(r < -np.pi, r + 2.0 * np.pi, r)
+    return np.where(r > np.pi, r - 2.0 * np.pi, r)
+
+
+def _collection_columns(events: ColumnarEvents, prefix: str) -> list[str]:
+    return [col for col in events.GetColumnNames() if col.startswith(prefix)]
+
+
+def _ensure_idx(
+    events: ColumnarEvents, input_collection: str, avail_columns: list[str]
+) -> ColumnarEvents:
+    if f"{input_collection}idx" not in avail_columns:
+        ref = events[avail_columns[0]]
+        events = events.Define(
+            f"{input_collection}idx",
+            ref.with_content(ref.local_index().astype(np.uint32)),
+        )
+    return events
+
+
+def _pairwise(first: JaggedArray, second: JaggedArray) -> tuple[Any, Any]:
+    """Flat indices into first.content and second.content of every same-event pair"""
+    first_event = first.event_index()
+    per_first = second.counts()[first_event]
+    first_idx = np.repeat(np.arange(len(first.content)), per_first)
+    block_start = np.repeat(np.cumsum(per_first) - per_first, per_first)
+    second_idx = (
+        second.offsets[:-1][first_event[first_idx]]
+        + np.arange(len(first_idx))
+        - block_start
+    )
+    return first_idx, second_idx
+
+
+def _select_collection(
+    events: ColumnarEvents,
+    input_collection: str,
+    output_collection: str,
+    columns: list[str] | str | None,
+    avail_columns: list[str],
+    mask: Any,
+    tag: str,
+    sort_column: str | None,
+    sort_ascending: bool,
+) -> ColumnarEvents:
+    """Define the mask, take, multiplicity and selected columns exactly as the RDataFrame selectors do"""
+    ref = events[f"{input_collection}idx"]
+    events = events.Define(f"{output_collection}{tag}mask", ref.with_content(mask))
+
+    if isinstance(columns, list):
+        sel_columns = [
+            col[len(input_collection) :]
+            for col in columns
+            if col.startswith(input_collection)
+        ]
+    elif isinstance(columns, str):
+        raise NotImplementedError("regexp not currently supported")
+    else:
+        sel_columns = [col[len(input_collection) :] for col in avail_columns]
+        if "idx" not in sel_columns:
+            sel_columns.append("idx")
+
+    selected = ref.filter_elements(mask)
+    sel_event = selected.event_index()
+    sel_local = selected.local_index()
+    if sort_column:
+        key = _f64(events[f"{input_collection}{sort_column}"].content[mask])
+        # stable ascending sort within each event, as Argsort, reversed within each event as Reverse
+        order = np.lexsort((key, sel_event))
+        if not sort_ascending:
+            counts = selected.counts()
+            order = order[
+                selected.offsets[:-1][sel_event] + counts[sel_event] - 1 - sel_local
+            ]
+    else:
+        order = np.arange(len(selected.content))
+    take = order - selected.offsets[:-1][sel_event]
+    events = events.Define(
+        f"{output_collection}{tag}take", selected.with_content(take.astype(np.uint64))
+    )
+    events = events.Define(
+        f"n{output_collection[:-1]}", selected.counts().astype(np.int64)
+    )
+    for scol in sel_columns:
+        content = events[f"{input_collection}{scol}"].content[mask][order]
+        events = events.Define(output_collection + scol, selected.with_content(content))
+    return events
+
+
+def PV_MET_filter(
+    events: ColumnarEvents,
+    era: str,
+    is_mc: bool,
+    min_NDoF: int = 4,
+    max_abs_z: float = 24.0,
+    max_rho: float = 2.0,
+    is_ultra_legacy: bool = True,
+    is_fastsim_MC: bool = False,
+    include_HF: bool = False,
+    return_applied_flags: bool = False,
+) -> Any:
+    flags = MET_filter_flags(era, is_mc, is_ultra_legacy, is_fastsim_MC, include_HF)
+    pv_x, pv_y = _f64(events["PV_x"]), _f64(events["PV_y"])
+    mask = (
+        (_f64(events["PV_ndof"]) >= min_NDoF)
+        & (np.abs(_f64(events["PV_z"])) < max_abs_z)
+        & (np.sqrt(pv_x * pv_x + pv_y * pv_y) < max_rho)
+    )
+    for flag in flags:
+        mask &= np.asarray(events[flag], dtype=bool)
+    filtered = events.Filter(mask)
+    if return_applied_flags:
+        return filtered, flags
+    else:
+        return filtered
+
+
+def btag_jets(
+    events: ColumnarEvents,
+    btagger: str,
+    WP: str,
+    era: str,
+    is_ultra_legacy: bool = True,
+    pre_post_VFP: str | None = None,
+    return_btag_dict: bool = False,
+) -> Any:
+    subset = btag_working_points(btagger, era, is_ultra_legacy, pre_post_VFP)
+    disc = events[f"Jet_{subset['Var']}"]
+    events = events.Define(
+        "btagmask", disc.with_content(_f64(disc.content) >= subset[WP])
+    )
+    if return_btag_dict:
+        return [events, subset]
+    return events
+
+
+def select_jets(
+    events: ColumnarEvents,
+    input_collection: str,
+    output_collection: str,
+    columns: list[str] | str | None,
+    isolated_leptons: list[str] | None,
+    clean_algo_or_dR: float | str,
+    jet_min_pt: float,
+    jet_max_eta: float,
+    jet_id: str,
+    jet_pu_id: str | None = None,
+    btagging_configuration: dict[str, Any] | None = None,
+    era: str | None = None,
+    is_ultra_legacy: bool = True,
+    pre_post_VFP: str | None = None,
+    fix_inverted_pu_id_bits: bool = False,
+    sort_column: str | None = "pt",
+    sort_ascending: bool = False,
+) -> ColumnarEvents:
+    if not input_collection.endswith("_"):
+        input_collection += "_"
+    if not output_collection.endswith("_"):
+        output_collection += "_"
+    if fix_inverted_pu_id_bits:
+        raise NotImplementedError(
+            "Patching of the inverted Jet PU ID bits in 2016 UL not implemented"
+        )
+    jet_min_id = jet_id_level(jet_id)
+
+    avail_columns = _collection_columns(events, input_collection)
+    events = _ensure_idx(events, input_collection, avail_columns)
+
+    pt = _f64(events[f"{input_collection}pt"].content)
+    eta = _f64(events[f"{input_collection}eta"].content)
+    mask = (
+        (pt > jet_min_pt)
+        & (np.abs(eta) <= jet_max_eta)
+        & (events[f"{input_collection}jetId"].content >= jet_min_id)
+    )
+    if jet_pu_id:
+        jet_min_pu_id = jet_pu_id_level(jet_pu_id)
+        mask &= (pt > 50.0) | (
+            events[f"{input_collection}puId"].content >= jet_min_pu_id
+        )
+
+    if isolated_leptons:
+        jets = events[f"{input_collection}idx"]
+        for lep_collection in isolated_leptons:
+            lep_jet_idx = events[f"{lep_collection}_jetIdx"]
+            jet_i, lep_i = _pairwise(jets, lep_jet_idx)
+            if isinstance(clean_algo_or_dR, str):  # PFMatching
+                overlap = (
+                    jets.content[jet_i].astype(np.int64) == lep_jet_idx.content[lep_i]
+                )
+            elif isinstance(clean_algo_or_dR, float):  # DeltaR
+                lep_eta = _f64(events[f"{lep_collection}_eta"].content)[lep_i]
+                lep_phi = _f64(events[f"{lep_collection}_phi"].content)[lep_i]
+                phi = _f64(events[f"{input_collection}phi"].content)
+                dr = np.sqrt(
+                    (eta[jet_i] - lep_eta) ** 2 + _delta_phi(phi[jet_i], lep_phi) ** 2
+                )
+                overlap = ~(dr >= clean_algo_or_dR)
+            else:
+                continue
+            mask &= np.bincount(jet_i[overlap], minlength=len(mask)) == 0
+
+    if btagging_configuration is not None:
+        events = btag_jets(
+            events,
+            btagger=str(btagging_configuration.get("btagger")),
+            WP=str(btagging_configuration.get("WP")),
+            era=str(btagging_configuration.get("era", era)),
+            is_ultra_legacy=btagging_configuration.get(
+                "is_ultra_legacy", is_ultra_legacy
+            ),
+            pre_post_VFP=btagging_configuration.get("pre_post_VFP", pre_post_VFP),
+            return_btag_dict=False,
+        )
+    return _select_collection(
+        events,
+        input_collection,
+        output_collection,
+        columns,
+        avail_columns,
+        mask,
+        "jet",
+        sort_column,
+        sort_ascending,
+    )
+
+
+def vidUnpackedWP(
+    events: ColumnarEvents,
+    return_columns: bool = True,
+    input_collection: str = "Electron_",
+) -> Any:
+    columns = events.GetColumnNames()
+    bitmap = events[f"{input_collection}vidNestedWPBitmap"]
+    for name, shift in zip(VID_CUT_NAMES, range(0, 28, 3)):
+        if f"{input_collection}{name}" in columns:
+            continue
+        events = events.Define(
+            f"{input_collection}{name}",
+            bitmap.with_content(((bitmap.content >> shift) & 0b111).astype(np.int32)),
+        )
+    return events, list(VID_CUT_NAMES)
+
+
+def select_electrons_cutBased(
+    events: ColumnarEvents,
+    input_collection: str,
+    output_collection: str,
+    columns: list[str] | None,
+    electron_id: int | str,
+    min_pt: float,
+    max_eta: float = 2.5,
+    max_ip3d_barrel: float = 0.05,
+    max_ip3d_endcap: float = 0.10,
+    max_dz_barrel: float = 0.1,
+    max_dz_endcap: float = 0.2,
+    invert_cuts: list[str] | None = None,
+    sort_column: str | None = "pt",
+    sort_ascending: bool = False,
+) -> ColumnarEvents:
+    if not input_collection.endswith("_"):
+        input_collection += "_"
+    if not output_collection.endswith("_"):
+        output_collection += "_"
+    e_id = electron_id_level(electron_id)
+
+    abs_eta = np.abs(_f64(events[f"{input_collection}eta"].content))
+    abs_ip3d = np.abs(_f64(events[f"{input_collection}ip3d"].content))
+    abs_dz = np.abs(_f64(events[f"{input_collection}dz"].content))
+    barrel = (
+        (abs_eta < 1.4442) & (abs_ip3d < max_ip3d_barrel) & (abs_dz < max_dz_barrel)
+    )
+    endcap = (
+        (abs_eta > 1.5660)
+        & (abs_eta <= max_eta)
+        & (abs_ip3d < max_ip3d_endcap)
+        & (abs_dz < max_dz_endcap)
+    )
+    mask = (barrel | endcap) & (_f64(events[f"{input_collection}pt"].content) >= min_pt)
+    if isinstance(invert_cuts, list) and len(invert_cuts) > 0:
+        cln_invert_cuts = [cut.split("_")[-1] for cut in invert_cuts]
+        events, vid_cuts = vidUnpackedWP(
+            events, return_columns=True, input_collection=input_collection
+        )
+        for name in vid_cuts:
+            passed = events[f"{input_collection}{name}"].content >= e_id
+            mask &= passed if name not in cln_invert_cuts else ~passed
+    else:
+        mask &= events[f"{input_collection}cutBased"].content >= e_id
+
+    avail_columns = _collection_columns(events, input_collection)
+    events = _ensure_idx(events, input_collection, avail_columns)
+    return _select_collection(
+        events,
+        input_collection,
+        output_collection,
+        columns,
+        avail_columns,
+        mask,
+        "el",
+        sort_column,
+        sort_ascending,
+    )
+
+
+def select_muons_cutBased(
+    events: ColumnarEvents,
+    input_collection: str,
+    output_collection: str,
+    columns: list[str] | None,
+    muon_id: str,
+    muon_iso: int | str,
+    min_pt: float,
+    max_eta: float = 2.4,
+    max_ip3d: float = 0.10,
+    max_dz: float = 0.2,
+    invert_iso: bool = False,
+    sort_column: str | None = "pt",
+    sort_ascending: bool = False,
+) -> ColumnarEvents:
+    if not input_collection.endswith("_"):
+        input_collection += "_"
+    if not output_collection.endswith("_"):
+        output_collection += "_"
+    m_iso = muon_iso_level(muon_iso)
+
+    mask = (
+        (_f64(events[f"{input_collection}pt"].content) >= min_pt)
+        & (np.abs(_f64(events[f"{input_collection}eta"].content)) <= max_eta)
+        & (np.abs(_f64(events[f"{input_collection}ip3d"].content)) < max_ip3d)
+        & (np.abs(_f64(events[f"{input_collection}dz"].content)) < max_dz)
+    )
+    iso = events[f"{input_collection}pfIsoId"].content
+    mask &= (iso < m_iso) if invert_iso else (iso >= m_iso)
+
+    if muon_id.lower() == "veto":
+        raise ValueError("Muons do not have a veto cutBased working point")
+    elif muon_id.lower() in ["loose", "medium", "tight"]:
+        mask &= np.asarray(
+            events[f"{input_collection}{muon_id.lower()}Id"].content, dtype=bool
+        )
+
+    avail_columns = _collection_columns(events, input_collection)
+    events = _ensure_idx(events, input_collection, avail_columns)
+    return _select_collection(
+        events,
+        input_collection,
+        output_collection,
+        columns,
+        avail_columns,
+        mask,
+        "mu",
+        sort_column,
+        sort_ascending,
+    )
+
+
+def lepton_channel_categorization(
+    events: ColumnarEvents,
+    iso_muons: str,
+    iso_electrons: str,
+    era: str,
+    is_mc: bool,
+    run_period: str | None = None,
+    noniso_muons: str | None = None,
+    noniso_electrons: str | None = None,
+) -> ColumnarEvents:
+    if not iso_muons.endswith("_"):
+        iso_muons += "_"
+    if not iso_electrons.endswith("_"):
+        iso_electrons += "_"
+    if noniso_muons and not noniso_muons.endswith("_"):
+        noniso_muons += "_"
+    if noniso_electrons and not noniso_electrons.endswith("_"):
+        noniso_electrons += "_"
+
+    nevents = len(events)
+    n_iso_e = events[f"n{iso_electrons[:-1]}"]
+    n_iso_mu = events[f"n{iso_muons[:-1]}"]
+    minus_one = np.full(nevents, -1, dtype=np.int64)
+    n_noniso_e = events[f"n{noniso_electrons[:-1]}"] if noniso_electrons else minus_one
+    n_noniso_mu = events[f"n{noniso_muons[:-1]}"] if noniso_muons else minus_one
+    zero = np.zeros(nevents, dtype=np.int64)
+
+    cols: dict[str, Any] = {}
+    cols["sum_charge_iso_e"] = events[f"{iso_electrons}charge"].sum()
+    cols["sum_charge_iso_mu"] = events[f"{iso_muons}charge"].sum()
+    cols["sum_charge_iso_lep"] = cols["sum_charge_iso_e"] + cols["sum_charge_iso_mu"]
+    cols["sum_charge_noniso_mu"] = (
+        events[f"{noniso_muons}charge"].sum() if noniso_muons else zero
+    )
+    cols["sum_charge_noniso_e"] = (
+        events[f"{noniso_electrons}charge"].sum() if noniso_electrons else zero
+    )
+    cols["sum_charge_noniso_lep"] = (
+        cols["sum_charge_noniso_e"] + cols["sum_charge_noniso_mu"]
+    )
+    cols["sum_charge_all"] = cols["sum_charge_iso_lep"] + cols["sum_charge_noniso_lep"]
+
+    for ne in range(5):
+        for nmu in range(5):
+            if 1 <= ne + nmu <= 4:
+                cols[f"iso_{ne}e{nmu}mu"] = (n_iso_e == ne) & (n_iso_mu == nmu)
+    for iso_e, iso_mu in [(1, 0), (0, 1)]:
+        for noniso_e, noniso_mu in [(1, 0), (0, 1)]:
+            cols[f"iso_{iso_e}e{iso_mu}mu_noniso_{noniso_e}e{noniso_mu}mu"] = (
+                (n_iso_e == iso_e)
+                & (n_iso_mu == iso_mu)
+                & (n_noniso_e == noniso_e)
+                & (n_noniso_mu == noniso_mu)
+            )
+
+    cols["iso_sumc0"] = cols["sum_charge_iso_lep"] == 0
+    cols["noniso_sumc0"] = cols["sum_charge_noniso_lep"] == 0
+    cols["sumc0"] = cols["sum_charge_all"] == 0
+
+    cols["channel_e"] = cols["iso_1e0mu"]
+    cols["channel_mu"] = cols["iso_0e1mu"]
+    for name, iso in [("ee", "iso_2e0mu"), ("emu", "iso_1e1mu"), ("mumu", "iso_0e2mu")]:
+        cols[f"channel_{name}_OS"] = cols[iso] & cols["iso_sumc0"]
+    for name, iso in [("ee", "iso_2e0mu"), ("emu", "iso_1e1mu"), ("mumu", "iso_0e2mu")]:
+        cols[f"channel_{name}_SS"] = cols[iso] & ~cols["iso_sumc0"]
+    for name, category in [
+        ("e_nie", "iso_1e0mu_noniso_1e0mu"),
+        ("e_nim", "iso_1e0mu_noniso_0e1mu"),
+        ("mu_nie", "iso_0e1mu_noniso_1e0mu"),
+        ("mu_nim", "iso_0e1mu_noniso_0e1mu"),
+    ]:
+        cols[f"channel_{name}_OS"] = cols[category] & cols["sumc0"]
+        cols[f"channel_{name}_SS"] = cols[category] & ~cols["sumc0"]
+
+    for name, values in cols.items():
+        events = events.Define(name, values)
+    return events
@@ -0,0 +1,83 @@
+#include <ROOT/RVec.hxx>
+#include <RtypesCore.h>
+
+#include <algorithm>
+#include <cmath>
+#include <cstddef>
+#include <utility>
+
+#include "tables.cpp"
+
+namespace rdfw {
+
+// Electron energy corrections, evaluated for a whole collection per call: the scale correction of data, binned
+// in run, supercluster |eta|, r9 and pt, and the relative resolution smearing of MC, binned in supercluster |eta|
+// and r9. The corrections are returned as factors multiplying the electron pt (and any other energy column).
+class ElectronEnergyCorrector {
+public:
+  ElectronEnergyCorrector(CorrectionTable scale, CorrectionTable smearing)
+    : fScale(std::move(scale)), fSmearing(std::move(smearing))
+  {
+  }
+
+  template <typename E, typename R, typename P>
+  ROOT::VecOps::RVec<float> Scales(UInt_t run, const ROOT::VecOps::RVec<E>& eta, const ROOT::VecOps::RVec<R>& r9,
+                                   const ROOT::VecOps::RVec<P>& pt) const
+  {
+    ROOT::VecOps::RVec<float> factors(pt.size());
+    for (std::size_t i = 0; i < pt.size(); ++i) {
+      factors[i] = fScale.Value(fScale.Index(run, std::abs(eta[i]), r9[i], pt[i]));
+    }
+    return factors;
+  }
+
+  // 1 + gaus * (resolution + smearVariation * its uncertainty), times 1 + scaleVariation * the scale uncertainty,
+  // with gaus one standard normal number per electron
+  template <typename E, typename R, typename P>
+  ROOT::VecOps::RVec<float> Smearings(const ROOT::VecOps::RVec<double>& gaus, UInt_t run,
+                                      const ROOT::VecOps::RVec<E>& eta, const ROOT::VecOps::RVec<R>& r9,
+                                      const ROOT::VecOps::RVec<P>& pt, int scaleVariation = 0,
+                                      int smearVariation = 0) const
+  {
+    ROOT::VecOps::RVec<float> factors(pt.size());
+    for (std::size_t i = 0; i < pt.size(); ++i) {
+      const auto smear = fSmearing.Index(std::abs(eta[i]), r9[i]);
+      const double sigma = std::max(fSmearing.Value(smear) + smearVariation * fSmearing.Error(smear), 0.0);
+      double factor = std::max(1.0 + gaus[i] * sigma, 0.0);
+      if (scaleVariation != 0) {
+        factor *= 1.0 + scaleVariation * fScale.Error(fScale.Index(run, std::abs(eta[i]), r9[i], pt[i]));
+      }
+      factors[i] = factor;
+    }
+    return factors;
+  }
+
+  // The up and down factors of the scale (scale = true) or smearing systematic, in one pass
+  template <typename E, typename R, typename P>
+  ROOT::VecOps::RVec<ROOT::VecOps::RVec<float>>
+  Variations(const ROOT::VecOps::RVec<double>& gaus, UInt_t run, const ROOT::VecOps::RVec<E>& eta,
+             const ROOT::VecOps::RVec<R>& r9, const ROOT::VecOps::RVec<P>& pt, bool scale) const
+  {
+    return {Smearings(gaus, run, eta, r9, pt, scale ? 1 : 0, scale ? 0 : 1),
+            Smearings(gaus, run, eta, r9, pt, scale ? -1 : 0, scale ? 0 : -1)};
+  }
+
+private:
+  CorrectionTable fScale;
+  CorrectionTable fSmearing;
+};
+
+// The values of a column multiplied by each variation's factors, the varied values expected by Vary
+template <typename T>
+ROOT::VecOps::RVec<ROOT::VecOps::RVec<T>> ApplyFactors(const ROOT::VecOps::RVec<T>& values,
+                                                       const ROOT::VecOps::RVec<ROOT::VecOps::RVec<float>>& factors)
+{
+  ROOT::VecOps::RVec<ROOT::VecOps::RVec<T>> varied(factors.size());
+  for (std::size_t v = 0; v < factors.size(); ++v) {
+    varied[v] = ROOT::VecOps::RVec<T>(values.size());
+    for (std::size_t i = 0; i < values.size(); ++i) varied[v][i] = values[i] * factors[v][i];
+  }
+  return varied;
+}
+
+} // namespace rdfw
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any
+
+from rdframework.corrections.random import RandomStreams
+from rdframework.corrections.tables import CorrectionTable
+from rdframework.utils import cpp_reference, declare_cpp
+
+# the axes of the tables, in order: the scale correction of data and the relative resolution smearing of MC
+SCALE_AXES = ["run", "eta", "r9", "pt"]
+SMEARING_AXES = ["eta", "r9"]
+# systematic -> whether it shifts the scale (True) or the smearing (False) of MC, by the table uncertainties;
+# Vary names the variations {systematic}:up and {systematic}:down
+ELECTRON_ENERGY_VARIATIONS = {"electronScale": True, "electronSmear": False}
+
+
+class ElectronEnergyCorrections:
+    """The electron energy scale correction of data, binned in run, supercluster |eta|, r9 and pt, and the
+    relative resolution by which MC energies are smeared, binned in supercluster |eta| and r9, each with its
+    uncertainty. The scale uncertainty is applied to MC, as the electronScale systematic. Keep this object alive
+    while the event loop runs."""
+
+    def __init__(self, scale: CorrectionTable, smearing: CorrectionTable):
+        if len(scale.edges()) != len(SCALE_AXES):
+            raise ValueError(f"The scale table must have the axes {SCALE_AXES}")
+        if len(smearing.edges()) != len(SMEARING_AXES):
+            raise ValueError(f"The smearing table must have the axes {SMEARING_AXES}")
+        self._scale = scale
+        self._smearing = smearing
+        self._corrector = None
+        self._streams: dict[tuple[int, int], RandomStreams] = {}
+
+    @classmethod
+    def from_json(cls, path: str) -> ElectronEnergyCorrections:
+        """Read {"scale": {"run": edges, "eta": edges, "r9": edges, "pt": edges, "values": ..., "errors": ...},
+        "smearing": {"eta": edges, "r9": edges, "values": ..., "errors": ...}}"""
+        with open(path) as f:
+            raw = json.load(f)
+        return cls(
+            CorrectionTable.from_dict(raw["scale"], SCALE_AXES),
+            CorrectionTable.from_dict(raw["smearing"], SMEARING_AXES),
+        )
+
+    def scale(
+        self, run: int, eta: float, r9: float, pt: float, variation: int = 0
+    ) -> float:
+        return self._scale.value(run, abs(eta), r9, pt, variation=variation)
+
+    def smearing(self, eta: float, r9: float, variation: int = 0) -> float:
+        return max(self._smearing.value(abs(eta), r9, variation=variation), 0.0)
+
+    def reference(self) -> str:
+        """The C++ corrector, created once, for jitted expressions"""
+        if self._corrector is None:
+            ROOT = declare_cpp(
+                Path(__file__).parent / "electrons.cpp", "rdfw::ElectronEnergyCorrector"
+            )
+            self._corrector = ROOT.rdfw.ElectronEnergyCorrector(
+                self._scale.compiled(), self._smearing.compiled()
+            )
+        return cpp_reference(self._corrector, "rdfw::ElectronEnergyCorrector")
+
+    def streams(self, nslots: int, seed: int = 0) -> RandomStreams:
+        """The random numbers of the smearing, kept alive with the corrections"""
+        key = (nslots, seed)
+        if key not in self._streams:
+            self._streams[key] = RandomStreams("electron_smearing", nslots, seed)
+        return self._streams[key]
+
+
+# path -> corrections read by correct_electron_energies, read once per process and kept alive for the event loops
+_LOADED: dict[str, ElectronEnergyCorrections] = {}
+
+
+def load_electron_corrections(path: str) -> ElectronEnergyCorrections:
+    if path not in _LOADED:
+        _LOADED[path] = ElectronEnergyCorrections.from_json(path)
+    return _LOADED[path]
+
+
+def correct_electron_energies(
+    events: Any,
+    corrections: str | ElectronEnergyCorrections,
+    is_mc: bool,
+    input_collection: str = "Electron",
+    columns: list[str] | None = None,
+    variations: bool = True,
+    seed: int = 0,
+    supercluster_eta: bool = True,
+    run: str = "run",
+    luminosity_block: str = "luminosityBlock",
+    event: str = "event",
+) -> Any:
+    """Correct the electron energies in place, before the electrons are selected: the columns (default pt) of
+    input_collection are scaled in data and smeared in MC, with one call per event for the whole collection. The
+    uncorrected values are kept as {input_collection}uncorrected_{column}, and the per-electron factors as
+    {input_collection}energyCorr.
+
+    In MC, the electronScale and electronSmear up/down variations are declared with Vary on the corrected columns,
+    so they propagate through select_electrons_cutBased and everything downstream of it. Results booked with
+    ROOT.RDF.Experimental.VariationsFor (book_histograms(..., column_variations=True)) fill them in the same event
+    loop as the nominal ones. corrections is an ElectronEnergyCorrections or the path of its JSON tables."""
+    if isinstance(corrections, str):
+        corrections = load_electron_corrections(corrections)
+    if not input_collection.endswith("_"):
+        input_collection += "_"
+    columns = list(columns) if columns else ["pt"]
+    corrector = corrections.reference()
+    eta = f"{input_collection}eta"
+    if supercluster_eta:
+        eta = f"({eta} + {input_collection}deltaEtaSC)"
+    inputs = f"{run}, {eta}, {input_collection}r9, {input_collection}uncorrected_pt"
+
+    # the corrections are binned in the uncorrected pt
+    for column in columns + ([] if "pt" in columns else ["pt"]):
+        events = events.Define(
+            f"{input_collection}uncorrected_{column}", f"{input_collection}{column}"
+        )
+    factors = f"{input_collection}energyCorr"
+    if is_mc:
+        gaus = f"{input_collection}energyGaus"
+        events = corrections.streams(int(events.GetNSlots()), seed).gaus(
+            events,
+            gaus,
+            f"ROOT::VecOps::RVec<float>({input_collection}pt.size(), 1.f)",
+            run,
+            luminosity_block,
+            event,
+        )
+        events = events.Define(factors, f"{corrector}.Smearings({gaus}, {inputs})")
+    else:
+        events = events.Define(factors, f"{corrector}.Scales({inputs})")
+    for column in columns:
+        events = events.Redefine(
+            f"{input_collection}{column}",
+            f"{input_collection}uncorrected_{column} * {factors}",
+        )
+    if not is_mc or not variations:
+        return events
+
+    for systematic, is_scale in ELECTRON_ENERGY_VARIATIONS.items():
+        # not named {input_collection}..., as its outer vector runs over the variations rather than the electrons
+        varied = f"{input_collection[:-1]}EnergyCorr_{systematic}"
+        events = events.Define(
+            varied,
+            f"{corrector}.Variations({gaus}, {inputs}, {str(is_scale).lower()})",
+        )
+        values = [
+            f"rdfw::ApplyFactors({input_collection}uncorrected_{column}, {varied})"
+            for column in columns
+        ]
+        if len(values) == 1:
+            expression = values[0]
+            varied_columns: str | list[str] = f"{input_collection}{columns[0]}"
+        else:
+            # several columns: the outer vector runs over the columns
+            expression = f"ROOT::VecOps::RVec<ROOT::VecOps::RVec<ROOT::VecOps::RVec<float>>>{{{', '.join(values)}}}"
+            varied_columns = [f"{input_collection}{column}" for column in columns]
+        events = events.Vary(varied_columns, expression, ["up", "down"], systematic)
+    return events
@@ -0,0 +1,130 @@
+#include <ROOT/RVec.hxx>
+#include <RtypesCore.h>
+
+#include <cmath>
+#include <cstddef>
+#include <cstdint>
+#include <vector>
+
+namespace rdfw {
+
+inline std::uint64_t SplitMix64(std::uint64_t& state)
+{
+  std::uint64_t z = (state += 0x9e3779b97f4a7c15ULL);
+  z = (z ^ (z >> 30)) * 0xbf58476d1ce4e5b9ULL;
+  z = (z ^ (z >> 27)) * 0x94d049bb133111ebULL;
+  return z ^ (z >> 31);
+}
+
+// Fold one more value into a 64 bit key
+inline std::uint64_t MixKey(std::uint64_t key, std::uint64_t value)
+{
+  std::uint64_t state = key ^ (value * 0xff51afd7ed558ccdULL);
+  return SplitMix64(state);
+}
+
+// xoshiro256++: small state, fast, and cheap to reseed for every object
+class RandomEngine {
+public:
+  void Seed(std::uint64_t key)
+  {
+    for (auto& s : fState) s = SplitMix64(key);
+  }
+
+  std::uint64_t Next()
+  {
+    const std::uint64_t result = Rotl(fState[0] + fState[3], 23) + fState[0];
+    const std::uint64_t t = fState[1] << 17;
+    fState[2] ^= fState[0];
+    fState[3] ^= fState[1];
+    fState[1] ^= fState[2];
+    fState[0] ^= fState[3];
+    fState[2] ^= t;
+    fState[3] = Rotl(fState[3], 45);
+    return result;
+  }
+
+  // Uniform in [0, 1)
+  double Uniform() { return (Next() >> 11) * 0x1.0p-53; }
+
+  // Box-Muller without a cached spare value, so every draw depends only on the seed and the draws before it
+  double Gaus(double mean = 0.0, double sigma = 1.0)
+  {
+    const double u1 = 1.0 - Uniform();
+    const double u2 = Uniform();
+    return mean + sigma * std::sqrt(-2.0 * std::log(u1)) * std::cos(2.0 * M_PI * u2);
+  }
+
+private:
+  static std::uint64_t Rotl(std::uint64_t x, int k) { return (x << k) | (x >> (64 - k)); }
+
+  std::uint64_t fState[4] = {};
+};
+
+// One generator per processing slot, reseeded for every draw from (stream, run, luminosityBlock, event, object
+// index). The numbers drawn for an object are thus the same whichever slot processes its event and however many
+// threads run, without any locking.
+class RandomStreams {
+public:
+  RandomStreams(std::uint64_t stream, std::size_t nslots) : fStream(stream), fSlots(nslots > 0 ? nslots : 1) {}
+
+  // The slot's generator seeded for one object, to draw several numbers for it
+  RandomEngine& At(unsigned int slot, UInt_t run, UInt_t luminosityBlock, ULong64_t event, UInt_t index)
+  {
+    // at(), as an event loop with more slots than the streams must fail rather than share or overrun generators
+    auto& engine = fSlots.at(slot).fEngine;
+    engine.Seed(Key(run, luminosityBlock, event, index));
+    return engine;
+  }
+
+  double Uniform(unsigned int slot, UInt_t run, UInt_t luminosityBlock, ULong64_t event, UInt_t index)
+  {
+    return At(slot, run, luminosityBlock, event, index).Uniform();
+  }
+
+  double Gaus(unsigned int slot, UInt_t run, UInt_t luminosityBlock, ULong64_t event, UInt_t index,
+              double mean = 0.0, double sigma = 1.0)
+  {
+    return At(slot, run, luminosityBlock, event, index).Gaus(mean, sigma);
+  }
+
+  // One uniform number per object of a collection of n objects
+  ROOT::VecOps::RVec<double> Uniforms(unsigned int slot, UInt_t run, UInt_t luminosityBlock, ULong64_t event,
+                                      std::size_t n)
+  {
+    ROOT::VecOps::RVec<double> values(n);
+    for (std::size_t i = 0; i < n; ++i) values[i] = Uniform(slot, run, luminosityBlock, event, i);
+    return values;
+  }
+
+  // One gaussian number per object, with the object's width (e.g. a resolution) and zero mean
+  template <typename T>
+  ROOT::VecOps::RVec<double> Gauses(unsigned int slot, UInt_t run, UInt_t luminosityBlock, ULong64_t event,
+                                    const ROOT::VecOps::RVec<T>& sigma)
+  {
+    ROOT::VecOps::RVec<double> values(sigma.size());
+    for (std::size_t i = 0; i < sigma.size(); ++i) {
+      values[i] = Gaus(slot, run, luminosityBlock, event, i, 0.0, sigma[i]);
+    }
+    return values;
+  }
+
+private:
+  // a cache line per slot, so the slots' generators do not share one
+  struct alignas(64) Slot {
+    RandomEngine fEngine;
+  };
+
+  std::uint64_t Key(UInt_t run, UInt_t luminosityBlock, ULong64_t event, UInt_t index) const
+  {
+    std::uint64_t key = MixKey(fStream, run);
+    key = MixKey(key, luminosityBlock);
+    key = MixKey(key, event);
+    return MixKey(key, index);
+  }
+
+  std::uint64_t fStream;
+  std::vector<Slot> fSlots;
+};
+
+} // namespace rdfw
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+from typing import Any
+
+from rdframework.utils import cpp_reference, declare_cpp
+
+
+def stream_id(name: str, seed: int = 0) -> int:
+    """The 64 bit identifier of a named random stream, e.g. 'jer' or 'electron_smearing'. Distinct names give
+    independent numbers for the same objects; change the seed to draw a different, still reproducible, set."""
+    return int(hashlib.sha1(f"{name}:{seed}".encode()).hexdigest()[:16], 16)
+
+
+class RandomStreams:
+    """Reproducible random numbers for stochastic corrections (JER smearing, Rochester and electron energy
+    corrections) under ImplicitMT. Every processing slot has its own generator, reseeded for each draw from the
+    stream and (run, luminosityBlock, event, object index), so the numbers of an object do not depend on the
+    number of threads or on which thread processes its event, and no lock is taken.
+
+    In jitted expressions, {reference()}.Gaus(rdfslot_, run, luminosityBlock, event, index, mean, sigma) and
+    .Uniform(rdfslot_, run, luminosityBlock, event, index) draw single numbers, and .At(...) returns the seeded
+    generator to draw several numbers for one object. Create it with (at least) the GetNSlots() of the event loop,
+    which gaus and uniform check. Keep this object alive while the event loop runs."""
+
+    def __init__(self, name: str, nslots: int, seed: int = 0):
+        ROOT = declare_cpp(Path(__file__).parent / "random.cpp", "rdfw::RandomStreams")
+        self._name = name
+        self._nslots = max(1, nslots)
+        self._streams = ROOT.rdfw.RandomStreams(stream_id(name, seed), self._nslots)
+
+    def name(self) -> str:
+        return self._name
+
+    def nslots(self) -> int:
+        return self._nslots
+
+    def _check_slots(self, events: Any) -> None:
+        nslots = int(events.GetNSlots())
+        if nslots > self._nslots:
+            raise ValueError(
+                f"The {self._name} random streams have {self._nslots} slots, the event loop runs {nslots}"
+            )
+
+    def reference(self) -> str:
+        return cpp_reference(self._streams, "rdfw::RandomStreams")
+
+    def gaus(
+        self,
+        events: Any,
+        column: str,
+        sigma: str,
+        run: str = "run",
+        luminosity_block: str = "luminosityBlock",
+        event: str = "event",
+    ) -> Any:
+        """Define column with one zero-mean gaussian number per object, of the width given per object by the
+        RVec expression sigma (e.g. a relative resolution)"""
+        self._check_slots(events)
+        return events.Define(
+            column,
+            f"{self.reference()}.Gauses(rdfslot_, {run}, {luminosity_block}, {event}, {sigma})",
+        )
+
+    def uniform(
+        self,
+        events: Any,
+        column: str,
+        size: str,
+        run: str = "run",
+        luminosity_block: str = "luminosityBlock",
+        event: str = "event",
+    ) -> Any:
+        """Define column with size (an expression, e.g. 'nJet') uniform numbers in [0, 1)"""
+        self._check_slots(events)
+        return events.Define(
+            column,
+            f"{self.reference()}.Uniforms(rdfslot_, {run}, {luminosity_block}, {event}, {size})",
+        )
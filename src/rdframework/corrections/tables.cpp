@@ -0,0 +1,49 @@
+#ifndef RDFW_CORRECTIONS_TABLES
+#define RDFW_CORRECTIONS_TABLES
+
+#include <algorithm>
+#include <cstddef>
+#include <iterator>
+#include <utility>
+#include <vector>
+
+namespace rdfw {
+
+// A correction binned along a few axes, with the values and their uncertainties stored row-major (the last axis
+// varying fastest). Values outside the binning take the nearest bin. Included by the corrections built on it.
+class CorrectionTable {
+public:
+  CorrectionTable(std::vector<std::vector<double>> edges, std::vector<double> values, std::vector<double> errors)
+    : fEdges(std::move(edges)), fValues(std::move(values)), fErrors(std::move(errors))
+  {
+  }
+
+  template <typename... X>
+  std::size_t Index(X... x) const
+  {
+    const double coordinates[] = {static_cast<double>(x)...};
+    std::size_t index = 0;
+    for (std::size_t axis = 0; axis < sizeof...(X); ++axis) {
+      index = index * (fEdges[axis].size() - 1) + Bin(fEdges[axis], coordinates[axis]);
+    }
+    return index;
+  }
+
+  double Value(std::size_t index) const { return fValues[index]; }
+  double Error(std::size_t index) const { return fErrors[index]; }
+
+private:
+  static std::size_t Bin(const std::vector<double>& edges, double x)
+  {
+    const auto upper = std::upper_bound(edges.begin() + 1, edges.end() - 1, x);
+    return static_cast<std::size_t>(std::distance(edges.begin() + 1, upper));
+  }
+
+  std::vector<std::vector<double>> fEdges;
+  std::vector<double> fValues;
+  std::vector<double> fErrors;
+};
+
+} // namespace rdfw
+
+#endif
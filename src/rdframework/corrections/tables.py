@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import bisect
+from pathlib import Path
+from typing import Any
+
+from rdframework.utils import declare_cpp
+
+
+def _flatten(values: Any) -> list[float]:
+    if isinstance(values, (list, tuple)):
+        return [x for value in values for x in _flatten(value)]
+    return [float(values)]
+
+
+class CorrectionTable:
+    """A correction binned along a few axes (the bin edges of each axis), with its values and uncertainties as
+    nested lists indexed by bin along each axis in turn, or flattened in that order. Outside the binning the
+    nearest bin is used, and a single bin covering the whole range leaves a table independent of that axis."""
+
+    def __init__(
+        self,
+        edges: list[list[float]],
+        values: Any,
+        errors: Any | None = None,
+    ):
+        if any(len(axis) < 2 for axis in edges):
+            raise ValueError("Correction tables need at least one bin per axis")
+        size = 1
+        for axis in edges:
+            size *= len(axis) - 1
+        self._edges = [[float(x) for x in axis] for axis in edges]
+        self._values = _flatten(values)
+        self._errors = _flatten(errors) if errors is not None else [0.0] * size
+        if len(self._values) != size or len(self._errors) != size:
+            raise ValueError(f"Correction table must have {size} bins")
+        self._table = None
+
+    def edges(self) -> list[list[float]]:
+        return [list(axis) for axis in self._edges]
+
+    def index(self, *x: float) -> int:
+        if len(x) != len(self._edges):
+            raise ValueError(f"Correction table has {len(self._edges)} axes")
+        index = 0
+        for axis, value in zip(self._edges, x):
+            i = bisect.bisect_right(axis, value, 1, len(axis) - 1) - 1
+            index = index * (len(axis) - 1) + i
+        return index
+
+    def value(self, *x: float, variation: int = 0) -> float:
+        """The value, shifted by variation (+1, -1) times its uncertainty"""
+        i = self.index(*x)
+        return self._values[i] + variation * self._errors[i]
+
+    def error(self, *x: float) -> float:
+        return self._errors[self.index(*x)]
+
+    def compiled(self) -> Any:
+        """The C++ table, created once, to build the C++ corrections on"""
+        if self._table is None:
+            ROOT = declare_cpp(
+                Path(__file__).parent / "tables.cpp", "rdfw::CorrectionTable"
+            )
+            self._table = ROOT.rdfw.CorrectionTable(
+                self._edges, self._values, self._errors
+            )
+        return self._table
+
+    @classmethod
+    def from_dict(cls, raw: dict[str, Any], axes: list[str]) -> CorrectionTable:
+        """A table from {axis: edges, ..., 'values': ..., 'errors': ...}"""
+        missing = [axis for axis in axes + ["values"] if axis not in raw]
+        if missing:
+            raise ValueError(f"Correction table is missing {missing}")
+        return cls([raw[axis] for axis in axes], raw["values"], raw.get("errors"))
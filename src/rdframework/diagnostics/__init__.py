@@ -0,0 +1,5 @@
+"Code related to inspecting analysis pipelines, such as recording the computation graph built by the helpers"
+
+from __future__ import annotations
+
+__all__ = ["graph", "memory"]
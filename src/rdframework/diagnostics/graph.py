@@ -0,0 +1,466 @@
+from __future__ import annotations
+
+import json
+import re
+import sys
+from collections import Counter, defaultdict
+from types import FrameType
+from typing import Any, NamedTuple
+
+# transformations returning a new node, and those among them that (re)define a column
+_TRANSFORMATIONS = {
+    "Define",
+    "Redefine",
+    "DefineSlot",
+    "DefineSlotEntry",
+    "DefinePerSample",
+    "Alias",
+    "Filter",
+    "Range",
+    "Vary",
+}
+_DEFINITIONS = {
+    "Define",
+    "Redefine",
+    "DefineSlot",
+    "DefineSlotEntry",
+    "DefinePerSample",
+    "Alias",
+}
+# queries that neither build the graph nor read columns in the event loop
+_QUERIES = {"Describe", "HasColumn", "GetNSlots", "GetNRuns", "Report", "SaveGraph"}
+# actions reading every column in scope when not given a column list, with the position of that list
+_ALL_COLUMN_ACTIONS = {"Snapshot": 2, "AsNumpy": 0, "Display": 0}
+
+_TOKEN = re.compile(
+    r'"(?:\\.|[^"\\])*"'  # string literal
+    r"|'(?:\\.|[^'\\])*'"  # character literal
+    r"|[A-Za-z_]\w*"  # identifier
+    r"|\d+\.\d*(?:[eE][+-]?\d+)?[fF]?|\.\d+(?:[eE][+-]?\d+)?[fF]?|\d+[eE][+-]?\d+[fF]?"  # floating literal
+    r"|\d+[uUlL]*"  # integer literal
+    r"|->|::|&&|\|\||[=!<>]=|<<|>>|\S"
+)
+_FLOAT = re.compile(r"(?:\d+\.\d*|\.\d+|\d+[eE])")
+
+
+class GraphNode(NamedTuple):
+    """One recorded transformation or action. sources are the indices of the nodes defining the columns read,
+    helper is the rdframework function that added the node ('' if added directly)"""
+
+    node_index: int
+    kind: str
+    name: str
+    expression: str | None
+    inputs: tuple[str, ...]
+    sources: tuple[int, ...]
+    parent: int
+    helper: str
+
+
+class PipelineGraph:
+    """The nodes recorded by a GraphRecorder and all recorders derived from it"""
+
+    def __init__(self, dataset_columns: list[str]):
+        self._dataset_columns = list(dataset_columns)
+        self._nodes: list[GraphNode] = []
+        self._canonical: list[str | None] = []
+
+    def dataset_columns(self) -> list[str]:
+        return list(self._dataset_columns)
+
+    def nodes(self) -> list[GraphNode]:
+        return list(self._nodes)
+
+    def size(self) -> int:
+        return len(self._nodes)
+
+    def canonical_expression(self, index: int) -> str | None:
+        """The expression of a node with formatting removed and columns replaced by the node defining them, so
+        equal canonical expressions compute the same values"""
+        return self._canonical[index]
+
+    def _add(self, node: GraphNode, canonical: str | None) -> None:
+        self._nodes.append(node)
+        self._canonical.append(canonical)
+
+
+def _tokens(expression: str) -> list[str]:
+    return _TOKEN.findall(expression)
+
+
+def _strip_statement(tokens: list[str]) -> list[str]:
+    # 'return x;' and 'x' are the same jitted expression, as are '(x)' and 'x'
+    if (
+        tokens
+        and tokens[0] == "return"
+        and tokens.count(";") == 1
+        and tokens[-1] == ";"
+    ):
+        tokens = tokens[1:-1]
+    while len(tokens) >= 2 and tokens[0] == "(" and tokens[-1] == ")":
+        depth = 0
+        for i, tok in enumerate(tokens):
+            depth += tok == "("
+            depth -= tok == ")"
+            if depth == 0 and i < len(tokens) - 1:
+                return tokens
+        tokens = tokens[1:-1]
+    return tokens
+
+
+def _calling_helper() -> str:
+    """The innermost rdframework function on the stack outside the diagnostics, i.e. the helper adding the node
+    (rather than e.g. the runner step calling it)"""
+    frame: FrameType | None = sys._getframe(2)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith("rdframework.") and not module.startswith(
+            "rdframework.diagnostics"
+        ):
+            return f"{module}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return ""
+
+
+class GraphRecorder:
+    """Proxy for an RDataFrame node recording every Define/Filter/... (with its expression and the rdframework
+    helper that added it) made through it or any node derived from it. Pass it to the helpers in place of the
+    node; node() returns the wrapped RDataFrame node. ROOT.RDF.SaveGraph draws the same graph, but without the
+    expressions and columns needed to find redundant work."""
+
+    def __init__(
+        self,
+        events: Any,
+        graph: PipelineGraph | None = None,
+        parent: int = -1,
+        scope: dict[str, int] | None = None,
+    ):
+        self._events = events
+        self._graph = (
+            graph
+            if graph is not None
+            else PipelineGraph([str(col) for col in events.GetColumnNames()])
+        )
+        self._parent = parent
+        # column name -> index of the node defining it, for the columns defined upstream of this node
+        self._scope = scope if scope is not None else {}
+
+    def node(self) -> Any:
+        return self._events
+
+    def graph(self) -> PipelineGraph:
+        return self._graph
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        attr = getattr(self._events, name)
+        if not callable(attr) or name.startswith("Get") or name in _QUERIES:
+            return attr
+
+        def recorded(*args: Any, **kwargs: Any) -> Any:
+            result = attr(*args, **kwargs)
+            if name in _TRANSFORMATIONS:
+                return self._derive(name, result, args, kwargs)
+            self._record_action(name, args, kwargs)
+            return result
+
+        return recorded
+
+    def __getitem__(self, name: str) -> Any:
+        return self._events[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._events
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def _resolve(self, column: str) -> int | None:
+        return self._scope.get(column)
+
+    def _read(self, expression: str) -> tuple[list[str], str]:
+        """The columns read by a jitted expression, and its canonical form"""
+        tokens = _strip_statement(_tokens(expression))
+        dataset = set(self._graph.dataset_columns())
+        inputs: list[str] = []
+        canonical = []
+        for i, tok in enumerate(tokens):
+            member = i > 0 and tokens[i - 1] in (".", "->", "::")
+            if not member and tok in self._scope:
+                inputs.append(tok)
+                canonical.append(f"@{self._alias_target(self._scope[tok])}")
+            elif not member and tok in dataset:
+                inputs.append(tok)
+                canonical.append(f"${tok}")
+            elif _FLOAT.match(tok) and tok[-1] not in "fF":
+                canonical.append(repr(float(tok)))
+            else:
+                canonical.append(tok)
+        return list(dict.fromkeys(inputs)), " ".join(canonical)
+
+    def _alias_target(self, index: int) -> int:
+        # follow Alias and pure renaming Defines, so x and an alias of x compare equal
+        graph = self._graph
+        while True:
+            canonical = graph.canonical_expression(index)
+            if canonical is None or not re.fullmatch(r"@\d+", canonical):
+                return index
+            index = int(canonical[1:])
+
+    def _sources(self, inputs: list[str]) -> tuple[int, ...]:
+        return tuple(
+            idx for idx in (self._resolve(col) for col in inputs) if idx is not None
+        )
+
+    def _add(
+        self,
+        kind: str,
+        name: str,
+        expression: str | None,
+        inputs: list[str],
+        canonical: str | None,
+    ) -> int:
+        index = self._graph.size()
+        self._graph._add(
+            GraphNode(
+                index,
+                kind,
+                name,
+                expression,
+                tuple(inputs),
+                self._sources(inputs),
+                self._parent,
+                _calling_helper(),
+            ),
+            canonical,
+        )
+        return index
+
+    def _derive(
+        self, kind: str, result: Any, args: tuple[Any, ...], kwargs: dict[str, Any]
+    ) -> GraphRecorder:
+        name = ""
+        expression: str | None = None
+        inputs: list[str] = []
+        canonical: str | None = None
+        if kind == "Filter":
+            # Filter(expression, name) or Filter(callable, columns, name)
+            if args and isinstance(args[0], str):
+                expression = args[0]
+                name = str(args[1]) if len(args) > 1 else kwargs.get("name", "")
+            else:
+                inputs = [str(col) for col in (args[1] if len(args) > 1 else [])]
+                name = str(args[2]) if len(args) > 2 else kwargs.get("name", "")
+        elif kind == "Alias":
+            name = str(args[0])
+            inputs = [str(args[1])]
+            target = self._resolve(inputs[0])
+            canonical = f"@{self._alias_target(target)}" if target is not None else None
+        elif kind in _DEFINITIONS:
+            name = str(args[0])
+            if len(args) > 1 and isinstance(args[1], str):
+                expression = args[1]
+            elif len(args) > 2 and isinstance(args[2], (list, tuple)):
+                inputs = [str(col) for col in args[2]]
+        if expression is not None:
+            inputs, canonical = self._read(expression)
+        index = self._add(kind, name, expression, inputs, canonical)
+        scope = self._scope
+        if kind in _DEFINITIONS:
+            scope = {**scope, name: index}
+        return GraphRecorder(result, self._graph, index, scope)
+
+    def _record_action(
+        self, kind: str, args: tuple[Any, ...], kwargs: dict[str, Any]
+    ) -> None:
+        known = set(self._scope) | set(self._graph.dataset_columns())
+        inputs: list[str] = []
+        for arg in list(args) + list(kwargs.values()):
+            if isinstance(arg, str) and arg in known:
+                inputs.append(arg)
+            elif isinstance(arg, (list, tuple)):
+                inputs += [str(col) for col in arg if str(col) in known]
+        if kind in _ALL_COLUMN_ACTIONS:
+            position = _ALL_COLUMN_ACTIONS[kind]
+            selection = args[position] if len(args) > position else None
+            if selection is None:
+                selection = kwargs.get("columns", kwargs.get("columnList"))
+            if not selection:
+                inputs += sorted(known)
+            elif isinstance(selection, str) and selection not in known:
+                inputs += [col for col in sorted(known) if re.search(selection, col)]
+        if inputs:
+            self._add(kind, "", None, list(dict.fromkeys(inputs)), None)
+
+
+def record(events: Any) -> GraphRecorder:
+    """Start recording the graph built on events, e.g. events = record(ROOT.RDataFrame(...))"""
+    return GraphRecorder(events)
+
+
+class GraphReport:
+    """Redundancy analysis of a recorded pipeline. keep lists columns consumed outside of the recorded graph
+    (e.g. by actions booked on node() directly), which are not reported as dead."""
+
+    def __init__(self, graph: PipelineGraph, keep: list[str] | None = None):
+        self._graph = graph
+        self._keep = set(keep or [])
+        self._consumers: dict[int, list[int]] = defaultdict(list)
+        for node in graph.nodes():
+            for source in node.sources:
+                self._consumers[source].append(node.node_index)
+
+    def nodes(self) -> list[GraphNode]:
+        return self._graph.nodes()
+
+    def added_nodes(self) -> list[GraphNode]:
+        """The nodes added by rdframework helpers rather than directly"""
+        return [node for node in self._graph.nodes() if node.helper]
+
+    def consumers(self, index: int) -> list[int]:
+        return list(self._consumers.get(index, []))
+
+    def duplicates(self) -> list[list[GraphNode]]:
+        """Groups of Defines (or of Filters) computing the same canonical expression from the same columns"""
+        groups: dict[tuple[str, str], list[GraphNode]] = defaultdict(list)
+        for node in self._graph.nodes():
+            canonical = self._graph.canonical_expression(node.node_index)
+            if canonical is not None and re.fullmatch(r"@\d+", canonical):
+                # a Define renaming another column duplicates the column it renames
+                canonical = self._graph.canonical_expression(int(canonical[1:]))
+            if canonical is None or node.kind == "Alias":
+                continue
+            group = "Filter" if node.kind == "Filter" else "Define"
+            groups[(group, canonical)].append(node)
+        return [nodes for nodes in groups.values() if len(nodes) > 1]
+
+    def dead_columns(self) -> list[GraphNode]:
+        """Defined columns that no later node or action reads"""
+        return [
+            node
+            for node in self._graph.nodes()
+            if node.kind in _DEFINITIONS
+            and node.node_index not in self._consumers
+            and node.name not in self._keep
+        ]
+
+    def collection_counts(self) -> dict[str, int]:
+        """Number of defining nodes per collection, a collection being any X with a counter column nX (which counts
+        towards X), and '(event)' for columns outside all collections"""
+        names = set(self._graph.dataset_columns()) | {
+            node.name for node in self._graph.nodes() if node.kind in _DEFINITIONS
+        }
+        collections = sorted(
+            (
+                name[1:] + "_"
+                for name in names
+                if name.startswith("n") and len(name) > 1
+            ),
+            key=len,
+            reverse=True,
+        )
+        counts: Counter[str] = Counter()
+        for node in self._graph.nodes():
+            if node.kind not in _DEFINITIONS:
+                continue
+            owner = next(
+                (
+                    col[:-1]
+                    for col in collections
+                    if node.name.startswith(col) or node.name == f"n{col[:-1]}"
+                ),
+                "(event)",
+            )
+            counts[owner] += 1
+        return dict(counts.most_common())
+
+    def helper_counts(self) -> dict[str, int]:
+        return dict(
+            Counter(
+                node.helper or "(direct)" for node in self._graph.nodes()
+            ).most_common()
+        )
+
+    def summary(self) -> str:
+        nodes = self._graph.nodes()
+        lines = [
+            f"{len(nodes)} nodes, {len(self.added_nodes())} added by rdframework helpers",
+            "",
+            "Nodes per helper:",
+        ]
+        lines += [
+            f"  {count:6d}  {helper}" for helper, count in self.helper_counts().items()
+        ]
+        lines += ["", "Defines per collection:"]
+        lines += [
+            f"  {count:6d}  {collection}"
+            for collection, count in self.collection_counts().items()
+        ]
+        duplicates = self.duplicates()
+        lines += ["", f"{len(duplicates)} groups of equivalent expressions:"]
+        for group in duplicates:
+            lines.append(
+                "  "
+                + ", ".join(
+                    node.name or f"{node.kind}#{node.node_index}" for node in group
+                )
+                + f": {group[0].expression}"
+            )
+        dead = self.dead_columns()
+        lines += ["", f"{len(dead)} columns never read:"]
+        lines += [f"  {node.name} ({node.helper or 'direct'})" for node in dead]
+        return "\n".join(lines)
+
+    def to_json(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(
+                {
+                    "nodes": [node._asdict() for node in self._graph.nodes()],
+                    "duplicates": [
+                        [node.node_index for node in group]
+                        for group in self.duplicates()
+                    ],
+                    "dead_columns": [node.node_index for node in self.dead_columns()],
+                    "collection_counts": self.collection_counts(),
+                    "helper_counts": self.helper_counts(),
+                },
+                f,
+                indent=1,
+            )
+
+    def to_dot(self, path: str) -> None:
+        """Write the graph for graphviz: solid edges are column reads, dotted edges the node each one is built on.
+        Dead columns are grey, equivalent expressions orange."""
+        dead = {node.node_index for node in self.dead_columns()}
+        duplicated = {node.node_index for group in self.duplicates() for node in group}
+        with open(path, "w") as f:
+            f.write("digraph rdframework {\n  node [fontsize=10];\n")
+            for node in self._graph.nodes():
+                label = f"{node.kind}\\n{node.name}" if node.name else node.kind
+                if node.helper:
+                    label += f"\\n[{node.helper.rsplit('.', 1)[-1]}]"
+                label = label.replace('"', '\\"')
+                shape = "box" if node.kind in _DEFINITIONS else "diamond"
+                if node.kind not in _TRANSFORMATIONS:
+                    shape = "ellipse"
+                color = (
+                    "grey"
+                    if node.node_index in dead
+                    else "orange" if node.node_index in duplicated else "white"
+                )
+                f.write(
+                    f'  n{node.node_index} [label="{label}", shape={shape}, style=filled, fillcolor={color}];\n'
+                )
+                if node.parent >= 0:
+                    f.write(f"  n{node.parent} -> n{node.node_index} [style=dotted];\n")
+                for source in node.sources:
+                    f.write(f"  n{source} -> n{node.node_index};\n")
+            f.write("}\n")
+
+
+def analyse(
+    events: GraphRecorder | PipelineGraph, keep: list[str] | None = None
+) -> GraphReport:
+    graph = events.graph() if isinstance(events, GraphRecorder) else events
+    return GraphReport(graph, keep)
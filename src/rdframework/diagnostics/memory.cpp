@@ -0,0 +1,107 @@
+#include <ROOT/RVec.hxx>
+#include <RtypesCore.h>
+
+#include <cstddef>
+#include <cstdio>
+#include <string>
+#include <type_traits>
+#include <vector>
+
+#ifdef __linux__
+#include <unistd.h>
+#else
+#include <sys/resource.h>
+#endif
+
+namespace rdfw {
+
+// Approximate bytes held by one value of a column: the object itself plus, for containers, the elements it
+// owns. RVec elements are counted even when they fit in the small inline buffer, which overestimates small
+// collections by at most the inline capacity.
+template <typename T>
+std::size_t ByteSize(const T&)
+{
+  return sizeof(T);
+}
+
+inline std::size_t ByteSize(const std::string& s)
+{
+  return sizeof(s) + s.capacity();
+}
+
+template <typename T>
+std::size_t ByteSize(const ROOT::VecOps::RVec<T>& v)
+{
+  if constexpr (std::is_arithmetic_v<T>) {
+    return sizeof(v) + v.capacity() * sizeof(T);
+  } else {
+    std::size_t n = sizeof(v) + (v.capacity() - v.size()) * sizeof(T);
+    for (const auto& x : v) n += ByteSize(x);
+    return n;
+  }
+}
+
+template <typename T>
+std::size_t ByteSize(const std::vector<T>& v)
+{
+  if constexpr (std::is_arithmetic_v<T>) {
+    return sizeof(v) + v.capacity() * sizeof(T);
+  } else {
+    std::size_t n = sizeof(v) + (v.capacity() - v.size()) * sizeof(T);
+    for (const auto& x : v) n += ByteSize(x);
+    return n;
+  }
+}
+
+// Resident set size of the process in bytes, 0 where it cannot be read
+inline Long64_t CurrentRSS()
+{
+#ifdef __linux__
+  Long64_t pages = 0;
+  Long64_t resident = 0;
+  FILE* statm = std::fopen("/proc/self/statm", "r");
+  if (!statm) return 0;
+  const int nread = std::fscanf(statm, "%lld %lld", &pages, &resident);
+  std::fclose(statm);
+  return nread == 2 ? resident * static_cast<Long64_t>(sysconf(_SC_PAGESIZE)) : 0;
+#else
+  // not the current but the peak RSS (in kilobytes on most platforms), as close as getrusage gets
+  struct rusage usage;
+  if (getrusage(RUSAGE_SELF, &usage) != 0) return 0;
+  return static_cast<Long64_t>(usage.ru_maxrss) * 1024;
+#endif
+}
+
+// Samples the process RSS every `every` entries of each slot and keeps the peak seen by each slot. RSS is a
+// process-wide quantity, so the per-slot peaks show when (in which slot's entries) the memory was reached rather
+// than which thread owns it. Each slot only writes its own cache-line aligned counters.
+class RSSMonitor {
+public:
+  RSSMonitor(std::size_t nslots, ULong64_t every) : fEvery(every > 0 ? every : 1), fSlots(nslots > 0 ? nslots : 1)
+  {
+  }
+
+  bool Sample(unsigned int slot)
+  {
+    auto& s = fSlots[slot];
+    if (s.entries++ % fEvery == 0) {
+      const Long64_t rss = CurrentRSS();
+      if (rss > s.peak) s.peak = rss;
+    }
+    return true;
+  }
+
+  std::size_t NSlots() const { return fSlots.size(); }
+  Long64_t PeakRSS(unsigned int slot) const { return fSlots[slot].peak; }
+  ULong64_t Entries(unsigned int slot) const { return fSlots[slot].entries; }
+
+private:
+  struct alignas(64) Slot {
+    ULong64_t entries = 0;
+    Long64_t peak = 0;
+  };
+  ULong64_t fEvery;
+  std::vector<Slot> fSlots;
+};
+
+} // namespace rdfw
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+
+from rdframework.utils import cpp_reference, declare_cpp
+
+
+class MemoryProfile:
+    """Memory accounting booked by profile_memory: the summed byte size of every profiled column and the peak
+    process RSS seen by each slot. Accessing any result triggers the event loop."""
+
+    def __init__(self, column_sums: dict[str, Any], count: Any, monitor: Any):
+        self._column_sums = column_sums
+        self._count = count
+        self._monitor = monitor
+
+    def columns(self) -> list[str]:
+        return list(self._column_sums)
+
+    def results(self) -> list[Any]:
+        """The booked (lazy) results, e.g. to pass to ROOT.RDF.RunGraphs"""
+        return list(self._column_sums.values()) + [self._count]
+
+    def events(self) -> int:
+        return int(self._count.GetValue())
+
+    def bytes_per_event(self) -> dict[str, float]:
+        """Mean bytes per event of each profiled column, largest first"""
+        nevents = max(self.events(), 1)
+        sizes = {
+            col: float(result.GetValue()) / nevents
+            for col, result in self._column_sums.items()
+        }
+        return dict(sorted(sizes.items(), key=lambda kv: kv[1], reverse=True))
+
+    def top(self, n: int = 10) -> list[tuple[str, float]]:
+        return list(self.bytes_per_event().items())[:n]
+
+    def peak_rss_per_slot(self) -> list[int]:
+        """Peak resident set size in bytes seen while each slot processed its entries (0 for unused slots)"""
+        self.events()  # make sure the event loop has run
+        return [
+            int(self._monitor.PeakRSS(slot)) for slot in range(self._monitor.NSlots())
+        ]
+
+    def entries_per_slot(self) -> list[int]:
+        self.events()
+        return [
+            int(self._monitor.Entries(slot)) for slot in range(self._monitor.NSlots())
+        ]
+
+    def summary(self, name: str = "", n: int = 10) -> str:
+        per_slot = self.peak_rss_per_slot()
+        lines = [
+            f"{name or 'Memory profile'}: {self.events()} events, "
+            f"peak RSS {max(per_slot, default=0) / 2**20:.1f} MiB"
+        ]
+        lines += [
+            f"  slot {slot:3d}: {rss / 2**20:10.1f} MiB over {entries} entries"
+            for slot, (rss, entries) in enumerate(
+                zip(per_slot, self.entries_per_slot())
+            )
+            if entries
+        ]
+        lines.append(f"  top {n} columns by bytes per event:")
+        lines += [f"  {size:12.1f}  {col}" for col, size in self.top(n)]
+        return "\n".join(lines)
+
+
+def profile_memory(
+    events: Any,
+    columns: list[str] | None = None,
+    sample_every: int = 1000,
+    prefix: str = "mem_",
+) -> tuple[Any, MemoryProfile]:
+    """Book the per-event byte size of columns (by default every Define'd column, e.g. the Take outputs of the
+    selectors and the unpacked VID columns) and sample the process RSS every sample_every entries of each slot.
+    Book it on the node whose events should be counted, usually after the selection. Profiling evaluates every
+    profiled column for every event, including columns the analysis would otherwise only compute lazily on
+    another branch, so it is meant for dedicated instrumentation runs."""
+    ROOT = declare_cpp(Path(__file__).parent / "memory.cpp", "rdfw::RSSMonitor")
+    if columns is None:
+        columns = [
+            str(col)
+            for col in events.GetDefinedColumnNames()
+            if not str(col).startswith(prefix)
+        ]
+
+    monitor = ROOT.rdfw.RSSMonitor(int(events.GetNSlots()), sample_every)
+    ref = cpp_reference(monitor, "rdfw::RSSMonitor")
+    events = events.Filter(f"return {ref}.Sample(rdfslot_);")
+
+    column_sums = {}
+    for col in columns:
+        size_col = f"{prefix}bytes_{col}"
+        events = events.Define(
+            size_col, f"return static_cast<ULong64_t>(rdfw::ByteSize({col}));"
+        )
+        column_sums[col] = events.Sum(size_col)
+    return events, MemoryProfile(column_sums, events.Count(), monitor)
+
+
+def memory_report(profiles: dict[str, MemoryProfile], n: int = 10) -> str:
+    """Summaries of the profiles of several datasets, keyed by dataset name"""
+    return "\n\n".join(profile.summary(name, n) for name, profile in profiles.items())
@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from typing import Any
 
+from rdframework.utils import is_columnar
+
 
 def lepton_channel_categorization(
     events: Any,
@@ -15,6 +17,21 @@ def lepton_channel_categorization(
 ) -> Any:
     """Define event-level masks categorizing events into different lepton channels (ee_OS, emu_SS, mumu_OS,
     maybe 1 and 3-lepton channels, or (subsets) of the 1-lepton channels with an additional nonisolated lepton"""
+    if is_columnar(events):
+        from rdframework.columnar.selections import (
+            lepton_channel_categorization as columnar_categorization,
+        )
+
+        return columnar_categorization(
+            events,
+            iso_muons,
+            iso_electrons,
+            era,
+            is_mc,
+            run_period=run_period,
+            noniso_muons=noniso_muons,
+            noniso_electrons=noniso_electrons,
+        )
     # might be better to separate channel categorization from triggering, but lots of overlap calculations:
     # define the different channels, e.g. ee (OS), emu (SS), etc.
 
@@ -160,9 +177,13 @@ def dilepton_trigger_selection(
 ) -> Any:
     """
     Takes as input an events dataframe, collection names for isolated leptons, year, run period, data stream, and
-    WIP note: Could be written to take advantage of DefinePerSample, but would be a significant departure from coffea"""
-    old_column_names = {str(col) for col in events.GetColumnNames()}
+    WIP note: Could be written to take advantage of DefinePerSample, but would be a significant departure from coffea
+
+    data_stream='merged' is for data where several streams are processed together and duplicates are removed on
+    (run, luminosityBlock, event) with rdframework.filters.duplicates, so every trigger is accepted as in MC.
 
+    data_stream='MET' also accepts every dilepton trigger, without overlap removal: MET-triggered events
+    (trig_*_MET) measure the dilepton trigger efficiencies, see rdframework.filters.trigger_efficiency"""
     if not iso_muons.endswith("_"):
         iso_muons += "_"
     if not iso_electrons.endswith("_"):
@@ -250,7 +271,7 @@ def dilepton_trigger_selection(
                 && (first_iso_electron_pt > 25)
                 && (second_iso_electron_pt > 15)""",
         )
-        if is_mc:
+        if is_mc or data_stream in ("merged", "MET"):
             events = events.Define(
                 "trig_emu",
                 "(trig_emu_MuonEG1 || trig_emu_MuonEG2 || trig_emu_SingleMuon || trig_emu_EGamma)",
@@ -293,8 +314,6 @@ def dilepton_trigger_selection(
                 events = events.Define(
                     "trig_ee", "(trig_ee_EGamma1 || trig_ee_EGamma2)"
                 )
-            elif data_stream == "MET":
-                raise NotImplementedError
             else:
                 raise ValueError(
                     f"data_stream must be specified for is_mc=False (for event overlap removal), input: {data_stream}"
@@ -397,7 +416,7 @@ def dilepton_trigger_selection(
                 && (second_iso_electron_pt > 15)"""
             ),
         )
-        if is_mc:
+        if is_mc or data_stream in ("merged", "MET"):
             events = events.Define(
                 "trig_emu",
                 "(trig_emu_MuonEG1 || trig_emu_MuonEG2 || trig_emu_SingleMuon || trig_emu_SingleElectron)",
@@ -408,10 +427,6 @@ def dilepton_trigger_selection(
             events = events.Define(
                 "trig_ee", "(trig_ee_DoubleEG || trig_ee_SingleElectron)"
             )
-            # TODO:
-            # Insert dilepton events triggered on MET, NO overlap removal in data - use these for trigger scale factors
-            # So need events passing dilepton cuts + MET trigger/MET cut as denominator of SFs,
-            # and events passing dilepton cuts + MET trigger/MET cut + dilepton triggers for numerator -> Get efficiency
         else:
             if data_stream == "MuonEG":
                 # Select emu if they pass any triggers, we'll pick up the rest from the exclusive events in SingleMuon and SingleElectron
@@ -453,8 +468,6 @@ def dilepton_trigger_selection(
                     "trig_ee",
                     "(trig_ee_DoubleEG == false && trig_ee_SingleElectron == true)",
                 )
-            elif data_stream == "MET":
-                raise NotImplementedError
             else:
                 raise ValueError(
                     f"data_stream must be specified for is_mc=False (for event overlap removal), input: {data_stream}"
@@ -464,8 +477,4 @@ def dilepton_trigger_selection(
     elif era == "2016":
         raise NotImplementedError
 
-    new_column_names = list(
-        {str(col) for col in events.GetDefinedColumnNames()} - old_column_names
-    )
-    new_column_names.sort()
     return events
@@ -2,19 +2,18 @@ from __future__ import annotations
 
 from typing import Any
 
+from rdframework.filters.lumimask import LumiMask
+from rdframework.utils import is_columnar
 
-def PV_MET_filter(
-    events: Any,
+
+def MET_filter_flags(
     era: str,
     is_mc: bool,
-    min_NDoF: int = 4,
-    max_abs_z: float = 24.0,
-    max_rho: float = 2.0,
     is_ultra_legacy: bool = True,
     is_fastsim_MC: bool = False,
     include_HF: bool = False,
-    return_applied_flags: bool = False,
-) -> Any:
+) -> list[str]:
+    """Return the recommended Flag_* branches for the MET filters"""
     if is_fastsim_MC is True:
         raise NotImplementedError(
             "Appropriate settings for FastSim MonteCarlo is not yet included in this function"
@@ -55,6 +54,37 @@ def PV_MET_filter(
         raise NotImplementedError(
             "legacy should be True or False, True if it's an (Ultra-)Legacy sample."
         )
+    return flags
+
+
+def PV_MET_filter(
+    events: Any,
+    era: str,
+    is_mc: bool,
+    min_NDoF: int = 4,
+    max_abs_z: float = 24.0,
+    max_rho: float = 2.0,
+    is_ultra_legacy: bool = True,
+    is_fastsim_MC: bool = False,
+    include_HF: bool = False,
+    return_applied_flags: bool = False,
+) -> Any:
+    if is_columnar(events):
+        from rdframework.columnar.selections import PV_MET_filter as columnar_filter
+
+        return columnar_filter(
+            events,
+            era,
+            is_mc,
+            min_NDoF=min_NDoF,
+            max_abs_z=max_abs_z,
+            max_rho=max_rho,
+            is_ultra_legacy=is_ultra_legacy,
+            is_fastsim_MC=is_fastsim_MC,
+            include_HF=include_HF,
+            return_applied_flags=return_applied_flags,
+        )
+    flags = MET_filter_flags(era, is_mc, is_ultra_legacy, is_fastsim_MC, include_HF)
 
     PV_mask = f"return (PV_ndof >= {min_NDoF}) && (abs(PV_z) < {max_abs_z}) && (sqrt(PV_x * PV_x + PV_y * PV_y) < {max_rho});"
     PV_nicename = "PV Filters: " + PV_mask.replace("&&", "and").replace("PV_", "")
@@ -72,3 +102,21 @@ def PV_MET_filter(
         return filtered, flags
     else:
         return filtered
+
+
+def certified_lumi_filter(
+    events: Any,
+    is_mc: bool,
+    golden_json: str | LumiMask,
+    record: bool = True,
+) -> Any:
+    """Apply the certified luminosity mask to data, MonteCarlo is returned unchanged. Pass a LumiMask rather than a
+    path to reuse the parsed mask, and to read back its recorded_blocks() after the event loop"""
+    if is_mc:
+        return events
+    mask = (
+        golden_json
+        if isinstance(golden_json, LumiMask)
+        else LumiMask.from_json(golden_json)
+    )
+    return mask.apply(events, record=record)
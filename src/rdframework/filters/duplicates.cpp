@@ -0,0 +1,206 @@
+#include <RtypesCore.h>
+
+#include <atomic>
+#include <cstdint>
+#include <cstdio>
+#include <fstream>
+#include <memory>
+#include <mutex>
+#include <stdexcept>
+#include <string>
+#include <unordered_map>
+#include <vector>
+
+namespace rdfw {
+
+// Open-addressing (linear probing) set of non-zero 64 bit keys, 8 bytes per slot at <= 70% load
+class CompactKeySet {
+public:
+  bool Insert(std::uint64_t key)
+  {
+    if ((fSize + 1) * 10 > fSlots.size() * 7) Grow();
+    return InsertNoGrow(key);
+  }
+  bool Contains(std::uint64_t key) const
+  {
+    if (fSlots.empty()) return false;
+    const std::size_t mask = fSlots.size() - 1;
+    for (std::size_t i = Mix(key) & mask; fSlots[i] != 0; i = (i + 1) & mask) {
+      if (fSlots[i] == key) return true;
+    }
+    return false;
+  }
+  std::size_t Size() const { return fSize; }
+  std::size_t MemoryBytes() const { return fSlots.capacity() * sizeof(std::uint64_t); }
+  const std::vector<std::uint64_t>& Slots() const { return fSlots; }
+
+private:
+  static std::uint64_t Mix(std::uint64_t x)
+  {
+    x ^= x >> 30;
+    x *= 0xbf58476d1ce4e5b9ULL;
+    x ^= x >> 27;
+    x *= 0x94d049bb133111ebULL;
+    x ^= x >> 31;
+    return x;
+  }
+  bool InsertNoGrow(std::uint64_t key)
+  {
+    const std::size_t mask = fSlots.size() - 1;
+    std::size_t i = Mix(key) & mask;
+    while (fSlots[i] != 0) {
+      if (fSlots[i] == key) return false;
+      i = (i + 1) & mask;
+    }
+    fSlots[i] = key;
+    ++fSize;
+    return true;
+  }
+  void Grow()
+  {
+    std::vector<std::uint64_t> old;
+    old.swap(fSlots);
+    fSlots.assign(old.empty() ? 16 : 2 * old.size(), 0);
+    fSize = 0;
+    for (auto key : old) {
+      if (key != 0) InsertNoGrow(key);
+    }
+  }
+  std::vector<std::uint64_t> fSlots;
+  std::size_t fSize = 0;
+};
+
+// Thread-safe set of (run, luminosityBlock, event), sharded on (run, luminosityBlock) so concurrent slots rarely
+// contend for the same lock. Within a run the key packs luminosityBlock (23 bits) and event (40 bits) exactly.
+// Every event loop starts from the events loaded from a saved set: inserting with a new loop number (the
+// dataframe's GetNRuns()) first drops the events inserted by the previous loop, so a second event loop over the
+// same graph does not reject every event as a duplicate of itself.
+class DuplicateEventSet {
+public:
+  DuplicateEventSet(std::size_t nshards = 64, std::size_t max_events = 0)
+    : fMaxEvents(max_events), fSize(0), fLoadedSize(0), fLoop(0)
+  {
+    // Shards are held by pointer, a std::mutex can be neither copied nor moved
+    for (std::size_t i = 0; i < (nshards > 0 ? nshards : 1); ++i) fShards.emplace_back(new Shard());
+  }
+
+  // Returns true the first time an event is seen in event loop number loop
+  bool Insert(UInt_t run, UInt_t lumi, ULong64_t event, ULong64_t loop = 0)
+  {
+    if (lumi >= (1u << 23) || event >= (1ULL << 40))
+      throw std::out_of_range("rdfw::DuplicateEventSet: luminosityBlock or event number too large to pack");
+    if (loop != fLoop.load()) BeginLoop(loop);
+    const std::uint64_t key = (1ULL << 63) | (static_cast<std::uint64_t>(lumi) << 40) | event;
+    Shard& shard = ShardOf(run, lumi);
+    std::lock_guard<std::mutex> lock(shard.mutex);
+    auto& keys = shard.runs[run];
+    if (fMaxEvents > 0 && fSize.load() - fLoadedSize.load() >= fMaxEvents) {
+      // Only fail on new events, duplicates of stored events never grow the set
+      if (keys.Contains(key)) return false;
+      throw std::length_error("rdfw::DuplicateEventSet: max_events exceeded, raise the limit or split the job");
+    }
+    const bool inserted = keys.Insert(key);
+    if (inserted) ++fSize;
+    return inserted;
+  }
+
+  std::size_t Size() const { return fSize.load(); }
+
+  std::size_t MemoryBytes() const
+  {
+    std::size_t total = 0;
+    for (const auto& shard : fShards) {
+      std::lock_guard<std::mutex> lock(shard->mutex);
+      for (const auto& kv : shard->runs) total += kv.second.MemoryBytes();
+    }
+    return total;
+  }
+
+  // Binary format: magic, then blocks of (run, number of keys, keys), written to path.tmp and renamed into place
+  void Save(const std::string& path) const
+  {
+    const std::string tmp = path + ".tmp";
+    {
+      std::ofstream out(tmp, std::ios::binary | std::ios::trunc);
+      if (!out) throw std::runtime_error("rdfw::DuplicateEventSet: cannot write " + tmp);
+      out.write(Magic(), kMagicSize);
+      for (const auto& shard : fShards) {
+        std::lock_guard<std::mutex> lock(shard->mutex);
+        for (const auto& kv : shard->runs) {
+          const UInt_t run = kv.first;
+          const std::uint64_t count = kv.second.Size();
+          out.write(reinterpret_cast<const char*>(&run), sizeof(run));
+          out.write(reinterpret_cast<const char*>(&count), sizeof(count));
+          for (auto key : kv.second.Slots()) {
+            if (key != 0) out.write(reinterpret_cast<const char*>(&key), sizeof(key));
+          }
+        }
+      }
+      if (!out) throw std::runtime_error("rdfw::DuplicateEventSet: failed writing " + tmp);
+    }
+    if (std::rename(tmp.c_str(), path.c_str()) != 0)
+      throw std::runtime_error("rdfw::DuplicateEventSet: cannot rename " + tmp + " to " + path);
+  }
+
+  // Merge the events stored in path into this set, and into the events every later event loop starts from. The
+  // max_events limit applies to the events inserted by an event loop, not to those loaded.
+  void Load(const std::string& path)
+  {
+    std::ifstream in(path, std::ios::binary);
+    if (!in) throw std::runtime_error("rdfw::DuplicateEventSet: cannot read " + path);
+    char magic[kMagicSize];
+    in.read(magic, kMagicSize);
+    if (!in || std::string(magic, kMagicSize) != std::string(Magic(), kMagicSize))
+      throw std::runtime_error("rdfw::DuplicateEventSet: " + path + " is not a duplicate event set");
+    UInt_t run;
+    std::uint64_t count, key;
+    while (in.read(reinterpret_cast<char*>(&run), sizeof(run))) {
+      in.read(reinterpret_cast<char*>(&count), sizeof(count));
+      for (std::uint64_t i = 0; i < count && in.read(reinterpret_cast<char*>(&key), sizeof(key)); ++i) {
+        const UInt_t lumi = static_cast<UInt_t>((key >> 40) & ((1u << 23) - 1));
+        Shard& shard = ShardOf(run, lumi);
+        std::lock_guard<std::mutex> lock(shard.mutex);
+        shard.loaded[run].Insert(key);
+        if (shard.runs[run].Insert(key)) {
+          ++fSize;
+          ++fLoadedSize;
+        }
+      }
+    }
+  }
+
+private:
+  static const char* Magic() { return "RDFWDUP1"; }
+  static constexpr std::size_t kMagicSize = 8;
+  struct Shard {
+    mutable std::mutex mutex;
+    std::unordered_map<UInt_t, CompactKeySet> runs;
+    std::unordered_map<UInt_t, CompactKeySet> loaded;
+  };
+  std::vector<std::unique_ptr<Shard>> fShards;
+  std::size_t fMaxEvents;
+  std::atomic<std::size_t> fSize;
+  std::atomic<std::size_t> fLoadedSize;
+  std::atomic<ULong64_t> fLoop;
+  std::mutex fLoopMutex;
+
+  Shard& ShardOf(UInt_t run, UInt_t lumi)
+  {
+    return *fShards[(static_cast<std::uint64_t>(run) * 0x9e3779b97f4a7c15ULL + lumi) % fShards.size()];
+  }
+
+  // Go back to the loaded events, once, when the first event of a new event loop is inserted
+  void BeginLoop(ULong64_t loop)
+  {
+    std::lock_guard<std::mutex> reset(fLoopMutex);
+    if (loop == fLoop.load()) return;
+    for (auto& shard : fShards) {
+      std::lock_guard<std::mutex> lock(shard->mutex);
+      shard->runs = shard->loaded;
+    }
+    fSize = fLoadedSize.load();
+    fLoop = loop;
+  }
+};
+
+} // namespace rdfw
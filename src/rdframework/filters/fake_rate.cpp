@@ -0,0 +1,41 @@
+#include <ROOT/RVec.hxx>
+
+#include <algorithm>
+#include <cmath>
+#include <cstddef>
+#include <utility>
+
+#include "../corrections/tables.cpp"
+
+namespace rdfw {
+
+// Fake rates binned in lepton pt and |eta|, with their uncertainties. Values outside the binning take the rate
+// of the nearest bin.
+class FakeRateMap {
+public:
+  explicit FakeRateMap(CorrectionTable rates) : fRates(std::move(rates)) {}
+
+  // The rate, shifted by variation (+1, -1) times its uncertainty, kept below 1 so the transfer factor is finite
+  double Rate(double pt, double eta, int variation = 0) const
+  {
+    const auto i = fRates.Index(pt, std::abs(eta));
+    return std::min(std::max(fRates.Value(i) + variation * fRates.Error(i), 0.0), 0.999);
+  }
+
+  // The transfer factor of the non-isolated leptons of an event, the product of f / (1 - f) over them
+  template <typename T, typename U>
+  double TransferFactor(const ROOT::VecOps::RVec<T>& pt, const ROOT::VecOps::RVec<U>& eta, int variation = 0) const
+  {
+    double factor = 1.0;
+    for (std::size_t i = 0; i < pt.size(); ++i) {
+      const double rate = Rate(pt[i], eta[i], variation);
+      factor *= rate / (1.0 - rate);
+    }
+    return factor;
+  }
+
+private:
+  CorrectionTable fRates;
+};
+
+} // namespace rdfw
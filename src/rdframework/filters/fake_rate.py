@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+
+from rdframework.corrections.tables import CorrectionTable
+from rdframework.histograms.booking import (
+    BookedCategories,
+    BookedHistograms,
+    HistogramVariable,
+    book_histograms,
+)
+from rdframework.utils import cpp_reference, declare_cpp
+
+# dilepton signal region -> the iso + non-iso control regions of lepton_channel_categorization predicting its
+# fake-lepton background, where the non-isolated lepton takes the place of the second isolated one
+FAKE_REGIONS = {
+    "ee_OS": ["channel_e_nie_OS"],
+    "emu_OS": ["channel_e_nim_OS", "channel_mu_nie_OS"],
+    "mumu_OS": ["channel_mu_nim_OS"],
+    "ee_SS": ["channel_e_nie_SS"],
+    "emu_SS": ["channel_e_nim_SS", "channel_mu_nie_SS"],
+    "mumu_SS": ["channel_mu_nim_SS"],
+}
+# systematic name -> shift of the fake rates in units of their uncertainty
+FAKE_RATE_VARIATIONS = {"nominal": 0, "fakeRateUp": 1, "fakeRateDown": -1}
+
+
+class FakeRates:
+    """The rate at which a non-isolated lepton passes the isolated selection, binned in pt and |eta| (rates and
+    errors are nested lists indexed [pt bin][eta bin]), e.g. measured in a multijet-enriched region. Outside the
+    binning the nearest bin is used."""
+
+    def __init__(
+        self,
+        pt_edges: list[float],
+        eta_edges: list[float],
+        rates: list[list[float]],
+        errors: list[list[float]] | None = None,
+    ):
+        if len(pt_edges) < 2 or len(eta_edges) < 2:
+            raise ValueError("Fake rates need at least one pt and one eta bin")
+        shape = (len(pt_edges) - 1, len(eta_edges) - 1)
+        errors = errors if errors is not None else [[0.0] * shape[1]] * shape[0]
+        for table in [rates, errors]:
+            if len(table) != shape[0] or any(len(row) != shape[1] for row in table):
+                raise ValueError(f"Fake rates must have {shape[0]} x {shape[1]} bins")
+        if any(not 0 <= rate < 1 for row in rates for rate in row):
+            raise ValueError("Fake rates must be in [0, 1)")
+        self._table = CorrectionTable([pt_edges, eta_edges], rates, errors)
+        self._map = None
+
+    @classmethod
+    def from_histogram(cls, hist: Any) -> FakeRates:
+        """Fake rates from a TH2 with pt on the x axis and |eta| on the y axis, with the bin errors"""
+        nx, ny = hist.GetNbinsX(), hist.GetNbinsY()
+        pt_edges = [hist.GetXaxis().GetBinLowEdge(i) for i in range(1, nx + 2)]
+        eta_edges = [hist.GetYaxis().GetBinLowEdge(j) for j in range(1, ny + 2)]
+        rates = [
+            [hist.GetBinContent(i, j) for j in range(1, ny + 1)]
+            for i in range(1, nx + 1)
+        ]
+        errors = [
+            [hist.GetBinError(i, j) for j in range(1, ny + 1)] for i in range(1, nx + 1)
+        ]
+        return cls(pt_edges, eta_edges, rates, errors)
+
+    def rate(self, pt: float, eta: float, variation: int = 0) -> float:
+        rate = self._table.value(pt, abs(eta), variation=variation)
+        return min(max(rate, 0.0), 0.999)
+
+    def transfer_factor(self, pt: float, eta: float, variation: int = 0) -> float:
+        """The weight f / (1 - f) of a control region event for one non-isolated lepton"""
+        rate = self.rate(pt, eta, variation)
+        return rate / (1 - rate)
+
+    def reference(self) -> str:
+        """The C++ map of the rates, created once, for jitted expressions"""
+        if self._map is None:
+            ROOT = declare_cpp(
+                Path(__file__).parent / "fake_rate.cpp", "rdfw::FakeRateMap"
+            )
+            self._map = ROOT.rdfw.FakeRateMap(self._table.compiled())
+        return cpp_reference(self._map, "rdfw::FakeRateMap")
+
+
+def load_fake_rates(path: str, name: str) -> FakeRates:
+    """Read the TH2 name from the ROOT file at path"""
+    import ROOT
+
+    infile = ROOT.TFile.Open(path)
+    if not infile or infile.IsZombie():
+        raise OSError(f"Could not open {path}")
+    hist = infile.Get(name)
+    if not hist:
+        raise KeyError(f"{path} has no {name}")
+    rates = FakeRates.from_histogram(hist)
+    infile.Close()
+    return rates
+
+
+class FakePrediction(BookedCategories):
+    """The predicted fake-lepton background histograms of every variable and signal region, booked by
+    book_fake_prediction as the categories of one BookedHistograms"""
+
+    def __init__(
+        self,
+        booked: BookedHistograms,
+        regions: list[str],
+        prefix: str,
+        rates: list[FakeRates],
+    ):
+        super().__init__(booked, regions, prefix)
+        self._rates = rates  # the event loop reads their C++ maps, keep them alive
+
+    def regions(self) -> list[str]:
+        return list(self._names)
+
+    def prediction(
+        self, variable: str, region: str, systematic: str = "nominal"
+    ) -> Any:
+        return self._histogram(variable, region, systematic)
+
+
+def book_fake_prediction(
+    events: Any,
+    variables: list[HistogramVariable],
+    electron_rates: FakeRates,
+    muon_rates: FakeRates,
+    noniso_electrons: str,
+    noniso_muons: str,
+    weight: str | None = None,
+    regions: dict[str, list[str]] | None = None,
+    prefix: str = "fakes_",
+) -> tuple[Any, FakePrediction]:
+    """Book the fake-lepton background prediction of every signal region (name -> control region channel
+    columns, by default the dilepton regions fed by the iso + non-iso channels of lepton_channel_categorization),
+    to run in the same event loop as the signal region histograms.
+
+    Control region events are weighted by the transfer factor f / (1 - f) of their non-isolated lepton, with the
+    fake rates shifted up and down by their uncertainties for the fakeRateUp and fakeRateDown systematics. In
+    data this is the fake prediction; the same prediction booked on the prompt MC is to be subtracted from it."""
+    regions = dict(regions) if regions is not None else dict(FAKE_REGIONS)
+    if not noniso_electrons.endswith("_"):
+        noniso_electrons += "_"
+    if not noniso_muons.endswith("_"):
+        noniso_muons += "_"
+    weights = {}
+    for systematic, variation in FAKE_RATE_VARIATIONS.items():
+        column = f"{prefix}weight_{systematic}"
+        events = events.Define(
+            column,
+            f"{electron_rates.reference()}.TransferFactor({noniso_electrons}pt, {noniso_electrons}eta, {variation})"
+            f" * {muon_rates.reference()}.TransferFactor({noniso_muons}pt, {noniso_muons}eta, {variation})",
+        )
+        weights[systematic] = column if weight is None else f"({weight}) * {column}"
+    categories = []
+    for region, channels in regions.items():
+        events = events.Define(f"{prefix}{region}", " || ".join(channels))
+        categories.append(f"{prefix}{region}")
+    events, booked = book_histograms(
+        events, variables, categories, weights, prefix=f"{prefix}hb_"
+    )
+    return events, FakePrediction(
+        booked, list(regions), prefix, [electron_rates, muon_rates]
+    )
@@ -0,0 +1,106 @@
+#include <RtypesCore.h>
+
+#include <algorithm>
+#include <cstddef>
+#include <map>
+#include <unordered_set>
+#include <utility>
+#include <vector>
+
+namespace rdfw {
+
+// Certified (run, luminosityBlock) ranges held as flat sorted arrays, looked up by binary search on the run and
+// then on the first luminosityBlock of each range. After Finalize the ranges are read-only, so Accept is safe to
+// call from any number of slots; AcceptAndRecord additionally keeps per-slot sets of the accepted blocks.
+class LumiMask {
+public:
+  explicit LumiMask(std::size_t nslots = 1) : fSlots(nslots > 0 ? nslots : 1) {}
+
+  void AddRange(UInt_t run, UInt_t first, UInt_t last) { fPending[run].emplace_back(first, last); }
+
+  // Sort and merge the added ranges into the lookup arrays
+  void Finalize()
+  {
+    fRuns.clear();
+    fOffsets.assign(1, 0);
+    fFirst.clear();
+    fLast.clear();
+    for (auto& kv : fPending) {
+      auto& ranges = kv.second;
+      std::sort(ranges.begin(), ranges.end());
+      fRuns.push_back(kv.first);
+      for (const auto& r : ranges) {
+        if (fFirst.size() > fOffsets.back() && r.first <= fLast.back() + 1) {
+          fLast.back() = std::max(fLast.back(), r.second);
+        } else {
+          fFirst.push_back(r.first);
+          fLast.push_back(r.second);
+        }
+      }
+      fOffsets.push_back(fFirst.size());
+    }
+  }
+
+  bool Accept(UInt_t run, UInt_t lumi) const
+  {
+    auto rit = std::lower_bound(fRuns.begin(), fRuns.end(), run);
+    if (rit == fRuns.end() || *rit != run) return false;
+    const std::size_t r = rit - fRuns.begin();
+    auto begin = fFirst.begin() + fOffsets[r];
+    auto end = fFirst.begin() + fOffsets[r + 1];
+    auto it = std::upper_bound(begin, end, lumi);
+    if (it == begin) return false;
+    return lumi <= fLast[(it - fFirst.begin()) - 1];
+  }
+
+  bool AcceptAndRecord(unsigned int slot, UInt_t run, UInt_t lumi)
+  {
+    if (!Accept(run, lumi)) return false;
+    auto& record = fSlots[slot];
+    const ULong64_t block = (static_cast<ULong64_t>(run) << 32) | lumi;
+    // Events arrive grouped by luminosityBlock, so most lookups are skipped
+    if (block != record.last) {
+      record.blocks.insert(block);
+      record.last = block;
+    }
+    return true;
+  }
+
+  // Must not be called while an event loop using this mask is running
+  void SetNSlots(std::size_t nslots)
+  {
+    if (nslots > fSlots.size()) fSlots.resize(nslots);
+  }
+
+  // Sorted, unique (run << 32 | luminosityBlock) of every block accepted by AcceptAndRecord
+  std::vector<ULong64_t> RecordedBlocks() const
+  {
+    std::vector<ULong64_t> blocks;
+    for (const auto& record : fSlots) blocks.insert(blocks.end(), record.blocks.begin(), record.blocks.end());
+    std::sort(blocks.begin(), blocks.end());
+    blocks.erase(std::unique(blocks.begin(), blocks.end()), blocks.end());
+    return blocks;
+  }
+
+  void ClearRecord()
+  {
+    for (auto& record : fSlots) {
+      record.blocks.clear();
+      record.last = 0;
+    }
+  }
+
+private:
+  struct alignas(64) SlotRecord {
+    ULong64_t last = 0;
+    std::unordered_set<ULong64_t> blocks;
+  };
+  std::map<UInt_t, std::vector<std::pair<UInt_t, UInt_t>>> fPending;
+  std::vector<UInt_t> fRuns;
+  std::vector<std::size_t> fOffsets;
+  std::vector<UInt_t> fFirst;
+  std::vector<UInt_t> fLast;
+  std::vector<SlotRecord> fSlots;
+};
+
+} // namespace rdfw
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import bisect
+import csv
+import json
+from pathlib import Path
+from typing import Any
+
+from rdframework.utils import cpp_reference, declare_cpp
+
+
+def load_brilcalc_csv(path: str) -> dict[tuple[int, int], float]:
+    """Read the recorded luminosity per (run, luminosityBlock) from 'brilcalc lumi --byls' csv output, in the units
+    requested from brilcalc (e.g. -u /pb)"""
+    lumis: dict[tuple[int, int], float] = {}
+    recorded_col = None
+    with open(path, newline="") as f:
+        for row in csv.reader(f):
+            if not row:
+                continue
+            if row[0].startswith("#"):
+                if row[0].startswith("#run:fill"):
+                    recorded_col = next(
+                        i for i, name in enumerate(row) if name.startswith("recorded")
+                    )
+                continue
+            if recorded_col is None:
+                raise ValueError(f"{path} has no '#run:fill,ls,...' header line")
+            run = int(row[0].split(":")[0])
+            lumi = int(row[1].split(":")[0])
+            lumis[(run, lumi)] = lumis.get((run, lumi), 0.0) + float(row[recorded_col])
+    return lumis
+
+
+class LumiMask:
+    """Certified luminosity mask, e.g. from a golden JSON of the form {"run": [[first, last], ...], ...}.
+
+    The ranges are sorted and merged once. apply() filters an RDataFrame with a compiled binary-search lookup that
+    is read-only in the event loop (so safe under ImplicitMT) and can record the accepted luminosity blocks per
+    slot, to report the integrated luminosity of the processed data afterwards."""
+
+    def __init__(self, runs: dict[int, list[tuple[int, int]]]):
+        self._runs: dict[int, list[tuple[int, int]]] = {}
+        for run in sorted(runs):
+            merged: list[tuple[int, int]] = []
+            for first, last in sorted(runs[run]):
+                if merged and first <= merged[-1][1] + 1:
+                    merged[-1] = (merged[-1][0], max(merged[-1][1], last))
+                else:
+                    merged.append((first, last))
+            self._runs[int(run)] = merged
+        self._firsts = {
+            run: [r[0] for r in ranges] for run, ranges in self._runs.items()
+        }
+        self._compiled: Any = None
+
+    @classmethod
+    def from_json(cls, path: str) -> LumiMask:
+        with open(path) as f:
+            raw = json.load(f)
+        return cls(
+            {
+                int(run): [(int(a), int(b)) for a, b in ranges]
+                for run, ranges in raw.items()
+            }
+        )
+
+    def runs(self) -> list[int]:
+        return list(self._runs)
+
+    def ranges(self, run: int) -> list[tuple[int, int]]:
+        return list(self._runs.get(run, []))
+
+    def accept(self, run: int, luminosity_block: int) -> bool:
+        """Python-side lookup, for use outside the event loop"""
+        firsts = self._firsts.get(run)
+        if not firsts:
+            return False
+        i = bisect.bisect_right(firsts, luminosity_block) - 1
+        return i >= 0 and luminosity_block <= self._runs[run][i][1]
+
+    def __contains__(self, block: tuple[int, int]) -> bool:
+        return self.accept(*block)
+
+    def _compile(self, nslots: int) -> Any:
+        if self._compiled is None:
+            ROOT = declare_cpp(Path(__file__).parent / "lumimask.cpp", "rdfw::LumiMask")
+            self._compiled = ROOT.rdfw.LumiMask(nslots)
+            for run, ranges in self._runs.items():
+                for first, last in ranges:
+                    self._compiled.AddRange(run, first, last)
+            self._compiled.Finalize()
+        else:
+            self._compiled.SetNSlots(nslots)
+        return self._compiled
+
+    def apply(
+        self,
+        events: Any,
+        run: str = "run",
+        luminosity_block: str = "luminosityBlock",
+        record: bool = True,
+    ) -> Any:
+        """Filter events on the mask, recording the accepted luminosity blocks if record is True"""
+        compiled = self._compile(int(events.GetNSlots()))
+        ref = cpp_reference(compiled, "rdfw::LumiMask")
+        if record:
+            mask = f"return {ref}.AcceptAndRecord(rdfslot_, {run}, {luminosity_block});"
+        else:
+            mask = f"return {ref}.Accept({run}, {luminosity_block});"
+        return events.Filter(mask, "Certified luminosity")
+
+    def recorded_blocks(self) -> list[tuple[int, int]]:
+        """The (run, luminosityBlock) accepted by apply(..., record=True) so far, available after the event loop"""
+        if self._compiled is None:
+            return []
+        return [
+            (int(b) >> 32, int(b) & 0xFFFFFFFF) for b in self._compiled.RecordedBlocks()
+        ]
+
+    def integrated_luminosity(
+        self,
+        lumi_table: dict[tuple[int, int], float],
+        blocks: list[tuple[int, int]] | None = None,
+    ) -> float:
+        """Sum the luminosity of blocks (by default those recorded in the event loop) from a per-block table such as
+        load_brilcalc_csv returns. Blocks outside the mask do not contribute."""
+        if blocks is None:
+            blocks = self.recorded_blocks()
+        return sum(lumi_table.get(b, 0.0) for b in blocks if self.accept(*b))
+
+    def certified_luminosity(self, lumi_table: dict[tuple[int, int], float]) -> float:
+        """Sum the luminosity of every block in the table that the mask certifies"""
+        return sum(lumi for b, lumi in lumi_table.items() if self.accept(*b))
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import math
+from typing import Any, NamedTuple
+
+from rdframework.histograms.booking import (
+    BookedCategories,
+    HistogramVariable,
+    book_histograms,
+)
+
+# trigger flavour (the trig_{flavour} and trig_{flavour}_MET columns of dilepton_trigger_selection) -> channel
+DILEPTON_CHANNELS = {
+    "ee": "channel_ee_OS",
+    "emu": "channel_emu_OS",
+    "mumu": "channel_mumu_OS",
+}
+
+
+class EfficiencyBin(NamedTuple):
+    """The efficiency in one bin of a variable, with its lower and upper uncertainties"""
+
+    low: float
+    high: float
+    passed: float
+    total: float
+    efficiency: float
+    error_low: float
+    error_high: float
+
+
+def clopper_pearson(
+    passed: float, total: float, level: float = 0.682689492137
+) -> tuple[float, float, float]:
+    """Efficiency of unweighted counts with its Clopper-Pearson lower and upper uncertainties"""
+    import ROOT
+
+    if total <= 0:
+        return 0.0, 0.0, 0.0
+    eff = passed / total
+    lower = ROOT.TEfficiency.ClopperPearson(int(total), int(passed), level, False)
+    upper = ROOT.TEfficiency.ClopperPearson(int(total), int(passed), level, True)
+    return eff, eff - lower, upper - eff
+
+
+def weighted_efficiency(
+    sumw_passed: float, sumw2_passed: float, sumw_total: float, sumw2_total: float
+) -> tuple[float, float]:
+    """Efficiency of weighted counts, where passing events are a subset of the total, with its normal
+    approximation uncertainty sqrt((1 - 2 eff) sumw2_passed + eff^2 sumw2_total) / sumw_total"""
+    if sumw_total == 0:
+        return 0.0, 0.0
+    eff = sumw_passed / sumw_total
+    variance = (1 - 2 * eff) * sumw2_passed + eff * eff * sumw2_total
+    return eff, math.sqrt(max(variance, 0.0)) / abs(sumw_total)
+
+
+def scale_factors(
+    data: list[EfficiencyBin], mc: list[EfficiencyBin]
+) -> list[EfficiencyBin]:
+    """Data/MC scale factors per bin, with the relative uncertainties of the two efficiencies added in quadrature
+    (passed and total hold the data and MC efficiencies)"""
+    if [(b.low, b.high) for b in data] != [(b.low, b.high) for b in mc]:
+        raise ValueError("Data and MC efficiencies must have the same binning")
+    factors = []
+    for d, m in zip(data, mc):
+        if d.efficiency <= 0 or m.efficiency <= 0:
+            factors.append(
+                EfficiencyBin(d.low, d.high, d.efficiency, m.efficiency, 0.0, 0.0, 0.0)
+            )
+            continue
+        sf = d.efficiency / m.efficiency
+        factors.append(
+            EfficiencyBin(
+                d.low,
+                d.high,
+                d.efficiency,
+                m.efficiency,
+                sf,
+                sf
+                * math.hypot(d.error_low / d.efficiency, m.error_high / m.efficiency),
+                sf
+                * math.hypot(d.error_high / d.efficiency, m.error_low / m.efficiency),
+            )
+        )
+    return factors
+
+
+class TriggerEfficiency(BookedCategories):
+    """Numerator and denominator histograms of every variable and channel, booked together by
+    book_trigger_efficiency as the categories of one BookedHistograms"""
+
+    def channels(self) -> list[str]:
+        return list(self._names)
+
+    def denominator(self, variable: str, channel: str) -> Any:
+        return self._histogram(variable, f"{channel}_denominator")
+
+    def numerator(self, variable: str, channel: str) -> Any:
+        return self._histogram(variable, f"{channel}_numerator")
+
+    def efficiency(
+        self, variable: str, channel: str, weighted: bool = False
+    ) -> list[EfficiencyBin]:
+        """The efficiency per bin of variable, with Clopper-Pearson uncertainties, or for weighted (e.g. MC)
+        histograms the normal approximation from the sums of squared weights"""
+        num = self.numerator(variable, channel)
+        den = self.denominator(variable, channel)
+        bins = []
+        for i in range(1, den.GetNbinsX() + 1):
+            passed, total = num.GetBinContent(i), den.GetBinContent(i)
+            if weighted:
+                eff, error = weighted_efficiency(
+                    passed, num.GetBinError(i) ** 2, total, den.GetBinError(i) ** 2
+                )
+                error_low = min(error, eff)
+                error_high = min(error, 1.0 - eff)
+            else:
+                eff, error_low, error_high = clopper_pearson(passed, total)
+            bins.append(
+                EfficiencyBin(
+                    den.GetXaxis().GetBinLowEdge(i),
+                    den.GetXaxis().GetBinUpEdge(i),
+                    passed,
+                    total,
+                    eff,
+                    error_low,
+                    error_high,
+                )
+            )
+        return bins
+
+
+def book_trigger_efficiency(
+    events: Any,
+    variables: list[HistogramVariable],
+    channels: dict[str, str] | None = None,
+    weight: str | None = None,
+    prefix: str = "te_",
+) -> tuple[Any, TriggerEfficiency]:
+    """Book the dilepton trigger efficiency of every channel (trigger flavour -> channel column, by default the
+    opposite-sign ee, emu and mumu channels) in bins of every variable, all in one event loop.
+
+    The denominator of a channel is its events passing the MET reference trigger and the offline lepton pt
+    thresholds (trig_{flavour}_MET), the numerator those also passing the dilepton triggers (trig_{flavour}).
+    Run dilepton_trigger_selection first, with data_stream='MET' for data. The numerators and denominators are
+    the categories of a single book_histograms call, so every trigger column is evaluated once per event."""
+    channels = dict(channels) if channels is not None else dict(DILEPTON_CHANNELS)
+    categories = []
+    for flavour, channel in channels.items():
+        denominator = f"{prefix}{flavour}_denominator"
+        events = events.Define(denominator, f"({channel}) && trig_{flavour}_MET")
+        events = events.Define(
+            f"{prefix}{flavour}_numerator", f"{denominator} && trig_{flavour}"
+        )
+        categories += [denominator, f"{prefix}{flavour}_numerator"]
+    events, booked = book_histograms(
+        events,
+        variables,
+        categories,
+        {"nominal": weight if weight is not None else "1.0"},
+        prefix=prefix,
+        name_format="{channel}__{variable}",
+    )
+    return events, TriggerEfficiency(booked, list(channels), prefix)
@@ -0,0 +1,5 @@
+"Code related to booking and organizing histograms over many channels, variables and systematic variations"
+
+from __future__ import annotations
+
+__all__ = ["booking", "grouping", "weights"]
@@ -0,0 +1,41 @@
+#include <ROOT/RVec.hxx>
+
+#include <cstddef>
+#include <utility>
+
+namespace rdfw {
+
+// (category coordinate, weight) for every entry an event contributes to a batched histogram
+using FillPlan = std::pair<ROOT::VecOps::RVec<double>, ROOT::VecOps::RVec<double>>;
+
+// One entry per (active channel, weight variation), the category coordinate is the center of bin
+// channel_index * n_weights + weight_index of the category axis, which runs from 0 to n_channels * n_weights
+template <typename C, typename W>
+FillPlan BuildFillPlan(const ROOT::VecOps::RVec<C>& channels, const ROOT::VecOps::RVec<W>& weights)
+{
+  FillPlan plan;
+  const std::size_t nweights = weights.size();
+  std::size_t nactive = 0;
+  for (const auto& c : channels) {
+    if (c) ++nactive;
+  }
+  plan.first.reserve(nactive * nweights);
+  plan.second.reserve(nactive * nweights);
+  for (std::size_t c = 0; c < channels.size(); ++c) {
+    if (!channels[c]) continue;
+    for (std::size_t w = 0; w < nweights; ++w) {
+      plan.first.push_back(c * nweights + w + 0.5);
+      plan.second.push_back(weights[w]);
+    }
+  }
+  return plan;
+}
+
+// Repeat an event-level value once per entry of the fill plan, so all Histo2D inputs have the same size
+template <typename T>
+ROOT::VecOps::RVec<double> Broadcast(const T& value, std::size_t n)
+{
+  return ROOT::VecOps::RVec<double>(n, static_cast<double>(value));
+}
+
+} // namespace rdfw
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import re
+from array import array
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from rdframework.histograms.weights import WeightSet
+from rdframework.utils import declare_cpp
+
+_IDENTIFIER = re.compile(r"[A-Za-z_]\w*")
+
+
+class HistogramVariable(NamedTuple):
+    """An event-level quantity to histogram: a column name or expression, and either a number of bins with
+    low/high edges, or an explicit list of bin edges"""
+
+    name: str
+    expression: str
+    bins: int | list[float]
+    low: float = 0.0
+    high: float = 1.0
+    title: str = ""
+
+
+class BookedHistograms:
+    """The handful of 2D accumulators booked by book_histograms, one per variable, with the x axis holding the
+    variable and the y axis holding every (channel, systematic) combination. Accessing any histogram triggers
+    the event loop."""
+
+    def __init__(
+        self,
+        variables: list[HistogramVariable],
+        channels: list[str],
+        systematics: list[str],
+        results: dict[str, Any],
+        name_format: str,
+        varied: dict[str, Any] | None = None,
+    ):
+        self._variables = {var.name: var for var in variables}
+        self._channels = list(channels)
+        self._systematics = list(systematics)
+        self._results = results
+        self._name_format = name_format
+        self._varied = varied or {}
+        self._variation_keys: dict[str, str] = {}
+
+    def variables(self) -> list[str]:
+        return list(self._variables)
+
+    def channels(self) -> list[str]:
+        return list(self._channels)
+
+    def systematics(self) -> list[str]:
+        return list(self._systematics)
+
+    def column_variations(self) -> list[str]:
+        """The variations of the columns (declared with Vary upstream, e.g. by correct_electron_energies), when
+        booked with column_variations=True: electronScaleUp for the Vary variation electronScale:up"""
+        if self._varied and not self._variation_keys:
+            keys = [str(key) for key in next(iter(self._varied.values())).GetKeys()]
+            self._variation_keys = {
+                _variation_name(key): key for key in keys if key != "nominal"
+            }
+        return list(self._variation_keys)
+
+    def results(self) -> dict[str, Any]:
+        """The booked (lazy) Histo2D results keyed by variable name, e.g. to pass to ROOT.RDF.RunGraphs"""
+        return dict(self._results)
+
+    def category_bin(self, channel: str, systematic: str) -> int:
+        """Bin number (1-based, as in ROOT) on the category axis for a channel and systematic"""
+        return (
+            self._channels.index(channel) * len(self._systematics)
+            + self._systematics.index(systematic)
+            + 1
+        )
+
+    def histogram_name(self, variable: str, channel: str, systematic: str) -> str:
+        return self._name_format.format(
+            variable=variable, channel=channel, systematic=systematic
+        )
+
+    def histogram(self, variable: str, channel: str, systematic: str) -> Any:
+        """Project out a single TH1D for one variable, channel and systematic, a weight systematic or a column
+        variation (with the nominal weight)"""
+        if (
+            systematic not in self._systematics
+            and systematic in self.column_variations()
+        ):
+            cat_bin = self.category_bin(channel, self._systematics[0])
+            result = self._varied[variable][self._variation_keys[systematic]]
+        else:
+            cat_bin = self.category_bin(channel, systematic)
+            result = self._results[variable].GetValue()
+        hist = result.ProjectionX(
+            self.histogram_name(variable, channel, systematic),
+            cat_bin,
+            cat_bin,
+            "e",
+        )
+        hist.SetDirectory(0)
+        hist.SetTitle(self._variables[variable].title or variable)
+        return hist
+
+    def split(self) -> dict[str, Any]:
+        """Project out every (variable, channel, systematic) histogram, keyed by name"""
+        return {
+            self.histogram_name(var, ch, syst): self.histogram(var, ch, syst)
+            for var in self._variables
+            for ch in self._channels
+            for syst in self._systematics + self.column_variations()
+        }
+
+
+class BookedCategories:
+    """Base of the measurements booked as the categories of one BookedHistograms, with a category
+    {prefix}{name} (or several, distinguished by a suffix) per name, e.g. per channel or region"""
+
+    def __init__(self, booked: BookedHistograms, names: list[str], prefix: str):
+        self._booked = booked
+        self._names = list(names)
+        self._prefix = prefix
+
+    def booked(self) -> BookedHistograms:
+        return self._booked
+
+    def variables(self) -> list[str]:
+        return self._booked.variables()
+
+    def _histogram(self, variable: str, name: str, systematic: str = "nominal") -> Any:
+        return self._booked.histogram(variable, f"{self._prefix}{name}", systematic)
+
+    def histograms(self) -> dict[str, Any]:
+        """Every booked histogram, keyed by name, to write out"""
+        return self._booked.split()
+
+
+def _variation_name(key: str) -> str:
+    """electronScale:up -> electronScaleUp"""
+    name, _, tag = key.partition(":")
+    return name + tag[:1].upper() + tag[1:]
+
+
+def _fill_plan_expression(channels: list[str], weights: dict[str, str] | str) -> str:
+    """weights is either the weight expression of each systematic, or a weight vector column"""
+    channel_flags = ", ".join(f"static_cast<bool>({ch})" for ch in channels)
+    if isinstance(weights, str):
+        weight_values = weights
+    else:
+        values = ", ".join(f"static_cast<double>({w})" for w in weights.values())
+        weight_values = f"ROOT::VecOps::RVec<double>{{{values}}}"
+    return (
+        f"return rdfw::BuildFillPlan(ROOT::VecOps::RVec<bool>{{{channel_flags}}}, "
+        f"{weight_values});"
+    )
+
+
+def book_histograms(
+    events: Any,
+    variables: list[HistogramVariable],
+    channels: list[str] | None,
+    weights: dict[str, str] | WeightSet | None = None,
+    prefix: str = "hb_",
+    name_format: str = "{channel}__{variable}__{systematic}",
+    column_variations: bool = False,
+) -> tuple[Any, BookedHistograms]:
+    """Book histograms of every variable in every channel (boolean columns, e.g. from lepton_channel_categorization)
+    for every weight systematic (a dict of systematic name to weight column or expression, or a WeightSet) as one
+    Histo2D per variable, filled in a single pass. Returns the dataframe with the fill-plan columns defined and the
+    booked histograms, which can be split into individually named TH1Ds afterwards.
+
+    Channels need not be orthogonal, an event is filled once for every channel it belongs to. Variables must be
+    event-level quantities, e.g. use 'selJet_pt.at(0, -1.0)' for a leading object. Use a distinct prefix if
+    booking more than once on the same graph.
+
+    With column_variations, the histograms are also booked for every variation declared with Vary upstream (e.g.
+    the electron energy corrections), filled in the same event loop; they are named like the weight systematics,
+    e.g. electronScaleUp, with the nominal weight."""
+    ROOT = declare_cpp(Path(__file__).parent / "booking.cpp", "rdfw::BuildFillPlan")
+
+    channel_names = list(channels) if channels else ["inclusive"]
+    channel_columns = list(channels) if channels else ["true"]
+    weight_values: dict[str, str] | str
+    if isinstance(weights, WeightSet):
+        # every variation comes from one contiguous weight vector, computed once per event
+        systematics = weights.names()
+        weight_values = f"{prefix}weights"
+        events = weights.define(events, weight_values)
+    else:
+        weight_values = dict(weights) if weights else {"nominal": "1.0"}
+        systematics = list(weight_values)
+    ncat = len(channel_columns) * len(systematics)
+
+    plan = f"{prefix}fillplan"
+    events = events.Define(plan, _fill_plan_expression(channel_columns, weight_values))
+    events = events.Define(f"{prefix}category", f"{plan}.first")
+    events = events.Define(f"{prefix}weight", f"{plan}.second")
+
+    results = {}
+    for var in variables:
+        value = (
+            var.expression
+            if _IDENTIFIER.fullmatch(var.expression)
+            else f"({var.expression})"
+        )
+        xcol = f"{prefix}x_{var.name}"
+        events = events.Define(
+            xcol, f"return rdfw::Broadcast({value}, {prefix}category.size());"
+        )
+        hname = f"{prefix}{var.name}"
+        title = var.title or var.name
+        if isinstance(var.bins, int):
+            model = ROOT.RDF.TH2DModel(
+                hname, title, var.bins, var.low, var.high, ncat, 0.0, float(ncat)
+            )
+        else:
+            edges = array("d", var.bins)
+            model = ROOT.RDF.TH2DModel(
+                hname, title, len(edges) - 1, edges, ncat, 0.0, float(ncat)
+            )
+        results[var.name] = events.Histo2D(
+            model, xcol, f"{prefix}category", f"{prefix}weight"
+        )
+
+    varied = {}
+    if column_variations:
+        varied = {
+            name: ROOT.RDF.Experimental.VariationsFor(result)
+            for name, result in results.items()
+        }
+    return events, BookedHistograms(
+        variables, channel_names, systematics, results, name_format, varied
+    )
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import os
+from typing import Any, Callable, NamedTuple
+
+from rdframework.io.dataset import SimpleDatasetProtocol
+
+
+class ProcessGroup(NamedTuple):
+    """A physics process shown as one entry of a stack, e.g. ttbar from the TTTo2L2Nu and TTToSemiLeptonic
+    datasets"""
+
+    name: str
+    datasets: list[str]
+    latex_name: str = ""
+
+
+def process_groups(raw: dict[str, Any]) -> list[ProcessGroup]:
+    """Groups from a name -> datasets mapping, or name -> {'datasets': [...], 'latex_name': ...}"""
+    groups = []
+    for name, value in raw.items():
+        if isinstance(value, dict):
+            groups.append(
+                ProcessGroup(name, list(value["datasets"]), value.get("latex_name", ""))
+            )
+        else:
+            groups.append(ProcessGroup(name, list(value)))
+    return groups
+
+
+def dataset_scale(dataset: SimpleDatasetProtocol, luminosity: float | None) -> float:
+    """The factor scaling a dataset's histograms to luminosity: luminosity / effective_luminosity for MC filled
+    with unit-normalized weights, 1 for data, or without a luminosity (histograms already filled with
+    rdframework.io.normalization weights)"""
+    if luminosity is None or not dataset.is_mc():
+        return 1.0
+    if dataset.effective_luminosity() <= 0:
+        raise ValueError(f"{dataset.name()} has no effective luminosity to scale by")
+    return luminosity / dataset.effective_luminosity()
+
+
+def _scaled_sum(name: str, histograms: list[Any], scales: list[float]) -> Any:
+    if hasattr(histograms[0], "Add"):
+        # ROOT histograms
+        total = histograms[0].Clone(name)
+        total.SetDirectory(0)
+        total.Scale(scales[0])
+        for hist, scale in zip(histograms[1:], scales[1:]):
+            total.Add(hist, scale)
+        return total
+    # rdframework.io.resultstore.StoredHistogram
+    contents = sum(hist.contents * scale for hist, scale in zip(histograms, scales))
+    sumw2 = sum(hist.sumw2 * scale**2 for hist, scale in zip(histograms, scales))
+    return histograms[0]._replace(name=name, contents=contents, sumw2=sumw2)
+
+
+class GroupedResults:
+    """Per-dataset histograms stacked into process groups. Histograms are read through load(dataset name,
+    histogram name) and scaled and summed only when a group's histogram is first accessed; both the dataset
+    histograms and the group sums are cached. regroup() shares the dataset histograms already read."""
+
+    def __init__(
+        self,
+        datasets: list[SimpleDatasetProtocol],
+        groups: list[ProcessGroup],
+        load: Callable[[str, str], Any],
+        luminosity: float | None = None,
+    ):
+        self._datasets = {dataset.name(): dataset for dataset in datasets}
+        for group in groups:
+            unknown = set(group.datasets) - set(self._datasets)
+            if unknown:
+                raise ValueError(
+                    f"Group {group.name} has unknown datasets {sorted(unknown)}"
+                )
+        self._groups = {group.name: group for group in groups}
+        self._load = load
+        self._luminosity = luminosity
+        self._scales = {
+            name: dataset_scale(dataset, luminosity)
+            for name, dataset in self._datasets.items()
+        }
+        self._cache: dict[tuple[str, str], Any] = {}
+        self._sums: dict[tuple[str, str], Any] = {}
+
+    def groups(self) -> list[ProcessGroup]:
+        return list(self._groups.values())
+
+    def group_names(self) -> list[str]:
+        return list(self._groups)
+
+    def scale(self, dataset: str) -> float:
+        return self._scales[dataset]
+
+    def dataset_histogram(self, dataset: str, name: str) -> Any:
+        """The unscaled histogram of one dataset, read once"""
+        key = (dataset, name)
+        if key not in self._cache:
+            self._cache[key] = self._load(dataset, name)
+        return self._cache[key]
+
+    def histogram(self, group: str, name: str) -> Any:
+        """The scaled sum of a histogram over the datasets of a group, named {group}__{name}"""
+        key = (group, name)
+        if key not in self._sums:
+            datasets = self._groups[group].datasets
+            self._sums[key] = _scaled_sum(
+                f"{group}__{name}",
+                [self.dataset_histogram(dataset, name) for dataset in datasets],
+                [self._scales[dataset] for dataset in datasets],
+            )
+        return self._sums[key]
+
+    def stack(self, name: str, groups: list[str] | None = None) -> dict[str, Any]:
+        """The histogram of every (or the given) group, in group order"""
+        return {group: self.histogram(group, name) for group in groups or self._groups}
+
+    def regroup(self, groups: list[ProcessGroup]) -> GroupedResults:
+        """Other groups over the same datasets, reusing the dataset histograms already read"""
+        grouped = GroupedResults(
+            list(self._datasets.values()), groups, self._load, self._luminosity
+        )
+        grouped._cache = self._cache
+        return grouped
+
+
+def root_file_loader(
+    directory: str, pattern: str = "{dataset}.root"
+) -> Callable[[str, str], Any]:
+    """Load histograms from one ROOT file per dataset, as written by the runner, opening each file once"""
+    files: dict[str, Any] = {}
+
+    def load(dataset: str, name: str) -> Any:
+        import ROOT
+
+        if dataset not in files:
+            path = os.path.join(directory, pattern.format(dataset=dataset))
+            infile = ROOT.TFile.Open(path)
+            if not infile or infile.IsZombie():
+                raise OSError(f"Could not open {path}")
+            files[dataset] = infile
+        hist = files[dataset].Get(name)
+        if not hist:
+            raise KeyError(f"{dataset} has no histogram {name}")
+        hist.SetDirectory(0)
+        return hist
+
+    return load
+
+
+def result_store_loader(
+    directory: str, pattern: str = "{dataset}.rdfr"
+) -> Callable[[str, str], Any]:
+    """Load memory-mapped histograms from one rdframework.io.resultstore store per dataset"""
+    from rdframework.io.resultstore import ResultStore
+
+    stores: dict[str, ResultStore] = {}
+
+    def load(dataset: str, name: str) -> Any:
+        if dataset not in stores:
+            stores[dataset] = ResultStore(
+                os.path.join(directory, pattern.format(dataset=dataset))
+            )
+        if name not in stores[dataset]:
+            raise KeyError(f"{dataset} has no histogram {name}")
+        return stores[dataset].histogram(name)
+
+    return load
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from typing import Any, NamedTuple
+
+
+class WeightSource(NamedTuple):
+    """One entry of a WeightSet: a single weight expression, or size variations read from an RVec column"""
+
+    name: str
+    expression: str
+    size: int = 0
+    relative: bool = True
+
+
+class WeightSet:
+    """The nominal event weight and its named variations, gathered into one contiguous per-event weight vector
+    (nominal first). Pass it as the weights of book_histograms to fill every variation of an event in one fill
+    plan, and access each variation by name afterwards.
+
+    Scalar variations are absolute weight expressions, e.g. 'genWeight * puWeightUp'. Vector variations take
+    their size entries from an RVec column such as LHEPdfWeight, multiplied by the nominal weight when relative;
+    events with fewer entries get the nominal weight for the missing ones."""
+
+    def __init__(self, nominal: str = "1.0", name: str = "nominal"):
+        self._nominal = nominal
+        self._sources = [WeightSource(name, nominal)]
+        self._names = [name]
+
+    def _add_names(self, names: list[str]) -> None:
+        duplicated = set(names) & set(self._names)
+        if duplicated:
+            raise ValueError(f"Weight variations already defined: {sorted(duplicated)}")
+        self._names += names
+
+    def add(self, name: str, expression: str) -> WeightSet:
+        self._add_names([name])
+        self._sources.append(WeightSource(name, expression))
+        return self
+
+    def add_up_down(self, source: str, up: str, down: str) -> WeightSet:
+        """Add the {source}Up and {source}Down variations"""
+        return self.add(f"{source}Up", up).add(f"{source}Down", down)
+
+    def add_vector(
+        self, source: str, column: str, size: int, relative: bool = True
+    ) -> WeightSet:
+        """Add the variations {source}_0 ... {source}_{size - 1} from the entries of an RVec column"""
+        if size < 1:
+            raise ValueError(f"size must be positive, got {size}")
+        self._add_names([f"{source}_{i}" for i in range(size)])
+        self._sources.append(WeightSource(source, column, size, relative))
+        return self
+
+    def names(self) -> list[str]:
+        return list(self._names)
+
+    def index(self, name: str) -> int:
+        return self._names.index(name)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def expression(self) -> str:
+        """The C++ returning the weight vector of an event, allocated once at its final size (the locals are
+        prefixed so they cannot shadow the columns used in the weight expressions)"""
+        lines = [
+            f"ROOT::VecOps::RVec<double> rdfw_weights({len(self._names)});",
+            f"const double rdfw_nominal = static_cast<double>({self._nominal});",
+            "rdfw_weights[0] = rdfw_nominal;",
+        ]
+        position = 1
+        for source in self._sources[1:]:
+            if source.size == 0:
+                lines.append(
+                    f"rdfw_weights[{position}] = static_cast<double>({source.expression});"
+                )
+                position += 1
+                continue
+            scale = "rdfw_nominal * " if source.relative else ""
+            lines.append(
+                f"for (std::size_t i = 0; i < {source.size}; ++i) "
+                f"rdfw_weights[{position} + i] = i < {source.expression}.size() "
+                f"? {scale}static_cast<double>({source.expression}[i]) : rdfw_nominal;"
+            )
+            position += source.size
+        lines.append("return rdfw_weights;")
+        return "\n".join(lines)
+
+    def define(self, events: Any, column: str) -> Any:
+        return events.Define(column, self.expression())
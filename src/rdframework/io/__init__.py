@@ -2,4 +2,14 @@
 
 from __future__ import annotations
 
-__all__ = ["dataset"]
+__all__ = [
+    "arrow_writer",
+    "checkpoint",
+    "dataset",
+    "entrylist",
+    "normalization",
+    "precision",
+    "resultstore",
+    "schema",
+    "staging",
+]
@@ -0,0 +1,151 @@
+#include <ROOT/RResultPtr.hxx>
+#include <ROOT/RVec.hxx>
+#include <RtypesCore.h>
+
+#include <condition_variable>
+#include <cstddef>
+#include <cstring>
+#include <deque>
+#include <memory>
+#include <mutex>
+#include <vector>
+
+namespace rdfw {
+
+// A block of rows of every written column, as raw little-endian value bytes plus, for jagged columns, int64
+// offsets into the values (the Arrow list layout)
+struct ArrowChunk {
+  ULong64_t fRows = 0;
+  std::vector<std::vector<unsigned char>> fData;
+  std::vector<std::vector<Long64_t>> fOffsets;
+
+  ULong64_t Rows() const { return fRows; }
+  std::size_t NColumns() const { return fData.size(); }
+  const std::vector<unsigned char>& Data(std::size_t column) const { return fData[column]; }
+  const std::vector<Long64_t>& Offsets(std::size_t column) const { return fOffsets[column]; }
+};
+
+// Collects the selected events of each slot into chunks of rows_per_chunk rows and hands full chunks to a
+// bounded queue, from which the python writer threads Pop them. Fill blocks while the queue is full, so a slow
+// writer throttles the event loop instead of letting memory grow.
+class ArrowCollector {
+public:
+  ArrowCollector(std::size_t nslots, const std::vector<int>& jagged, ULong64_t rows_per_chunk, std::size_t max_queued)
+    : fJagged(jagged), fRowsPerChunk(rows_per_chunk > 0 ? rows_per_chunk : 1),
+      fMaxQueued(max_queued > 0 ? max_queued : 1), fSlots(nslots > 0 ? nslots : 1)
+  {
+  }
+
+  template <typename... Columns>
+  bool Fill(unsigned int slot, const Columns&... columns)
+  {
+    auto& chunk = fSlots[slot];
+    if (!chunk) chunk = NewChunk();
+    std::size_t i = 0;
+    (Append(*chunk, i++, columns), ...);
+    if (++chunk->fRows >= fRowsPerChunk) Push(std::move(chunk));
+    return true;
+  }
+
+  // The next full chunk, waiting for one if needed; nullptr once Finish or Abort was called and the queue is empty
+  std::shared_ptr<ArrowChunk> Pop()
+  {
+    std::unique_lock<std::mutex> lock(fMutex);
+    fNotEmpty.wait(lock, [this] { return !fQueue.empty() || fClosed; });
+    if (fQueue.empty()) return nullptr;
+    auto chunk = std::move(fQueue.front());
+    fQueue.pop_front();
+    fNotFull.notify_one();
+    return chunk;
+  }
+
+  // Queue the partially filled chunks of every slot and close the queue, after the event loop
+  void Finish()
+  {
+    for (auto& chunk : fSlots) {
+      if (chunk && chunk->fRows > 0) Push(std::move(chunk));
+      chunk.reset();
+    }
+    Close();
+  }
+
+  // Close the queue dropping further chunks, e.g. when a writer failed, so the event loop cannot block forever
+  void Abort()
+  {
+    std::lock_guard<std::mutex> lock(fMutex);
+    fAborted = true;
+    fClosed = true;
+    fQueue.clear();
+    fNotFull.notify_all();
+    fNotEmpty.notify_all();
+  }
+
+private:
+  std::shared_ptr<ArrowChunk> NewChunk() const
+  {
+    auto chunk = std::make_shared<ArrowChunk>();
+    chunk->fData.resize(fJagged.size());
+    chunk->fOffsets.resize(fJagged.size());
+    for (std::size_t i = 0; i < fJagged.size(); ++i) {
+      if (fJagged[i]) chunk->fOffsets[i].push_back(0);
+    }
+    return chunk;
+  }
+
+  static void AppendBytes(std::vector<unsigned char>& data, const void* values, std::size_t nbytes)
+  {
+    const auto size = data.size();
+    data.resize(size + nbytes);
+    if (nbytes > 0) std::memcpy(data.data() + size, values, nbytes);
+  }
+
+  template <typename T>
+  static void Append(ArrowChunk& chunk, std::size_t column, const T& value)
+  {
+    AppendBytes(chunk.fData[column], &value, sizeof(T));
+  }
+
+  template <typename T>
+  static void Append(ArrowChunk& chunk, std::size_t column, const ROOT::VecOps::RVec<T>& values)
+  {
+    AppendBytes(chunk.fData[column], values.data(), values.size() * sizeof(T));
+    auto& offsets = chunk.fOffsets[column];
+    offsets.push_back(offsets.back() + static_cast<Long64_t>(values.size()));
+  }
+
+  void Push(std::shared_ptr<ArrowChunk> chunk)
+  {
+    std::unique_lock<std::mutex> lock(fMutex);
+    fNotFull.wait(lock, [this] { return fQueue.size() < fMaxQueued || fAborted; });
+    if (fAborted) return;
+    fQueue.push_back(std::move(chunk));
+    fNotEmpty.notify_one();
+  }
+
+  void Close()
+  {
+    std::lock_guard<std::mutex> lock(fMutex);
+    fClosed = true;
+    fNotEmpty.notify_all();
+  }
+
+  std::vector<int> fJagged;
+  ULong64_t fRowsPerChunk;
+  std::size_t fMaxQueued;
+  std::vector<std::shared_ptr<ArrowChunk>> fSlots;
+  std::mutex fMutex;
+  std::condition_variable fNotFull;
+  std::condition_variable fNotEmpty;
+  std::deque<std::shared_ptr<ArrowChunk>> fQueue;
+  bool fClosed = false;
+  bool fAborted = false;
+};
+
+// Run the event loop of a graph through one of its results, called with the GIL released so the python writer
+// threads can consume chunks while the loop runs
+inline ULong64_t RunEventLoop(ROOT::RDF::RResultPtr<ULong64_t>& count)
+{
+  return count.GetValue();
+}
+
+} // namespace rdfw
@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import re
+import threading
+from pathlib import Path
+from typing import Any
+
+from rdframework.utils import cpp_reference, declare_cpp
+
+# ROOT/C++ type names of the columns that can be written, and the numpy dtype of their values
+_DTYPES = {
+    "bool": "bool",
+    "Bool_t": "bool",
+    "char": "int8",
+    "Char_t": "int8",
+    "unsigned char": "uint8",
+    "UChar_t": "uint8",
+    "short": "int16",
+    "Short_t": "int16",
+    "unsigned short": "uint16",
+    "UShort_t": "uint16",
+    "int": "int32",
+    "Int_t": "int32",
+    "unsigned int": "uint32",
+    "UInt_t": "uint32",
+    "long long": "int64",
+    "Long64_t": "int64",
+    "unsigned long long": "uint64",
+    "ULong64_t": "uint64",
+    "float": "float32",
+    "Float_t": "float32",
+    "double": "float64",
+    "Double_t": "float64",
+}
+_RVEC = re.compile(r"^(?:ROOT::VecOps::|ROOT::)?RVec<\s*(.+?)\s*>$")
+_FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+
+def column_layout(column_type: str) -> tuple[str, bool]:
+    """The numpy dtype of a column's values and whether it is jagged (an RVec, written as an Arrow list)"""
+    match = _RVEC.match(column_type.strip())
+    element = match.group(1) if match else column_type.strip()
+    if element not in _DTYPES:
+        raise TypeError(f"Cannot write columns of type {column_type}")
+    return _DTYPES[element], match is not None
+
+
+def _import_pyarrow() -> Any:
+    try:
+        import pyarrow
+    except ImportError as err:
+        raise ImportError(
+            "Writing Parquet/Arrow files requires pyarrow, install rdframework[arrow]"
+        ) from err
+    return pyarrow
+
+
+class ArrowWriter:
+    """Stream the selected events of a graph into Parquet or Arrow IPC files, without an intermediate ROOT file.
+
+    attach() adds a collector filling per-slot chunks of rows_per_group rows, which go through a queue of at most
+    max_queued chunks to `workers` writer threads. Each writer converts chunks to Arrow record batches (RVec
+    columns become list columns) and compresses and writes them as row groups of its own part file,
+    part-NNNN.parquet (or .arrow) in the output directory; pyarrow releases the GIL while compressing, so the
+    writers compress in parallel. Read the parts back as one dataset, e.g. pandas.read_parquet(directory)."""
+
+    def __init__(
+        self,
+        directory: str,
+        columns: list[str],
+        output_format: str = "parquet",
+        compression: str | None = "zstd",
+        rows_per_group: int = 100_000,
+        workers: int = 2,
+        max_queued: int = 8,
+    ):
+        if output_format not in _FORMATS:
+            raise ValueError(f"output_format must be one of {sorted(_FORMATS)}")
+        self._directory = Path(directory)
+        self._columns = list(columns)
+        self._format = output_format
+        self._compression = compression
+        self._rows_per_group = rows_per_group
+        self._workers = max(1, workers)
+        self._max_queued = max_queued
+        self._layout: list[tuple[str, bool]] = []
+        self._collector: Any = None
+        self._count: Any = None
+        self._files: list[str] = []
+        self._schema: Any = None
+
+    def files(self) -> list[str]:
+        return list(self._files)
+
+    def schema(self) -> Any:
+        pa = _import_pyarrow()
+        fields = []
+        for name, (dtype, jagged) in zip(self._columns, self._layout):
+            value_type = pa.from_numpy_dtype(dtype)
+            fields.append(
+                pa.field(name, pa.list_(value_type) if jagged else value_type)
+            )
+        return pa.schema(fields)
+
+    def attach(self, events: Any) -> Any:
+        """Book the collector on the node whose events should be written"""
+        ROOT = declare_cpp(
+            Path(__file__).parent / "arrow_writer.cpp", "rdfw::ArrowCollector"
+        )
+        self._layout = [
+            column_layout(str(events.GetColumnType(col))) for col in self._columns
+        ]
+        jagged = ROOT.std.vector["int"]([int(j) for _, j in self._layout])
+        self._collector = ROOT.rdfw.ArrowCollector(
+            int(events.GetNSlots()), jagged, self._rows_per_group, self._max_queued
+        )
+        ref = cpp_reference(self._collector, "rdfw::ArrowCollector")
+        events = events.Filter(
+            f"return {ref}.Fill(rdfslot_, {', '.join(self._columns)});"
+        )
+        self._count = events.Count()
+        return events
+
+    def _batch(self, chunk: Any) -> Any:
+        import numpy as np
+
+        pa = _import_pyarrow()
+        arrays = []
+        for i, (dtype, jagged) in enumerate(self._layout):
+            data = chunk.Data(i)
+            raw = np.frombuffer(_buffer(data), dtype=np.uint8, count=data.size())
+            values = pa.array(raw.view(dtype).copy())
+            if jagged:
+                offsets = chunk.Offsets(i)
+                offs = np.frombuffer(
+                    _buffer(offsets), dtype=np.int64, count=offsets.size()
+                )
+                # a chunk is far below 2**31 values, so the regular int32 list offsets suffice
+                values = pa.ListArray.from_arrays(
+                    pa.array(offs.astype(np.int32)), values
+                )
+            arrays.append(values)
+        return pa.RecordBatch.from_arrays(arrays, schema=self._schema)
+
+    def _write_part(self, index: int, errors: list[Exception]) -> None:
+        pa = _import_pyarrow()
+        path = self._directory / f"part-{index:04d}{_FORMATS[self._format]}"
+        writer = None
+        try:
+            while True:
+                chunk = self._collector.Pop()
+                if not chunk:
+                    break
+                batch = self._batch(chunk)
+                del chunk
+                if writer is None:
+                    writer = self._open(pa, str(path))
+                    self._files.append(str(path))
+                if self._format == "parquet":
+                    writer.write_table(pa.Table.from_batches([batch]))
+                else:
+                    writer.write_batch(batch)
+        except Exception as err:
+            errors.append(err)
+            self._collector.Abort()
+        finally:
+            if writer is not None:
+                writer.close()
+
+    def _open(self, pa: Any, path: str) -> Any:
+        if self._format == "parquet":
+            import pyarrow.parquet as pq
+
+            return pq.ParquetWriter(
+                path, self._schema, compression=self._compression or "none"
+            )
+        options = pa.ipc.IpcWriteOptions(compression=self._compression)
+        return pa.ipc.new_file(path, self._schema, options=options)
+
+    def run(self) -> int:
+        """Run the event loop (and with it every other result booked on the graph), writing the parts. Returns the
+        number of events written."""
+        if self._collector is None:
+            raise RuntimeError("attach() the writer to a graph before running it")
+        import ROOT
+
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._schema = self.schema()
+        # the writer threads run python, so the event loop must not hold the GIL while it fills the queue
+        ROOT.rdfw.RunEventLoop.__release_gil__ = True
+        ROOT.rdfw.ArrowCollector.Pop.__release_gil__ = True
+        errors: list[Exception] = []
+        threads = [
+            threading.Thread(target=self._write_part, args=(i, errors), daemon=True)
+            for i in range(self._workers)
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            nevents = int(ROOT.rdfw.RunEventLoop(self._count))
+        except BaseException:
+            self._collector.Abort()
+            raise
+        finally:
+            self._collector.Finish()
+            for thread in threads:
+                thread.join()
+        if errors:
+            raise errors[0]
+        self._files.sort()
+        return nevents
+
+
+def _buffer(vector: Any) -> Any:
+    # a buffer-protocol view of a std::vector's contiguous storage
+    if vector.size() == 0:
+        return b""
+    view = vector.data()
+    view.reshape((vector.size(),))
+    return view
+
+
+def write_arrow(
+    events: Any,
+    directory: str,
+    columns: list[str],
+    output_format: str = "parquet",
+    compression: str | None = "zstd",
+    rows_per_group: int = 100_000,
+    workers: int = 2,
+) -> list[str]:
+    """Write columns of the events passing the graph's filters to Parquet or Arrow IPC part files in directory,
+    running the event loop, and return the written files"""
+    writer = ArrowWriter(
+        directory, columns, output_format, compression, rows_per_group, workers
+    )
+    writer.attach(events)
+    writer.run()
+    return writer.files()
@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Callable, NamedTuple, cast
+
+from rdframework.io.dataset import SimpleDatasetProtocol
+from rdframework.io.staging import StagingCache
+
+
+class UnitResult(NamedTuple):
+    """Partial results of one unit of files: histograms (TH1 or RDF results) by name, cutflow counts by cut name,
+    and whether a snapshot was written to the path given to the unit"""
+
+    histograms: dict[str, Any]
+    cutflow: dict[str, float]
+    snapshot: bool = False
+
+
+class MergedResult(NamedTuple):
+    histograms: dict[str, Any]
+    cutflow: dict[str, float]
+    snapshots: list[str]
+
+
+def file_units(files: list[str], files_per_unit: int) -> list[list[str]]:
+    if files_per_unit < 1:
+        raise ValueError(f"files_per_unit must be positive, got {files_per_unit}")
+    return [files[i : i + files_per_unit] for i in range(0, len(files), files_per_unit)]
+
+
+def unit_id(index: int, files: list[str]) -> str:
+    """Identify a unit by its position and a hash of its files, so a job re-split differently never picks up
+    results for other files"""
+    digest = hashlib.sha1("\n".join(files).encode()).hexdigest()[:12]
+    return f"unit{index:05d}-{digest}"
+
+
+def report_cutflow(report: Any) -> dict[str, float]:
+    """Convert an RDataFrame Report() into cutflow counts: '(all)' events, then the events passing each named
+    Filter in order"""
+    cutflow: dict[str, float] = {}
+    for cut in report:
+        if not cutflow:
+            cutflow["(all)"] = cut.GetAll()
+        cutflow[str(cut.GetName())] = cut.GetPass()
+    return cutflow
+
+
+def _value(result: Any) -> Any:
+    # RDF results are lazy, anything else is taken as already computed
+    return result.GetValue() if hasattr(result, "GetValue") else result
+
+
+def _atomic_write_text(path: Path, text: str) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class CheckpointStore:
+    """Local store of per-unit results for one dataset. Each unit is persisted atomically: histograms and the
+    snapshot fragment are written to temporary files and renamed, then the manifest is renamed into place last,
+    so a unit is complete if and only if its manifest exists. Units interrupted part-way are redone."""
+
+    def __init__(self, directory: str, name: str):
+        self._dir = Path(directory) / name
+        self._dir.mkdir(parents=True, exist_ok=True)
+
+    def directory(self) -> str:
+        return str(self._dir)
+
+    def _manifest(self, unit: str) -> Path:
+        return self._dir / f"{unit}.json"
+
+    def is_complete(self, unit: str) -> bool:
+        return self._manifest(unit).exists()
+
+    def completed_units(self) -> list[str]:
+        return sorted(p.name[: -len(".json")] for p in self._dir.glob("unit*.json"))
+
+    def snapshot_path(self, unit: str) -> str:
+        """Where a unit should Snapshot to; save() moves it to its final name"""
+        return str(self._dir / f"{unit}.snapshot.root.tmp")
+
+    def save(self, unit: str, files: list[str], result: UnitResult) -> None:
+        manifest: dict[str, Any] = {
+            "files": files,
+            "cutflow": {name: _value(count) for name, count in result.cutflow.items()},
+            "histograms": None,
+            "snapshot": None,
+        }
+        if result.histograms:
+            import ROOT
+
+            target = self._dir / f"{unit}.hists.root"
+            tmp = target.with_name(target.name + ".tmp")
+            out = ROOT.TFile.Open(str(tmp), "RECREATE")
+            for name, hist in result.histograms.items():
+                out.WriteObject(_value(hist), name)
+            out.Close()
+            os.replace(tmp, target)
+            manifest["histograms"] = target.name
+        if result.snapshot:
+            target = self._dir / f"{unit}.snapshot.root"
+            os.replace(self.snapshot_path(unit), target)
+            manifest["snapshot"] = target.name
+        _atomic_write_text(self._manifest(unit), json.dumps(manifest, indent=1))
+
+    def load_manifest(self, unit: str) -> dict[str, Any]:
+        with open(self._manifest(unit)) as f:
+            return cast("dict[str, Any]", json.load(f))
+
+    def merge(self, units: list[str] | None = None) -> MergedResult:
+        """Sum the cutflows and histograms of the given (by default all completed) units, and list their snapshot
+        fragments"""
+        if units is None:
+            units = self.completed_units()
+        cutflow: dict[str, float] = {}
+        histograms: dict[str, Any] = {}
+        snapshots = []
+        for unit in units:
+            manifest = self.load_manifest(unit)
+            for name, count in manifest["cutflow"].items():
+                cutflow[name] = cutflow.get(name, 0) + count
+            if manifest["snapshot"]:
+                snapshots.append(str(self._dir / manifest["snapshot"]))
+            if manifest["histograms"]:
+                import ROOT
+
+                infile = ROOT.TFile.Open(str(self._dir / manifest["histograms"]))
+                for key in infile.GetListOfKeys():
+                    hist = key.ReadObj()
+                    if key.GetName() in histograms:
+                        histograms[key.GetName()].Add(hist)
+                    else:
+                        hist.SetDirectory(0)
+                        histograms[key.GetName()] = hist
+                infile.Close()
+        return MergedResult(histograms, cutflow, snapshots)
+
+    def merge_snapshots(self, output: str, units: list[str] | None = None) -> str:
+        """Concatenate the snapshot fragments into one file, as hadd"""
+        import ROOT
+
+        merger = ROOT.TFileMerger(False)
+        merger.OutputFile(output, "RECREATE")
+        for unit in units if units is not None else self.completed_units():
+            snapshot = self.load_manifest(unit)["snapshot"]
+            if snapshot:
+                merger.AddFile(str(self._dir / snapshot))
+        if not merger.Merge():
+            raise RuntimeError(f"Failed to merge snapshot fragments into {output}")
+        return output
+
+
+def run_checkpointed(
+    dataset: SimpleDatasetProtocol,
+    process_unit: Callable[[list[str], str], UnitResult],
+    directory: str,
+    files_per_unit: int = 10,
+    staging: StagingCache | None = None,
+) -> MergedResult:
+    """Process a dataset in units of files_per_unit files, persisting each unit's results as it completes.
+    process_unit(files, snapshot_path) builds and runs the analysis on the files and returns its UnitResult,
+    writing any Snapshot to snapshot_path. Rerunning after an interruption skips completed units. The merged
+    results cover every unit of the dataset. With a staging cache, each unit reads local copies of its files,
+    and the files of the next unit are staged in the background while it runs."""
+    store = CheckpointStore(directory, dataset.name())
+    units = [
+        (unit_id(index, files), files)
+        for index, files in enumerate(file_units(dataset.files(), files_per_unit))
+    ]
+    pending = [(unit, files) for unit, files in units if not store.is_complete(unit)]
+    for position, (unit, files) in enumerate(pending):
+        if staging is None:
+            store.save(unit, files, process_unit(files, store.snapshot_path(unit)))
+            continue
+        local = staging.files(files)
+        if position + 1 < len(pending):
+            staging.prefetch(pending[position + 1][1])
+        try:
+            result = process_unit(local, store.snapshot_path(unit))
+        finally:
+            staging.release(local)
+        # the manifest records the source files
+        store.save(unit, files, result)
+    return store.merge([unit for unit, _ in units])
@@ -0,0 +1,25 @@
+#include <RtypesCore.h>
+#include <TEntryList.h>
+
+#include <algorithm>
+#include <vector>
+
+namespace rdfw {
+
+// Fill an entry list with the passing entries of one tree. The entries are sorted first: multithreaded event
+// loops deliver them out of order, and TEntryList packs entries into its blocks most compactly in order.
+inline Long64_t FillEntryList(TEntryList& list, std::vector<ULong64_t> entries)
+{
+  std::sort(entries.begin(), entries.end());
+  for (const auto entry : entries) list.Enter(static_cast<Long64_t>(entry));
+  return list.GetN();
+}
+
+// Enter the entries [first, last) of one tree, e.g. a cluster
+inline Long64_t EnterRange(TEntryList& list, Long64_t first, Long64_t last)
+{
+  for (auto entry = first; entry < last; ++entry) list.Enter(entry);
+  return list.GetN();
+}
+
+} // namespace rdfw
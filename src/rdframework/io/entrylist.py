@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Callable, cast
+
+from rdframework.io.normalization import file_fingerprint
+from rdframework.utils import declare_cpp
+
+
+def preselection_identity(description: Any) -> str:
+    """Identify a preselection by a hash of its JSON description, e.g. its pipeline steps with their arguments
+    and the era and dataset options they depend on. Any change to the description selects a new set of lists."""
+    text = json.dumps(description, sort_keys=True, default=str)
+    return hashlib.sha1(text.encode()).hexdigest()[:16]
+
+
+def _file_key(fingerprint: str) -> str:
+    return hashlib.sha1(fingerprint.encode()).hexdigest()[:16]
+
+
+class EntryListIndex:
+    """Per-file lists of the entries passing one preselection, stored as TEntryLists under
+    directory/<identity>. Lists are keyed by the input file's fingerprint (path with checksum, or size and
+    modification time), so a replaced file is selected again. Each file's list is written before its small
+    JSON record, so a list exists if and only if its record does, and several processes can fill one index."""
+
+    def __init__(
+        self,
+        directory: str,
+        identity: str,
+        tree: str = "Events",
+        description: Any = None,
+    ):
+        self._dir = Path(directory) / identity
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._identity = identity
+        self._tree = tree
+        if description is not None:
+            path = self._dir / "preselection.json"
+            if not path.exists():
+                path.write_text(json.dumps(description, indent=1, default=str))
+
+    def identity(self) -> str:
+        return self._identity
+
+    def tree(self) -> str:
+        return self._tree
+
+    def _record(self, path: str, checksum: str | None) -> Path:
+        return self._dir / f"{_file_key(file_fingerprint(path, checksum))}.json"
+
+    def has(self, path: str, checksum: str | None = None) -> bool:
+        return self._record(path, checksum).exists()
+
+    def missing(
+        self, files: list[str], checksums: dict[str, str] | None = None
+    ) -> list[str]:
+        return [f for f in files if not self.has(f, (checksums or {}).get(f))]
+
+    def record(self, path: str, checksum: str | None = None) -> dict[str, Any]:
+        """The stored record of a file: its list file, and the selected and total numbers of entries"""
+        with open(self._record(path, checksum)) as f:
+            return cast("dict[str, Any]", json.load(f))
+
+    def save(
+        self,
+        path: str,
+        entries: Any,
+        total: int,
+        checksum: str | None = None,
+    ) -> int:
+        """Store the passing entries (a sequence of entry numbers, in any order) of one file with total entries,
+        returning the number stored"""
+        ROOT = declare_cpp(
+            Path(__file__).parent / "entrylist.cpp", "rdfw::FillEntryList"
+        )
+
+        record = self._record(path, checksum)
+        target = record.with_suffix(".root")
+        tmp = target.with_name(target.name + ".tmp")
+        out = ROOT.TFile.Open(str(tmp), "RECREATE")
+        elist = ROOT.TEntryList("entries", self._identity, self._tree, path)
+        if not isinstance(entries, ROOT.std.vector["ULong64_t"]):
+            entries = ROOT.std.vector["ULong64_t"]([int(e) for e in entries])
+        selected = int(ROOT.rdfw.FillEntryList(elist, entries))
+        out.WriteObject(elist, "entries")
+        out.Close()
+        os.replace(tmp, target)
+        content = {
+            "file": path,
+            "list": target.name,
+            "selected": selected,
+            "total": total,
+        }
+        tmp_record = record.with_name(record.name + ".tmp")
+        tmp_record.write_text(json.dumps(content))
+        os.replace(tmp_record, record)
+        return selected
+
+    def selected(
+        self, files: list[str], checksums: dict[str, str] | None = None
+    ) -> tuple[int, int]:
+        """Numbers of selected and total entries of the files"""
+        records = [self.record(f, (checksums or {}).get(f)) for f in files]
+        return sum(r["selected"] for r in records), sum(r["total"] for r in records)
+
+    def entry_list(
+        self, files: list[str], checksums: dict[str, str] | None = None
+    ) -> Any:
+        """One TEntryList over all files, with a sub-list per file named as in a TChain of the files"""
+        import ROOT
+
+        combined = ROOT.TEntryList("entries", self._identity)
+        combined.SetDirectory(0)
+        for path in files:
+            record = self.record(path, (checksums or {}).get(path))
+            infile = ROOT.TFile.Open(str(self._dir / record["list"]))
+            if not infile or infile.IsZombie():
+                raise OSError(f"Could not open the entry list of {path}")
+            sub = infile.Get("entries")
+            # the list refers to the file by the name it is read with now
+            sub.SetTreeName(self._tree)
+            sub.SetFileName(path)
+            combined.Add(sub)
+            infile.Close()
+        return combined
+
+    def chain(self, files: list[str], checksums: dict[str, str] | None = None) -> Any:
+        """A TChain of the files reading only the listed entries: RDataFrame(chain) skips the other entries, and
+        the tree cache skips the clusters without any listed entry instead of reading them"""
+        missing = self.missing(files, checksums)
+        if missing:
+            raise KeyError(
+                f"No entry list for {len(missing)} files, e.g. {missing[0]}, build them first"
+            )
+        return chain_with_entry_list(
+            self._tree, files, self.entry_list(files, checksums)
+        )
+
+
+def range_entry_list(tree: str, ranges: dict[str, list[tuple[int, int]]]) -> Any:
+    """A TEntryList with a sub-list per file holding the entries of its [first, last) ranges"""
+    ROOT = declare_cpp(Path(__file__).parent / "entrylist.cpp", "rdfw::EnterRange")
+
+    combined = ROOT.TEntryList("entries", "")
+    combined.SetDirectory(0)
+    for path, file_ranges in ranges.items():
+        sub = ROOT.TEntryList("entries", "", tree, path)
+        sub.SetDirectory(0)
+        for first, last in file_ranges:
+            ROOT.rdfw.EnterRange(sub, first, last)
+        combined.Add(sub)
+    return combined
+
+
+def chain_with_entry_list(tree: str, files: list[str], elist: Any) -> Any:
+    """A TChain of the files reading only the entries of elist"""
+    import ROOT
+
+    chain = ROOT.TChain(tree)
+    for f in files:
+        chain.Add(f)
+    chain.SetEntryList(elist)
+    # the chain does not own its entry list, keep it alive with the chain
+    chain._rdfw_entry_list = elist
+    return chain
+
+
+def build_entry_lists(
+    index: EntryListIndex,
+    files: list[str],
+    preselect: Callable[[Any], Any],
+    checksums: dict[str, str] | None = None,
+) -> dict[str, int]:
+    """Run preselect(events) (returning the preselected node) over each file without a list in the index, all
+    files concurrently with ROOT.RDF.RunGraphs, and store the passing entries. Returns the number of selected
+    entries per processed file."""
+    import ROOT
+
+    todo = index.missing(files, checksums)
+    # one dataframe per file: a single-file dataframe numbers its entries (rdfentry_) as the file's tree does
+    booked = []
+    for path in todo:
+        events = ROOT.RDF.AsRNode(ROOT.RDataFrame(index.tree(), path))
+        total = events.Count()
+        entries = preselect(events).Take["ULong64_t"]("rdfentry_")
+        booked.append((path, total, entries))
+    if booked:
+        ROOT.RDF.RunGraphs(
+            [r for _, total, entries in booked for r in (total, entries)]
+        )
+    return {
+        path: index.save(
+            path, entries.GetValue(), int(total.GetValue()), (checksums or {}).get(path)
+        )
+        for path, total, entries in booked
+    }
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import json
+import os
+from typing import Any, NamedTuple
+
+from rdframework.io.dataset import SimpleDatasetProtocol
+
+
+class GeneratorSums(NamedTuple):
+    """Generator weight sums of one or more files, from the NanoAOD Runs tree. The LHE sums are absolute, i.e.
+    sum(genWeight * LHEScaleWeight[i]), unlike the Runs tree branches which are divided by genEventSumw"""
+
+    sumw: float
+    sumw2: float
+    event_count: float
+    lhe_scale_sumw: list[float]
+    lhe_pdf_sumw: list[float]
+
+    def merged(self, other: GeneratorSums) -> GeneratorSums:
+        return GeneratorSums(
+            self.sumw + other.sumw,
+            self.sumw2 + other.sumw2,
+            self.event_count + other.event_count,
+            _add_lists(self.lhe_scale_sumw, other.lhe_scale_sumw),
+            _add_lists(self.lhe_pdf_sumw, other.lhe_pdf_sumw),
+        )
+
+    def scale_normalization(self) -> list[float]:
+        """Mean LHEScaleWeight of each variation, as the Runs tree LHEScaleSumw of the merged files"""
+        return [s / self.sumw for s in self.lhe_scale_sumw]
+
+    def pdf_normalization(self) -> list[float]:
+        return [s / self.sumw for s in self.lhe_pdf_sumw]
+
+
+def _add_lists(first: list[float], second: list[float]) -> list[float]:
+    if not first:
+        return list(second)
+    if not second:
+        return list(first)
+    if len(first) != len(second):
+        raise ValueError(
+            f"Cannot merge LHE sums with {len(first)} and {len(second)} variations"
+        )
+    return [a + b for a, b in zip(first, second)]
+
+
+def read_runs_tree(path: str, tree: str = "Runs") -> GeneratorSums:
+    """Sum the generator weights over the (few) entries of the Runs tree of one file"""
+    import ROOT
+
+    infile = ROOT.TFile.Open(path)
+    if not infile or infile.IsZombie():
+        raise OSError(f"Could not open {path}")
+    runs = infile.Get(tree)
+    if not runs:
+        raise KeyError(f"{path} has no {tree} tree")
+    branches = {str(b.GetName()) for b in runs.GetListOfBranches()}
+    # NanoAOD before v6 appended an underscore to the summed branches
+    suffix = "" if "genEventSumw" in branches else "_"
+    total = GeneratorSums(0.0, 0.0, 0.0, [], [])
+    for i in range(runs.GetEntries()):
+        runs.GetEntry(i)
+        sumw = float(getattr(runs, f"genEventSumw{suffix}"))
+        lhe = {}
+        for name in ["LHEScaleSumw", "LHEPdfSumw"]:
+            if f"{name}{suffix}" in branches:
+                lhe[name] = [sumw * float(x) for x in getattr(runs, f"{name}{suffix}")]
+            else:
+                lhe[name] = []
+        total = total.merged(
+            GeneratorSums(
+                sumw,
+                float(getattr(runs, f"genEventSumw2{suffix}")),
+                float(getattr(runs, f"genEventCount{suffix}")),
+                lhe["LHEScaleSumw"],
+                lhe["LHEPdfSumw"],
+            )
+        )
+    infile.Close()
+    return total
+
+
+def file_fingerprint(path: str, checksum: str | None = None) -> str:
+    """Identify the content of a file for caching: its path with a checksum (e.g. the adler32 from the data
+    management catalog) when given, else with its size and modification time for local files. Remote files
+    without a checksum are identified by path alone, which assumes published files are immutable."""
+    if checksum is not None:
+        return f"{path}#{checksum}"
+    if "://" not in path:
+        stat = os.stat(path)
+        return f"{path}#{stat.st_size}:{stat.st_mtime_ns}"
+    return path
+
+
+class SumwCache:
+    """Generator sums per file fingerprint, persisted as JSON so later runs read no input file at all"""
+
+    def __init__(self, path: str):
+        self._path = path
+        self._entries: dict[str, list[Any]] = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self._entries = json.load(f)
+        self._dirty = False
+
+    def get(self, fingerprint: str) -> GeneratorSums | None:
+        entry = self._entries.get(fingerprint)
+        return GeneratorSums(*entry) if entry is not None else None
+
+    def put(self, fingerprint: str, sums: GeneratorSums) -> None:
+        self._entries[fingerprint] = list(sums)
+        self._dirty = True
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        tmp = f"{self._path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self._entries, f)
+        os.replace(tmp, self._path)
+        self._dirty = False
+
+
+def dataset_sums(
+    dataset: SimpleDatasetProtocol,
+    cache: SumwCache | None = None,
+    checksums: dict[str, str] | None = None,
+) -> GeneratorSums:
+    """Generator sums of all files of an MC dataset, reading the Runs tree only of files not in the cache"""
+    if not dataset.is_mc():
+        raise ValueError(
+            f"{dataset.name()} is not MonteCarlo, it has no generator weights"
+        )
+    total = GeneratorSums(0.0, 0.0, 0.0, [], [])
+    for path in dataset.files():
+        fingerprint = file_fingerprint(path, (checksums or {}).get(path))
+        sums = cache.get(fingerprint) if cache is not None else None
+        if sums is None:
+            sums = read_runs_tree(path)
+            if cache is not None:
+                cache.put(fingerprint, sums)
+        total = total.merged(sums)
+    if cache is not None:
+        cache.save()
+    return total
+
+
+def _inverse_list(values: list[float]) -> str:
+    return ", ".join(repr(1.0 / v) if v != 0 else "0.0" for v in values)
+
+
+def define_normalized_weights(
+    events: Any,
+    dataset: SimpleDatasetProtocol,
+    sums: GeneratorSums,
+    luminosity: float,
+    prefix: str = "norm_",
+    weight: str = "genWeight",
+    scale_weights: str | None = "LHEScaleWeight",
+    pdf_weights: str | None = "LHEPdfWeight",
+) -> Any:
+    """Define {prefix}weight = xsec * luminosity * genWeight / sumw (xsec and luminosity in matching units, e.g. pb
+    and /pb), and when the sums have LHE variations, {prefix}scale_weights and {prefix}pdf_weights with the
+    variation weights divided by their mean, so each variation keeps the nominal cross section and only changes
+    the shape and acceptance"""
+    if sums.sumw == 0:
+        raise ValueError(f"{dataset.name()} has a zero sum of generator weights")
+    base = f"{prefix}weight"
+    events = events.Define(
+        base,
+        f"return {dataset.xsec() * luminosity / sums.sumw!r} * static_cast<double>({weight});",
+    )
+    for column, out, norms in [
+        (scale_weights, "scale_weights", sums.scale_normalization()),
+        (pdf_weights, "pdf_weights", sums.pdf_normalization()),
+    ]:
+        if column is None or not norms:
+            continue
+        events = events.Define(
+            f"{prefix}{out}",
+            f"return {base} * {column} * ROOT::VecOps::RVec<double>{{{_inverse_list(norms)}}};",
+        )
+    return events
@@ -0,0 +1,75 @@
+#include <ROOT/RVec.hxx>
+#include <RtypesCore.h>
+
+#include <algorithm>
+#include <cmath>
+#include <cstdint>
+#include <cstring>
+
+namespace rdfw {
+
+// Keep the leading bits of the 23 bit float mantissa, rounding to nearest (ties to even). The dropped bits are
+// zero, which the compression of the output file then stores almost for free.
+inline float RoundMantissa(float x, int bits)
+{
+  if (bits >= 23 || !std::isfinite(x)) return x;
+  std::uint32_t word;
+  std::memcpy(&word, &x, sizeof(word));
+  const std::uint32_t drop = 23 - bits;
+  word += (std::uint32_t{1} << (drop - 1)) - 1 + ((word >> drop) & 1);
+  word &= ~((std::uint32_t{1} << drop) - 1);
+  std::memcpy(&x, &word, sizeof(word));
+  return x;
+}
+
+template <typename T>
+ROOT::VecOps::RVec<float> RoundMantissa(const ROOT::VecOps::RVec<T>& values, int bits)
+{
+  ROOT::VecOps::RVec<float> rounded(values.size());
+  for (std::size_t i = 0; i < values.size(); ++i) rounded[i] = RoundMantissa(static_cast<float>(values[i]), bits);
+  return rounded;
+}
+
+// Fixed-point code of x in [low, high] with 2^bits - 1 steps, values outside the range clamped to it
+template <typename Code>
+Code ToFixed(double x, double low, double high, int bits)
+{
+  const double steps = std::ldexp(1.0, bits) - 1.0;
+  const double clamped = std::min(std::max(x, low), high);
+  return static_cast<Code>(std::llround((clamped - low) / (high - low) * steps));
+}
+
+template <typename Code, typename T>
+ROOT::VecOps::RVec<Code> ToFixed(const ROOT::VecOps::RVec<T>& values, double low, double high, int bits)
+{
+  ROOT::VecOps::RVec<Code> codes(values.size());
+  for (std::size_t i = 0; i < values.size(); ++i) codes[i] = ToFixed<Code>(values[i], low, high, bits);
+  return codes;
+}
+
+inline float FromFixed(double code, double low, double high, int bits)
+{
+  return static_cast<float>(low + code * (high - low) / (std::ldexp(1.0, bits) - 1.0));
+}
+
+template <typename Code>
+ROOT::VecOps::RVec<float> FromFixed(const ROOT::VecOps::RVec<Code>& codes, double low, double high, int bits)
+{
+  ROOT::VecOps::RVec<float> values(codes.size());
+  for (std::size_t i = 0; i < codes.size(); ++i) values[i] = FromFixed(codes[i], low, high, bits);
+  return values;
+}
+
+// The largest absolute difference between a column and its encoded then decoded values
+inline double MaxAbsError(double value, double decoded) { return std::abs(decoded - value); }
+
+template <typename T, typename U>
+double MaxAbsError(const ROOT::VecOps::RVec<T>& values, const ROOT::VecOps::RVec<U>& decoded)
+{
+  double error = 0.0;
+  for (std::size_t i = 0; i < values.size(); ++i)
+    error = std::max(error, std::abs(static_cast<double>(decoded[i]) - static_cast<double>(values[i])));
+  return error;
+}
+
+} // namespace rdfw
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from rdframework.utils import declare_cpp
+
+# name of the TNamed holding the encoding of a reduced-precision skim, read back to decode it
+PRECISION_KEY = "rdfw_precision"
+
+
+class ColumnPrecision(NamedTuple):
+    """How one float column (or RVec of floats) is stored: with only bits of its mantissa kept (1 to 23), or, when
+    a range is given, as a fixed-point integer of bits bits (1 to 32) spanning [low, high], clamping values outside"""
+
+    column: str
+    bits: int
+    low: float | None = None
+    high: float | None = None
+
+    def is_fixed(self) -> bool:
+        return self.low is not None
+
+    def code_type(self) -> str:
+        """The stored type of a fixed-point column's codes"""
+        if self.bits <= 8:
+            return "UChar_t"
+        return "UShort_t" if self.bits <= 16 else "UInt_t"
+
+    def max_error(self) -> float:
+        """The largest error of values within range: half a step of the fixed-point scale, or the relative error
+        of the rounded mantissa"""
+        if self.is_fixed():
+            assert self.low is not None and self.high is not None
+            return (self.high - self.low) / ((1 << self.bits) - 1) / 2
+        return 2.0 ** -(self.bits + 1)
+
+    def encode(self, column: str | None = None) -> str:
+        column = self.column if column is None else column
+        if self.is_fixed():
+            return f"rdfw::ToFixed<{self.code_type()}>({column}, {self.low!r}, {self.high!r}, {self.bits})"
+        return f"rdfw::RoundMantissa({column}, {self.bits})"
+
+    def decode(self, column: str | None = None) -> str:
+        column = self.column if column is None else column
+        if self.is_fixed():
+            return (
+                f"rdfw::FromFixed({column}, {self.low!r}, {self.high!r}, {self.bits})"
+            )
+        return column
+
+
+def column_precision(column: str, raw: int | dict[str, Any]) -> ColumnPrecision:
+    """A column's precision from its configuration: the mantissa bits, or {'bits': ..., 'range': [low, high]}"""
+    if isinstance(raw, int):
+        raw = {"bits": raw}
+    bits = int(raw["bits"])
+    if "range" not in raw:
+        if not 0 < bits <= 23:
+            raise ValueError(f"{column}: mantissa bits must be in [1, 23], got {bits}")
+        return ColumnPrecision(column, bits)
+    low, high = (float(x) for x in raw["range"])
+    if not 0 < bits <= 32:
+        raise ValueError(f"{column}: fixed-point bits must be in [1, 32], got {bits}")
+    if not low < high:
+        raise ValueError(f"{column}: empty fixed-point range [{low}, {high}]")
+    return ColumnPrecision(column, bits, low, high)
+
+
+def parse_precision(raw: dict[str, Any] | None) -> list[ColumnPrecision]:
+    """Precisions from a column -> configuration mapping, e.g. {'selJet_eta': 10, 'selJet_pt': {'bits': 16,
+    'range': [0, 2000]}}"""
+    return [column_precision(column, value) for column, value in (raw or {}).items()]
+
+
+def _declare() -> None:
+    declare_cpp(Path(__file__).parent / "precision.cpp", "rdfw::RoundMantissa")
+
+
+def encode_columns(events: Any, precisions: list[ColumnPrecision]) -> Any:
+    """Redefine each column with its reduced-precision values, to Snapshot"""
+    if precisions:
+        _declare()
+    for precision in precisions:
+        events = events.Redefine(precision.column, precision.encode())
+    return events
+
+
+def decode_columns(events: Any, precisions: list[ColumnPrecision]) -> Any:
+    """Redefine the fixed-point columns of a reduced-precision skim with their float values (columns with rounded
+    mantissas are read as they are)"""
+    fixed = [precision for precision in precisions if precision.is_fixed()]
+    if fixed:
+        _declare()
+    for precision in fixed:
+        events = events.Redefine(precision.column, precision.decode())
+    return events
+
+
+def write_precision(path: str, precisions: list[ColumnPrecision]) -> None:
+    """Record the encoding of the columns in a written skim, so readers can decode them"""
+    import ROOT
+
+    out = ROOT.TFile.Open(path, "UPDATE")
+    if not out or out.IsZombie():
+        raise OSError(f"Could not open {path}")
+    record = {p.column: p._asdict() for p in precisions}
+    out.WriteObject(ROOT.TNamed(PRECISION_KEY, json.dumps(record)), PRECISION_KEY)
+    out.Close()
+
+
+def read_precision(path: str) -> list[ColumnPrecision]:
+    """The encoded columns of a skim, none for a file written at full precision"""
+    import ROOT
+
+    infile = ROOT.TFile.Open(path)
+    if not infile or infile.IsZombie():
+        raise OSError(f"Could not open {path}")
+    record = infile.Get(PRECISION_KEY)
+    text = str(record.GetTitle()) if record else "{}"
+    infile.Close()
+    return [ColumnPrecision(**value) for value in json.loads(text).values()]
+
+
+def read_skim(files: list[str], tree: str = "Events") -> Any:
+    """A dataframe of skim files, with their reduced-precision columns decoded"""
+    import ROOT
+
+    events = ROOT.RDF.AsRNode(ROOT.RDataFrame(tree, files))
+    return decode_columns(events, read_precision(files[0]))
+
+
+class PrecisionReport(NamedTuple):
+    """The compressed size of a column at full and reduced precision, and its largest encoding error"""
+
+    column: str
+    full_bytes: int
+    reduced_bytes: int
+    max_error: float
+
+    def saved(self) -> float:
+        return 1.0 - self.reduced_bytes / self.full_bytes if self.full_bytes else 0.0
+
+
+def branch_bytes(path: str, tree: str, columns: list[str]) -> dict[str, int]:
+    """The compressed bytes of the branches of a tree"""
+    import ROOT
+
+    infile = ROOT.TFile.Open(path)
+    if not infile or infile.IsZombie():
+        raise OSError(f"Could not open {path}")
+    events = infile.Get(tree)
+    sizes = {
+        column: int(events.GetBranch(column).GetZipBytes("*")) for column in columns
+    }
+    infile.Close()
+    return sizes
+
+
+def measure_precision(
+    events: Any,
+    precisions: list[ColumnPrecision],
+    directory: str,
+    tree: str = "Events",
+) -> list[PrecisionReport]:
+    """Snapshot the columns at full and reduced precision into directory, in one event loop also finding the
+    largest error of each encoded column, and report the size saved per column"""
+    import ROOT
+
+    _declare()
+    columns = [precision.column for precision in precisions]
+    errors = []
+    for i, precision in enumerate(precisions):
+        name = f"rdfw_precision_error_{i}"
+        decoded = precision.decode(f"({precision.encode()})")
+        events = events.Define(
+            name, f"rdfw::MaxAbsError({precision.column}, {decoded})"
+        )
+        errors.append(events.Max(name))
+    os.makedirs(directory, exist_ok=True)
+    full = os.path.join(directory, "full_precision.root")
+    reduced = os.path.join(directory, "reduced_precision.root")
+    options = ROOT.RDF.RSnapshotOptions()
+    options.fLazy = True
+    snapshots = [
+        events.Snapshot(tree, full, columns, options),
+        encode_columns(events, precisions).Snapshot(tree, reduced, columns, options),
+    ]
+    ROOT.RDF.RunGraphs(snapshots + errors)
+    full_bytes = branch_bytes(full, tree, columns)
+    reduced_bytes = branch_bytes(reduced, tree, columns)
+    return [
+        PrecisionReport(
+            column, full_bytes[column], reduced_bytes[column], float(error.GetValue())
+        )
+        for column, error in zip(columns, errors)
+    ]
+
+
+def format_precision_report(reports: list[PrecisionReport]) -> str:
+    lines = [
+        f"{'column':<30} {'full kB':>10} {'reduced kB':>10} {'saved':>7} max error"
+    ]
+    lines += [
+        f"{r.column:<30} {r.full_bytes / 1e3:10.1f} {r.reduced_bytes / 1e3:10.1f} {r.saved():7.1%} {r.max_error:.3g}"
+        for r in reports
+    ]
+    full = sum(r.full_bytes for r in reports)
+    reduced = sum(r.reduced_bytes for r in reports)
+    lines.append(
+        f"{'total':<30} {full / 1e3:10.1f} {reduced / 1e3:10.1f} {1 - reduced / full if full else 0.0:7.1%}"
+    )
+    return "\n".join(lines)
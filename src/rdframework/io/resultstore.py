@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import json
+import multiprocessing
+import os
+import struct
+import tempfile
+from array import array
+from typing import Any, NamedTuple, cast
+
+# file layout: MAGIC, then the offset and length of the JSON index (little-endian uint64), then the float64 arrays
+# of the histograms, each aligned to ALIGNMENT bytes, then the index
+MAGIC = b"RDFWRES1"
+_HEADER = struct.Struct("<8sQQ")
+ALIGNMENT = 64
+
+
+def _import_numpy() -> Any:
+    try:
+        import numpy
+    except ImportError as err:
+        raise ImportError(
+            "Result stores require numpy, install rdframework[store]"
+        ) from err
+    return numpy
+
+
+class StoredHistogram(NamedTuple):
+    """A histogram of a result store: bin contents and sums of squared weights including the under- and overflow
+    bins (shape: number of bins + 2 per axis), and the bin edges of every axis"""
+
+    name: str
+    title: str
+    edges: list[list[float]]
+    contents: Any
+    sumw2: Any
+
+    def to_root(self) -> Any:
+        """The histogram as a TH1D, TH2D or TH3D"""
+        import ROOT
+
+        axes = [array("d", edges) for edges in self.edges]
+        args: list[Any] = []
+        for edges in axes:
+            args += [len(edges) - 1, edges]
+        kind = {1: ROOT.TH1D, 2: ROOT.TH2D, 3: ROOT.TH3D}[len(axes)]
+        hist = kind(self.name, self.title, *args)
+        hist.SetDirectory(0)
+        hist.Sumw2()
+        # ROOT stores the bins with the first axis varying fastest
+        contents = self.contents.ravel(order="F")
+        sumw2 = self.sumw2.ravel(order="F")
+        for i in range(contents.size):
+            hist.SetBinContent(i, float(contents[i]))
+            hist.SetBinError(i, float(sumw2[i]) ** 0.5)
+        hist.SetEntries(float(contents.sum()))
+        return hist
+
+
+def root_histogram_arrays(hist: Any) -> tuple[list[list[float]], Any, Any]:
+    """The edges, contents and sums of squared weights (with flow bins) of a TH1, TH2 or TH3"""
+    np = _import_numpy()
+    axes = [hist.GetXaxis(), hist.GetYaxis(), hist.GetZaxis()][: hist.GetDimension()]
+    edges = [
+        [axis.GetBinLowEdge(i) for i in range(1, axis.GetNbins() + 2)] for axis in axes
+    ]
+    shape = tuple(axis.GetNbins() + 2 for axis in axes)
+    size = int(np.prod(shape))
+    contents = np.array([hist.GetBinContent(i) for i in range(size)], dtype="<f8")
+    sumw2 = np.array([hist.GetBinError(i) ** 2 for i in range(size)], dtype="<f8")
+    return (
+        edges,
+        contents.reshape(shape, order="F"),
+        sumw2.reshape(shape, order="F"),
+    )
+
+
+class ResultWriter:
+    """Write histograms and tables (name -> number mappings such as cutflows or efficiency counts) to a result
+    store file. Tables hold additive counts, never ratios, so that stores can be merged by summing."""
+
+    def __init__(self, path: str):
+        self._path = path
+        self._tmp = f"{path}.tmp"
+        self._file = open(self._tmp, "wb")
+        self._file.write(_HEADER.pack(MAGIC, 0, 0))
+        self._histograms: dict[str, dict[str, Any]] = {}
+        self._tables: dict[str, dict[str, float]] = {}
+
+    def add_histogram(
+        self,
+        name: str,
+        edges: list[list[float]],
+        contents: Any,
+        sumw2: Any | None = None,
+        title: str = "",
+    ) -> None:
+        np = _import_numpy()
+        if name in self._histograms:
+            raise ValueError(f"Histogram {name} already written")
+        contents = np.ascontiguousarray(contents, dtype="<f8")
+        sumw2 = contents if sumw2 is None else np.ascontiguousarray(sumw2, dtype="<f8")
+        shape = [len(axis_edges) + 1 for axis_edges in edges]
+        if list(contents.shape) != shape or sumw2.shape != contents.shape:
+            raise ValueError(f"Histogram {name} must have shape {shape} with flow bins")
+        padding = -self._file.tell() % ALIGNMENT
+        self._file.write(b"\0" * padding)
+        self._histograms[name] = {
+            "offset": self._file.tell(),
+            "shape": shape,
+            "edges": [[float(x) for x in axis_edges] for axis_edges in edges],
+            "title": title,
+        }
+        self._file.write(contents.tobytes())
+        self._file.write(sumw2.tobytes())
+
+    def add_root_histogram(self, name: str, hist: Any) -> None:
+        edges, contents, sumw2 = root_histogram_arrays(hist)
+        self.add_histogram(name, edges, contents, sumw2, str(hist.GetTitle()))
+
+    def add_table(self, name: str, values: dict[str, float]) -> None:
+        if name in self._tables:
+            raise ValueError(f"Table {name} already written")
+        self._tables[name] = {key: float(value) for key, value in values.items()}
+
+    def close(self) -> None:
+        index = json.dumps(
+            {"histograms": self._histograms, "tables": self._tables}
+        ).encode()
+        offset = self._file.tell()
+        self._file.write(index)
+        self._file.seek(0)
+        self._file.write(_HEADER.pack(MAGIC, offset, len(index)))
+        self._file.close()
+        os.replace(self._tmp, self._path)
+
+    def __enter__(self) -> ResultWriter:
+        return self
+
+    def __exit__(self, exc_type: Any, *exc: Any) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+            os.remove(self._tmp)
+
+
+class ResultStore:
+    """A result store opened for reading: only the small index is read, and each histogram's arrays are memory
+    mapped when it is accessed, so reading one histogram of a large store costs one histogram"""
+
+    def __init__(self, path: str):
+        self._path = path
+        with open(path, "rb") as f:
+            magic, offset, length = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not an rdframework result store")
+            f.seek(offset)
+            index = json.loads(f.read(length))
+        self._histograms: dict[str, dict[str, Any]] = index["histograms"]
+        self._tables: dict[str, dict[str, float]] = index["tables"]
+
+    def path(self) -> str:
+        return self._path
+
+    def histogram_names(self) -> list[str]:
+        return list(self._histograms)
+
+    def table_names(self) -> list[str]:
+        return list(self._tables)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._histograms
+
+    def edges(self, name: str) -> list[list[float]]:
+        return cast("list[list[float]]", self._histograms[name]["edges"])
+
+    def histogram(self, name: str) -> StoredHistogram:
+        np = _import_numpy()
+        entry = self._histograms[name]
+        shape = tuple(entry["shape"])
+        arrays = np.memmap(
+            self._path,
+            dtype="<f8",
+            mode="r",
+            offset=entry["offset"],
+            shape=(2,) + shape,
+        )
+        return StoredHistogram(
+            name, entry["title"], entry["edges"], arrays[0], arrays[1]
+        )
+
+    def table(self, name: str) -> dict[str, float]:
+        return dict(self._tables[name])
+
+
+def merge_stores(paths: list[str], output: str) -> str:
+    """Merge stores by summing the histograms and tables of the same name, streaming one histogram at a time.
+    The merge is associative and commutative, so partial results can be merged in any grouping."""
+    np = _import_numpy()
+    stores = [ResultStore(path) for path in paths]
+    names: dict[str, None] = {}
+    tables: dict[str, dict[str, float]] = {}
+    for store in stores:
+        names.update(dict.fromkeys(store.histogram_names()))
+        for table in store.table_names():
+            merged = tables.setdefault(table, {})
+            for key, value in store.table(table).items():
+                merged[key] = merged.get(key, 0.0) + value
+    with ResultWriter(output) as writer:
+        for name in names:
+            holding = [store for store in stores if name in store]
+            first = holding[0].histogram(name)
+            contents = np.array(first.contents)
+            sumw2 = np.array(first.sumw2)
+            for store in holding[1:]:
+                if store.edges(name) != first.edges:
+                    raise ValueError(
+                        f"Histogram {name} has different binnings in {holding[0].path()} and {store.path()}"
+                    )
+                hist = store.histogram(name)
+                contents += hist.contents
+                sumw2 += hist.sumw2
+            writer.add_histogram(name, first.edges, contents, sumw2, first.title)
+        for table, values in tables.items():
+            writer.add_table(table, values)
+    return output
+
+
+def _merge_group(args: tuple[list[str], str]) -> str:
+    return merge_stores(*args)
+
+
+def merge_tree(
+    paths: list[str],
+    output: str,
+    fan_in: int = 16,
+    processes: int = 1,
+    workdir: str | None = None,
+) -> str:
+    """Merge many stores in a tree: groups of fan_in stores are merged in parallel over processes processes, then
+    the merged groups, until one store is left. Each merge holds one summed histogram in memory at a time."""
+    if not paths:
+        raise ValueError("Nothing to merge")
+    if fan_in < 2:
+        raise ValueError(f"fan_in must be at least 2, got {fan_in}")
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        level = 0
+        while len(paths) > fan_in:
+            groups = [
+                (
+                    paths[i : i + fan_in],
+                    os.path.join(tmp, f"{level}_{i // fan_in}.rdfr"),
+                )
+                for i in range(0, len(paths), fan_in)
+            ]
+            if processes > 1:
+                # spawn, as forking a process that has already loaded ROOT is not safe
+                context = multiprocessing.get_context("spawn")
+                with context.Pool(min(processes, len(groups))) as pool:
+                    paths = pool.map(_merge_group, groups)
+            else:
+                paths = [_merge_group(group) for group in groups]
+            level += 1
+        return merge_stores(paths, output)
+
+
+def convert_root_file(path: str, output: str) -> str:
+    """Write the histograms of a ROOT file (e.g. a dataset's histograms from the runner) to a result store"""
+    import ROOT
+
+    infile = ROOT.TFile.Open(path)
+    if not infile or infile.IsZombie():
+        raise OSError(f"Could not open {path}")
+    with ResultWriter(output) as writer:
+        for key in infile.GetListOfKeys():
+            obj = key.ReadObj()
+            if obj.InheritsFrom("TH1"):
+                writer.add_root_histogram(str(key.GetName()), obj)
+    infile.Close()
+    return output
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+from rdframework.io.normalization import file_fingerprint
+
+
+def _group(name: str) -> str | None:
+    # NanoAOD names collection branches {collection}_{field}, e.g. Jet_pt, and counts them in n{collection}
+    head, sep, _ = name.partition("_")
+    return head if sep and head else None
+
+
+class DatasetSchema:
+    """The columns of a dataset's tree with their (RDataFrame) types, in branch order, grouped into NanoAOD
+    collections. Lookups by column, collection prefix or counter are dictionary lookups, instead of scanning the
+    1500+ names of GetColumnNames() in every helper."""
+
+    def __init__(self, columns: dict[str, str]):
+        self._columns = dict(columns)
+        self._groups: dict[str, list[str]] = {}
+        for name in self._columns:
+            group = _group(name)
+            if group is not None:
+                self._groups.setdefault(group, []).append(name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._columns
+
+    def __len__(self) -> int:
+        return len(self._columns)
+
+    def names(self) -> list[str]:
+        return list(self._columns)
+
+    def column_type(self, name: str) -> str:
+        return self._columns[name]
+
+    def collections(self) -> list[str]:
+        """The collections with a counter branch, e.g. Jet with nJet"""
+        return [group for group in self._groups if f"n{group}" in self._columns]
+
+    def counter(self, collection: str) -> str | None:
+        counter = f"n{collection.rstrip('_')}"
+        return counter if counter in self._columns else None
+
+    def collection(self, prefix: str) -> list[str]:
+        """The columns starting with prefix, e.g. 'Jet_' for the columns of the Jet collection"""
+        group = _group(prefix)
+        if prefix.endswith("_") and group == prefix[:-1]:
+            return list(self._groups.get(group, []))
+        return [name for name in self._columns if name.startswith(prefix)]
+
+    def to_json(self) -> str:
+        return json.dumps(self._columns)
+
+    @classmethod
+    def from_json(cls, text: str) -> DatasetSchema:
+        return cls(json.loads(text))
+
+    def intersection(self, other: DatasetSchema) -> DatasetSchema:
+        """The columns present, with the same type, in both schemas, i.e. readable from a chain of their files"""
+        return DatasetSchema(
+            {
+                name: kind
+                for name, kind in self._columns.items()
+                if other._columns.get(name) == kind
+            }
+        )
+
+
+def read_schema(path: str, tree: str = "Events") -> DatasetSchema:
+    """Read the branches of a file's tree, with the column types RDataFrame gives them (RVec for arrays)"""
+    import ROOT
+
+    infile = ROOT.TFile.Open(path)
+    if not infile or infile.IsZombie():
+        raise OSError(f"Could not open {path}")
+    events = infile.Get(tree)
+    if not events:
+        raise KeyError(f"{path} has no {tree} tree")
+    columns = {}
+    for leaf in events.GetListOfLeaves():
+        kind = str(leaf.GetTypeName())
+        if leaf.GetLeafCount() or leaf.GetLenStatic() > 1:
+            kind = f"ROOT::VecOps::RVec<{kind}>"
+        columns[str(leaf.GetName())] = kind
+    infile.Close()
+    return DatasetSchema(columns)
+
+
+class SchemaCache:
+    """Schemas keyed by file fingerprint (path with checksum, or size and modification time), one JSON file each
+    in directory, so later runs open no input file to learn its columns"""
+
+    def __init__(self, directory: str):
+        self._dir = Path(directory)
+        self._dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, fingerprint: str) -> Path:
+        return self._dir / f"{hashlib.sha1(fingerprint.encode()).hexdigest()[:16]}.json"
+
+    def get(self, fingerprint: str) -> DatasetSchema | None:
+        path = self._path(fingerprint)
+        if not path.exists():
+            return None
+        return DatasetSchema.from_json(path.read_text())
+
+    def put(self, fingerprint: str, schema: DatasetSchema) -> None:
+        path = self._path(fingerprint)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(schema.to_json())
+        os.replace(tmp, path)
+
+
+def dataset_schema(
+    files: list[str],
+    cache: SchemaCache | None = None,
+    tree: str = "Events",
+    checksums: dict[str, str] | None = None,
+    all_files: bool = False,
+) -> DatasetSchema:
+    """The schema of a dataset from its first file, or with all_files the columns common to every file. Schemas
+    not in the cache are read from the files and stored; without checksums a file is identified by its path, size
+    and modification time."""
+    if not files:
+        raise ValueError("A dataset schema needs at least one file")
+
+    def file_schema(path: str) -> DatasetSchema:
+        fingerprint = file_fingerprint(path, (checksums or {}).get(path))
+        schema = cache.get(fingerprint) if cache is not None else None
+        if schema is None:
+            schema = read_schema(path, tree)
+            if cache is not None:
+                cache.put(fingerprint, schema)
+        return schema
+
+    schema = file_schema(files[0])
+    for path in files[1:] if all_files else []:
+        schema = schema.intersection(file_schema(path))
+    return schema
+
+
+def collection_columns(
+    events: Any, prefix: str, schema: DatasetSchema | None = None
+) -> list[str]:
+    """The columns of events starting with prefix: with a schema, its columns plus those defined on the graph
+    (a short list), else by scanning every column name"""
+    if schema is None:
+        return [
+            str(col) for col in events.GetColumnNames() if str(col).startswith(prefix)
+        ]
+    defined = [
+        str(col)
+        for col in events.GetDefinedColumnNames()
+        if str(col).startswith(prefix)
+    ]
+    return [col for col in defined if col not in schema] + schema.collection(prefix)
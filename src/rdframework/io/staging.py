@@ -0,0 +1,275 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from rdframework.io.normalization import file_fingerprint
+
+
+def adler32(path: str, chunk_size: int = 1 << 22) -> str:
+    """The adler32 checksum of a file as 8 hex digits, as listed by the data management catalog"""
+    value = 1
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            value = zlib.adler32(chunk, value)
+    return f"{value:08x}"
+
+
+def _copy(source: str, destination: str) -> None:
+    if "://" in source:
+        import ROOT
+
+        if not ROOT.TFile.Cp(source, destination, False):
+            raise OSError(f"Could not copy {source}")
+        return
+    shutil.copyfile(source, destination)
+
+
+def _remove(path: Path | str) -> None:
+    # Path.unlink(missing_ok=True) needs Python 3.8
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class StagedFile(NamedTuple):
+    source: str
+    local: str
+    size: int
+
+
+class StagingCache:
+    """Local copies of input files in directory, using at most budget bytes. Files are copied whole in the
+    background (prefetch) or on demand (files), and the least recently used unpinned copies are evicted to make
+    room. A file that does not fit is read from its source.
+
+    Copies are keyed by the source's fingerprint (path with checksum, or size and modification time), so a
+    replaced source is staged again. Each copy is checked against the source's size and, when given, its adler32
+    checksum, and is written before its small JSON record, so later jobs reuse only complete copies. Copies
+    without a record, from an interrupted job, are removed once they are older than stale_after seconds, leaving
+    alone those another job sharing the directory is still writing."""
+
+    def __init__(
+        self,
+        directory: str,
+        budget: int,
+        workers: int = 2,
+        stale_after: float = 86400.0,
+    ):
+        self._dir = Path(directory)
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._budget = budget
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, StagedFile] = OrderedDict()
+        self._pinned: dict[str, int] = {}
+        self._copying: set[str] = set()
+        self._pending: dict[str, Future[str]] = {}
+        # prefetched copies, pinned until files() hands them out
+        self._held: set[str] = set()
+        self._executor = ThreadPoolExecutor(max(1, workers))
+        records = sorted(self._dir.glob("*.json"), key=lambda p: p.stat().st_mtime_ns)
+        for record in records:
+            entry = StagedFile(**json.loads(record.read_text()))
+            if (
+                os.path.exists(entry.local)
+                and os.path.getsize(entry.local) == entry.size
+            ):
+                self._entries[record.stem] = entry
+            else:
+                record.unlink()
+        known = {Path(entry.local).name for entry in self._entries.values()}
+        now = time.time()
+        for leftover in self._dir.glob("*.root*"):
+            if leftover.name in known:
+                continue
+            try:
+                if now - leftover.stat().st_mtime > stale_after:
+                    leftover.unlink()
+            except FileNotFoundError:
+                # finished or removed by its job meanwhile
+                pass
+
+    def budget(self) -> int:
+        return self._budget
+
+    def usage(self) -> int:
+        with self._lock:
+            return sum(entry.size for entry in self._entries.values())
+
+    def _key(self, source: str, checksum: str | None) -> str:
+        fingerprint = file_fingerprint(source, checksum)
+        return hashlib.sha1(fingerprint.encode()).hexdigest()[:16]
+
+    def staged(self, source: str, checksum: str | None = None) -> str | None:
+        """The local copy of source, if staged"""
+        key = self._key(source, checksum)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or key in self._copying:
+                return None
+            self._entries.move_to_end(key)
+        os.utime(self._dir / f"{key}.json")
+        return entry.local
+
+    def _pin(self, key: str) -> str | None:
+        # pin the complete copy of key if it is still staged, holding the lock
+        entry = self._entries.get(key)
+        if entry is None or key in self._copying or not os.path.exists(entry.local):
+            return None
+        self._pinned[entry.local] = self._pinned.get(entry.local, 0) + 1
+        self._entries.move_to_end(key)
+        return entry.local
+
+    def _unpin(self, path: str) -> None:
+        # holding the lock
+        count = self._pinned.get(path, 0) - 1
+        if count > 0:
+            self._pinned[path] = count
+        else:
+            self._pinned.pop(path, None)
+
+    def _reserve(self, size: int) -> bool:
+        # evict least recently used unpinned copies until size fits, holding the lock
+        if size > self._budget:
+            return False
+        used = sum(entry.size for entry in self._entries.values())
+        for old in list(self._entries):
+            if used + size <= self._budget:
+                break
+            if self._pinned.get(self._entries[old].local):
+                continue
+            entry = self._entries.pop(old)
+            _remove(self._dir / f"{old}.json")
+            _remove(entry.local)
+            used -= entry.size
+        return used + size <= self._budget
+
+    def _source_size(self, source: str) -> int:
+        if "://" not in source:
+            return os.path.getsize(source)
+        import ROOT
+
+        remote = ROOT.TFile.Open(source)
+        if not remote or remote.IsZombie():
+            raise OSError(f"Could not open {source}")
+        size = int(remote.GetSize())
+        remote.Close()
+        return size
+
+    def stage(
+        self, source: str, checksum: str | None = None, hold: bool = False
+    ) -> str:
+        """Copy source to the cache, returning the local copy, or source itself if it does not fit the budget.
+        With hold, a new copy stays pinned until files() hands it out."""
+        local = self.staged(source, checksum)
+        if local is not None:
+            return local
+        key = self._key(source, checksum)
+        size = self._source_size(source)
+        local = str(self._dir / f"{key}.root")
+        with self._lock:
+            # another thread is copying it, or it does not fit
+            if key in self._entries or not self._reserve(size):
+                return source
+            # hold the space while copying
+            self._entries[key] = StagedFile(source, local, size)
+            self._copying.add(key)
+            self._pinned[local] = self._pinned.get(local, 0) + 1
+        tmp = f"{local}.part"
+        complete = False
+        try:
+            _copy(source, tmp)
+            if os.path.getsize(tmp) != size:
+                raise OSError(f"Staged copy of {source} has the wrong size")
+            if checksum is not None and adler32(tmp) != checksum.lower():
+                raise OSError(f"Staged copy of {source} fails its adler32 checksum")
+            os.replace(tmp, local)
+            record = self._dir / f"{key}.json"
+            record.write_text(json.dumps(StagedFile(source, local, size)._asdict()))
+            complete = True
+        except BaseException:
+            with self._lock:
+                self._entries.pop(key, None)
+            _remove(tmp)
+            raise
+        finally:
+            with self._lock:
+                self._copying.discard(key)
+                if hold and complete:
+                    self._held.add(key)
+                else:
+                    self._unpin(local)
+        return local
+
+    def prefetch(
+        self, sources: list[str], checksums: dict[str, str] | None = None
+    ) -> None:
+        """Start copying the files a job will read next in the background, in order. Each copy is pinned as soon
+        as it completes, so later prefetches past the budget are read from their sources rather than evicting
+        it before files() is called."""
+        for source in sources:
+            checksum = (checksums or {}).get(source)
+            key = self._key(source, checksum)
+            with self._lock:
+                if key in self._entries or key in self._pending:
+                    continue
+                self._pending[key] = self._executor.submit(
+                    self.stage, source, checksum, True
+                )
+
+    def files(
+        self, sources: list[str], checksums: dict[str, str] | None = None
+    ) -> list[str]:
+        """The file list to read: the local copy of every source that fits the budget, staged now if it was not
+        already (waiting for its prefetch), else the source. The copies are pinned, so they are not evicted,
+        until release()."""
+        self.prefetch(sources, checksums)
+        paths = []
+        for source in sources:
+            key = self._key(source, (checksums or {}).get(source))
+            with self._lock:
+                future = self._pending.pop(key, None)
+            if future is not None:
+                try:
+                    future.result()
+                except OSError:
+                    pass
+            with self._lock:
+                # the copy may have been evicted since it was staged, then the source is read
+                path = self._pin(key)
+                if key in self._held:
+                    # the prefetch pin becomes the caller's
+                    self._held.discard(key)
+                    if path is not None:
+                        self._unpin(path)
+            if path is not None:
+                os.utime(self._dir / f"{key}.json")
+            paths.append(path or source)
+        return paths
+
+    def release(self, paths: list[str]) -> None:
+        """Unpin the copies returned by files(), once the job reading them is done"""
+        for path in paths:
+            if path.startswith(str(self._dir)):
+                with self._lock:
+                    self._unpin(path)
+
+    def close(self) -> None:
+        """Wait for the pending copies and stop the background workers"""
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> StagingCache:
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
@@ -0,0 +1,201 @@
+#include <ROOT/RVec.hxx>
+#include <RtypesCore.h>
+
+#include <cmath>
+#include <cstddef>
+#include <limits>
+#include <vector>
+
+namespace rdfw {
+
+// All pairs i < j of n objects as {first, second} index vectors, in the order of Combinations(column, 2), with
+// each vector allocated once at its final size
+inline ROOT::VecOps::RVec<ROOT::VecOps::RVec<UInt_t>> PairIndices(std::size_t n)
+{
+  ROOT::VecOps::RVec<ROOT::VecOps::RVec<UInt_t>> pairs(2);
+  const std::size_t npairs = n > 1 ? n * (n - 1) / 2 : 0;
+  for (auto& indices : pairs) indices.reserve(npairs);
+  for (std::size_t i = 0; i < n; ++i) {
+    for (std::size_t j = i + 1; j < n; ++j) {
+      pairs[0].push_back(i);
+      pairs[1].push_back(j);
+    }
+  }
+  return pairs;
+}
+
+// All triplets i < j < k of n objects as {first, second, third} index vectors, in the order of
+// Combinations(column, 3)
+inline ROOT::VecOps::RVec<ROOT::VecOps::RVec<UInt_t>> TripletIndices(std::size_t n)
+{
+  ROOT::VecOps::RVec<ROOT::VecOps::RVec<UInt_t>> triplets(3);
+  const std::size_t ntriplets = n > 2 ? n * (n - 1) * (n - 2) / 6 : 0;
+  for (auto& indices : triplets) indices.reserve(ntriplets);
+  for (std::size_t i = 0; i < n; ++i) {
+    for (std::size_t j = i + 1; j < n; ++j) {
+      for (std::size_t k = j + 1; k < n; ++k) {
+        triplets[0].push_back(i);
+        triplets[1].push_back(j);
+        triplets[2].push_back(k);
+      }
+    }
+  }
+  return triplets;
+}
+
+namespace detail {
+
+// Cartesian four-momentum components of the objects of one event
+struct P4Buffer {
+  std::vector<double> fPx, fPy, fPz, fE;
+};
+
+// Fill the calling thread's buffer, reused from event to event so the kernels do not allocate once it has grown
+// to the largest multiplicity seen
+template <typename T>
+const P4Buffer& CartesianP4(const ROOT::VecOps::RVec<T>& pt, const ROOT::VecOps::RVec<T>& eta,
+                            const ROOT::VecOps::RVec<T>& phi, const ROOT::VecOps::RVec<T>& mass)
+{
+  thread_local P4Buffer buffer;
+  const std::size_t n = pt.size();
+  buffer.fPx.resize(n);
+  buffer.fPy.resize(n);
+  buffer.fPz.resize(n);
+  buffer.fE.resize(n);
+  for (std::size_t i = 0; i < n; ++i) {
+    const double px = pt[i] * std::cos(phi[i]);
+    const double py = pt[i] * std::sin(phi[i]);
+    const double pz = pt[i] * std::sinh(eta[i]);
+    buffer.fPx[i] = px;
+    buffer.fPy[i] = py;
+    buffer.fPz[i] = pz;
+    buffer.fE[i] = std::sqrt(px * px + py * py + pz * pz + double(mass[i]) * mass[i]);
+  }
+  return buffer;
+}
+
+inline double Mass(double e, double px, double py, double pz)
+{
+  const double m2 = e * e - px * px - py * py - pz * pz;
+  return m2 > 0 ? std::sqrt(m2) : 0.0;
+}
+
+inline double DeltaPhi(double phi1, double phi2)
+{
+  double dphi = std::fmod(phi1 - phi2, 2 * M_PI);
+  if (dphi > M_PI) dphi -= 2 * M_PI;
+  if (dphi < -M_PI) dphi += 2 * M_PI;
+  return dphi;
+}
+
+} // namespace detail
+
+// The pair i < j whose invariant mass is closest to target, as {i, j}, or {} for fewer than two objects. No
+// combination list is built: each pair's mass is computed from the cached cartesian components and only the best
+// is kept.
+template <typename T>
+ROOT::VecOps::RVec<int> BestMassPair(const ROOT::VecOps::RVec<T>& pt, const ROOT::VecOps::RVec<T>& eta,
+                                     const ROOT::VecOps::RVec<T>& phi, const ROOT::VecOps::RVec<T>& mass,
+                                     double target)
+{
+  const auto& p4 = detail::CartesianP4(pt, eta, phi, mass);
+  ROOT::VecOps::RVec<int> best;
+  double bestDistance = std::numeric_limits<double>::infinity();
+  const std::size_t n = pt.size();
+  for (std::size_t i = 0; i < n; ++i) {
+    for (std::size_t j = i + 1; j < n; ++j) {
+      const double m = detail::Mass(p4.fE[i] + p4.fE[j], p4.fPx[i] + p4.fPx[j], p4.fPy[i] + p4.fPy[j],
+                                    p4.fPz[i] + p4.fPz[j]);
+      const double distance = std::abs(m - target);
+      if (distance < bestDistance) {
+        bestDistance = distance;
+        best = {int(i), int(j)};
+      }
+    }
+  }
+  return best;
+}
+
+// The triplet i < j < k whose invariant mass is closest to target, e.g. a hadronic top candidate, as {i, j, k},
+// or {} for fewer than three objects. The partial sum of each pair is reused for every third object.
+template <typename T>
+ROOT::VecOps::RVec<int> BestMassTriplet(const ROOT::VecOps::RVec<T>& pt, const ROOT::VecOps::RVec<T>& eta,
+                                        const ROOT::VecOps::RVec<T>& phi, const ROOT::VecOps::RVec<T>& mass,
+                                        double target)
+{
+  const auto& p4 = detail::CartesianP4(pt, eta, phi, mass);
+  ROOT::VecOps::RVec<int> best;
+  double bestDistance = std::numeric_limits<double>::infinity();
+  const std::size_t n = pt.size();
+  for (std::size_t i = 0; i < n; ++i) {
+    for (std::size_t j = i + 1; j < n; ++j) {
+      const double e = p4.fE[i] + p4.fE[j];
+      const double px = p4.fPx[i] + p4.fPx[j];
+      const double py = p4.fPy[i] + p4.fPy[j];
+      const double pz = p4.fPz[i] + p4.fPz[j];
+      for (std::size_t k = j + 1; k < n; ++k) {
+        const double m = detail::Mass(e + p4.fE[k], px + p4.fPx[k], py + p4.fPy[k], pz + p4.fPz[k]);
+        const double distance = std::abs(m - target);
+        if (distance < bestDistance) {
+          bestDistance = distance;
+          best = {int(i), int(j), int(k)};
+        }
+      }
+    }
+  }
+  return best;
+}
+
+// The pair i < j closest in DeltaR, as {i, j}, or {} for fewer than two objects. Compares squared distances, so
+// no square root is taken per pair.
+template <typename T>
+ROOT::VecOps::RVec<int> MinDeltaRPair(const ROOT::VecOps::RVec<T>& eta, const ROOT::VecOps::RVec<T>& phi)
+{
+  ROOT::VecOps::RVec<int> best;
+  double bestDR2 = std::numeric_limits<double>::infinity();
+  const std::size_t n = eta.size();
+  for (std::size_t i = 0; i < n; ++i) {
+    for (std::size_t j = i + 1; j < n; ++j) {
+      const double deta = eta[i] - eta[j];
+      const double dphi = detail::DeltaPhi(phi[i], phi[j]);
+      const double dr2 = deta * deta + dphi * dphi;
+      if (dr2 < bestDR2) {
+        bestDR2 = dr2;
+        best = {int(i), int(j)};
+      }
+    }
+  }
+  return best;
+}
+
+// The invariant mass of the indexed objects, e.g. of the pair or triplet chosen by a kernel above; 0 for no index
+template <typename T>
+double CombinedMass(const ROOT::VecOps::RVec<T>& pt, const ROOT::VecOps::RVec<T>& eta,
+                    const ROOT::VecOps::RVec<T>& phi, const ROOT::VecOps::RVec<T>& mass,
+                    const ROOT::VecOps::RVec<int>& indices)
+{
+  double e = 0, px = 0, py = 0, pz = 0;
+  for (const auto i : indices) {
+    const double ipx = pt[i] * std::cos(phi[i]);
+    const double ipy = pt[i] * std::sin(phi[i]);
+    const double ipz = pt[i] * std::sinh(eta[i]);
+    px += ipx;
+    py += ipy;
+    pz += ipz;
+    e += std::sqrt(ipx * ipx + ipy * ipy + ipz * ipz + double(mass[i]) * mass[i]);
+  }
+  return detail::Mass(e, px, py, pz);
+}
+
+// The DeltaR of an indexed pair, -1 without a pair
+template <typename T>
+double PairDeltaR(const ROOT::VecOps::RVec<T>& eta, const ROOT::VecOps::RVec<T>& phi,
+                  const ROOT::VecOps::RVec<int>& pair)
+{
+  if (pair.size() < 2) return -1.0;
+  const double deta = eta[pair[0]] - eta[pair[1]];
+  const double dphi = detail::DeltaPhi(phi[pair[0]], phi[pair[1]]);
+  return std::sqrt(deta * deta + dphi * dphi);
+}
+
+} // namespace rdfw
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+
+from rdframework.utils import declare_cpp
+
+
+def _declare() -> None:
+    declare_cpp(Path(__file__).parent / "combinatorics.cpp", "rdfw::BestMassTriplet")
+
+
+def define_indices(events: Any, input_collection: str, column: str) -> Any:
+    """Define {input_collection}idx, the indices 0..n-1 of the collection, from one of its columns. The loop is
+    jitted inline, so selectors need no declared kernel to build their graph."""
+    return events.Define(
+        f"{input_collection}idx",
+        f"ROOT::VecOps::RVec<UInt_t> idx({column}.size()); "
+        "for (UInt_t i = 0; i < idx.size(); ++i) idx[i] = i; return idx;",
+    )
+
+
+def define_pairs(events: Any, input_collection: str, output: str) -> Any:
+    """Define output as the {first, second} indices of all pairs of the collection, as Combinations(column, 2).
+    Prefer the fused kernels below where only the best pair is needed."""
+    _declare()
+    return events.Define(output, f"rdfw::PairIndices({input_collection}pt.size())")
+
+
+def define_triplets(events: Any, input_collection: str, output: str) -> Any:
+    """Define output as the {first, second, third} indices of all triplets of the collection, as
+    Combinations(column, 3)"""
+    _declare()
+    return events.Define(output, f"rdfw::TripletIndices({input_collection}pt.size())")
+
+
+def _p4(input_collection: str) -> str:
+    return ", ".join(
+        f"{input_collection}{field}" for field in ["pt", "eta", "phi", "mass"]
+    )
+
+
+def best_mass_pair(
+    events: Any,
+    input_collection: str,
+    output_collection: str,
+    target_mass: float = 91.1876,
+) -> Any:
+    """Define {output_collection}idx, the indices {i, j} of the pair of the collection with invariant mass closest
+    to target_mass (empty for fewer than two objects), and {output_collection}mass (0 without a pair)"""
+    _declare()
+    return events.Define(
+        f"{output_collection}idx",
+        f"rdfw::BestMassPair({_p4(input_collection)}, {target_mass!r})",
+    ).Define(
+        f"{output_collection}mass",
+        f"rdfw::CombinedMass({_p4(input_collection)}, {output_collection}idx)",
+    )
+
+
+def best_mass_triplet(
+    events: Any,
+    input_collection: str,
+    output_collection: str,
+    target_mass: float = 172.5,
+) -> Any:
+    """Define {output_collection}idx, the indices {i, j, k} of the triplet of the collection with invariant mass
+    closest to target_mass, e.g. a hadronic top candidate from selected jets (empty for fewer than three objects),
+    and {output_collection}mass"""
+    _declare()
+    return events.Define(
+        f"{output_collection}idx",
+        f"rdfw::BestMassTriplet({_p4(input_collection)}, {target_mass!r})",
+    ).Define(
+        f"{output_collection}mass",
+        f"rdfw::CombinedMass({_p4(input_collection)}, {output_collection}idx)",
+    )
+
+
+def min_delta_r_pair(events: Any, input_collection: str, output_collection: str) -> Any:
+    """Define {output_collection}idx, the indices {i, j} of the pair of the collection closest in DeltaR (empty for
+    fewer than two objects), and {output_collection}dR (-1 without a pair)"""
+    _declare()
+    return events.Define(
+        f"{output_collection}idx",
+        f"rdfw::MinDeltaRPair({input_collection}eta, {input_collection}phi)",
+    ).Define(
+        f"{output_collection}dR",
+        f"rdfw::PairDeltaR({input_collection}eta, {input_collection}phi, {output_collection}idx)",
+    )
@@ -2,16 +2,18 @@ from __future__ import annotations
 
 from typing import Any
 
+from rdframework.io.schema import DatasetSchema, collection_columns
+from rdframework.objects.combinatorics import define_indices
+from rdframework.utils import is_columnar
 
-def btag_jets(
-    events: Any,
+
+def btag_working_points(
     btagger: str,
-    WP: str,
     era: str,
     is_ultra_legacy: bool = True,
     pre_post_VFP: str | None = None,
-    return_btag_dict: bool = False,
-) -> Any:
+) -> dict[str, Any]:
+    """Return the L/M/T working points and the Jet branch ('Var') of a btagger"""
     # Nested btag WP dictionary of the form dict[is_ultra_legacy][era][btagger]
     # From https://twiki.cern.ch/twiki/bin/view/CMS/BtagRecommendation#Recommendation_for_13_TeV_Data
     bTagWorkingPointDict = dict()
@@ -57,7 +59,25 @@ def btag_jets(
             raise ValueError("UltraLegacy 2016 requires a 'preVFP' or 'postVFP' tag")
     else:
         key_era = era
-    subset = bTagWorkingPointDict[is_ultra_legacy][key_era][btagger]
+    return bTagWorkingPointDict[is_ultra_legacy][key_era][btagger]
+
+
+def btag_jets(
+    events: Any,
+    btagger: str,
+    WP: str,
+    era: str,
+    is_ultra_legacy: bool = True,
+    pre_post_VFP: str | None = None,
+    return_btag_dict: bool = False,
+) -> Any:
+    if is_columnar(events):
+        from rdframework.columnar.selections import btag_jets as columnar_btag_jets
+
+        return columnar_btag_jets(
+            events, btagger, WP, era, is_ultra_legacy, pre_post_VFP, return_btag_dict
+        )
+    subset = btag_working_points(btagger, era, is_ultra_legacy, pre_post_VFP)
     btagVar, btagWP = str(subset["Var"]), subset[WP]
     results = [events.Define("btagmask", f"return Jet_{btagVar} >= {btagWP};")]
     if return_btag_dict:
@@ -68,6 +88,29 @@ def btag_jets(
         return results[0]
 
 
+def jet_id_level(jet_id: str) -> int:
+    if jet_id.lower() in ["loose", "l"]:
+        return 1  # don't use in 2017/2018!
+    elif jet_id.lower() in ["tight", "t"]:
+        return 2
+    elif jet_id.lower() in ["tightlepveto", "tlv"]:
+        return 6
+    else:
+        raise ValueError(f"Unsupported jet_id value{jet_id}")
+
+
+def jet_pu_id_level(jet_pu_id: str) -> int:
+    if jet_pu_id.lower() in ["loose", "l"]:
+        return 4
+    elif jet_pu_id.lower() in ["medium", "m"]:
+        return 6
+    elif jet_pu_id.lower() in ["tight", "t"]:
+        return 7
+        # jet_mask[syst_name] = jet_mask[syst_name] & ( (getattr(jets, "pt_" + syst_variation) > 50.0) | jets.puId == 7)
+    else:
+        raise ValueError("Invalid Jet PU Id selected")
+
+
 def select_jets(
     events: Any,
     input_collection: str,
@@ -86,6 +129,7 @@ def select_jets(
     fix_inverted_pu_id_bits: bool = False,
     sort_column: str | None = "pt",
     sort_ascending: bool = False,
+    schema: DatasetSchema | None = None,
 ) -> Any:
     """pass in RDataFrame and list of names of isolated leptons to clean against. can use PFMatching or deltaR
 
@@ -94,8 +138,31 @@ def select_jets(
     Due to a configuration mistake, one or both of the UltraLegacy 2016 samples have the Jet PU ID bits reversed!
     Also recommended to apply PU ID Loose if using the DeepJet tagger, as it was trained with that WP in place
     In 2016, 'loose" jet ID is available, but 2017 and 2018 only have 'tight' and 'tightlepveto'
+    With the dataset's schema (rdframework.io.schema), the collection's columns are looked up instead of scanned
 
     """
+    if is_columnar(events):
+        from rdframework.columnar.selections import select_jets as columnar_select_jets
+
+        return columnar_select_jets(
+            events,
+            input_collection,
+            output_collection,
+            columns,
+            isolated_leptons,
+            clean_algo_or_dR,
+            jet_min_pt,
+            jet_max_eta,
+            jet_id,
+            jet_pu_id=jet_pu_id,
+            btagging_configuration=btagging_configuration,
+            era=era,
+            is_ultra_legacy=is_ultra_legacy,
+            pre_post_VFP=pre_post_VFP,
+            fix_inverted_pu_id_bits=fix_inverted_pu_id_bits,
+            sort_column=sort_column,
+            sort_ascending=sort_ascending,
+        )
     # This function either needs to be aware of jet JES/JER variations in pt, or will be called multiple times!
     # The latter might be extremely costly and inefficient if you have to use e.g. all ~20 JEC variations!
     # Once the Vary function is around, that should be called on the pt, then the variations should work downstream for
@@ -110,14 +177,7 @@ def select_jets(
             "Patching of the inverted Jet PU ID bits in 2016 UL not implemented"
         )
 
-    if jet_id.lower() in ["loose", "l"]:
-        jet_min_id = 1  # don't use in 2017/2018!
-    elif jet_id.lower() in ["tight", "t"]:
-        jet_min_id = 2
-    elif jet_id.lower() in ["tightlepveto", "tlv"]:
-        jet_min_id = 6
-    else:
-        raise ValueError(f"Unsupported jet_id value{jet_id}")
+    jet_min_id = jet_id_level(jet_id)
 
     # This presumes _pt is a Vary'd column, all systematics accounted for!
     mask = (
@@ -126,15 +186,7 @@ def select_jets(
     )
 
     if jet_pu_id:
-        if jet_pu_id.lower() in ["loose", "l"]:
-            jet_min_pu_id = 4
-        elif jet_pu_id.lower() in ["medium", "m"]:
-            jet_min_pu_id = 6
-        elif jet_pu_id.lower() in ["tight", "t"]:
-            jet_min_pu_id = 7
-            # jet_mask[syst_name] = jet_mask[syst_name] & ( (getattr(jets, "pt_" + syst_variation) > 50.0) | jets.puId == 7)
-        else:
-            raise ValueError("Invalid Jet PU Id selected")
+        jet_min_pu_id = jet_pu_id_level(jet_pu_id)
         mask = (
             mask
             + f" && (({input_collection}pt > 50.0) || ({input_collection}puId >= {jet_min_pu_id}))"
@@ -170,23 +222,16 @@ def select_jets(
                 )
     mask = mask + "return jmask;"
 
-    avail_columns = [
-        str(col)
-        for col in events.GetColumnNames()
-        if str(col).startswith(input_collection)
-    ]
+    avail_columns = collection_columns(events, input_collection, schema)
     if f"{input_collection}idx" not in avail_columns:
-        events = events.Define(
-            f"{input_collection}idx",
-            f"ROOT::VecOps::RVec<UInt_t> empty = {{}}; return {avail_columns[0]}.size() > 0 ? ROOT::VecOps::RVec<UInt_t>(Combinations({avail_columns[0]}, 1).at(0)) : empty;",
-        )
+        events = define_indices(events, input_collection, avail_columns[0])
     events = events.Define(f"{output_collection}jetmask", mask)
     if btagging_configuration is not None:
         btagger = str(btagging_configuration.get("btagger"))
         WP = str(btagging_configuration.get("WP"))
         era = str(btagging_configuration.get("era", era))
         is_ultra_legacy = btagging_configuration.get("is_ultra_legacy", is_ultra_legacy)
-        pre_post_VFP = btagging_configuration.get("is_ultra_legacy", pre_post_VFP)
+        pre_post_VFP = btagging_configuration.get("pre_post_VFP", pre_post_VFP)
         events = btag_jets(
             events,
             btagger=btagger,
@@ -205,9 +250,10 @@ def select_jets(
     elif isinstance(columns, str):
         raise NotImplementedError("regexp not currently supported")
     else:
-        sel_columns = [col[len(input_collection) :] for col in avail_columns] + [
-            f"{input_collection}idx"
-        ]
+        # idx carries the original indices of the selected objects
+        sel_columns = [col[len(input_collection) :] for col in avail_columns]
+        if "idx" not in sel_columns:
+            sel_columns.append("idx")
 
     if sort_column:
         if not sort_ascending:
@@ -217,13 +263,13 @@ def select_jets(
             )
         else:
             events = events.Define(
-                "jettake",
+                f"{output_collection}jettake",
                 f"return Argsort({input_collection}{sort_column}[{output_collection}jetmask]);",
             )
     else:
         events = events.Define(
             f"{output_collection}jettake",
-            f"return {input_collection}idx[{output_collection}jetmask];",
+            f"return Enumerate({input_collection}idx[{output_collection}jetmask]);",
         )
     events = events.Define(
         f"n{output_collection[:-1]}", f"return Sum({output_collection}jetmask);"
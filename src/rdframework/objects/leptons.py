@@ -2,29 +2,39 @@ from __future__ import annotations
 
 from typing import Any
 
+from rdframework.io.schema import DatasetSchema, collection_columns
+from rdframework.objects.combinatorics import define_indices
+from rdframework.utils import is_columnar
+
+VID_CUT_NAMES = [
+    "MinPtCut",
+    "GsfEleSCEtaMultiRangeCut",
+    "GsfEleDEtaInSeedCut",
+    "GsfEleDPhiInCut",
+    "GsfEleFull5x5SigmaIEtaIEtaCut",
+    "GsfEleHadronicOverEMEnergyScaledCut",
+    "GsfEleEInverseMinusPInverseCut",
+    "GsfEleRelPFIsoScaledCut",
+    "GsfEleConversionVetoCut",
+    "GsfEleMissingHitsCut",
+]
+
 
 def vidUnpackedWP(
-    events: Any, return_columns: bool = True, input_collection: str = "Electron_"
+    events: Any,
+    return_columns: bool = True,
+    input_collection: str = "Electron_",
+    schema: DatasetSchema | None = None,
 ) -> Any:
     """Return dataframe with columns of the cuts in the electron cutBasedID,
     e.g. Electron_GsfEleEInverseMinusPInverseCut will be 0 (fail), 1, 2, 3, or 4 (tight)"""
-    columns = events.GetColumnNames()
+    if is_columnar(events):
+        from rdframework.columnar.selections import vidUnpackedWP as columnar_vid
+
+        return columnar_vid(events, return_columns, input_collection)
+    columns = set(collection_columns(events, input_collection, schema))
     ret_cols = []
-    for name, shift in zip(
-        [
-            "MinPtCut",
-            "GsfEleSCEtaMultiRangeCut",
-            "GsfEleDEtaInSeedCut",
-            "GsfEleDPhiInCut",
-            "GsfEleFull5x5SigmaIEtaIEtaCut",
-            "GsfEleHadronicOverEMEnergyScaledCut",
-            "GsfEleEInverseMinusPInverseCut",
-            "GsfEleRelPFIsoScaledCut",
-            "GsfEleConversionVetoCut",
-            "GsfEleMissingHitsCut",
-        ],
-        range(0, 28, 3),
-    ):
+    for name, shift in zip(VID_CUT_NAMES, range(0, 28, 3)):
         # hanky, but more consistent with coffea implementation line-by-line
         ret_cols.append(name)
         # Replace with Redefine when it can be used to 'define if undefined, overwrite if defined'
@@ -52,6 +62,47 @@ def vidUnpackedWPSelection(electrons: Any, level: int) -> Any:
     # return results
 
 
+def electron_id_level(electron_id: int | str) -> int:
+    if isinstance(electron_id, str):
+        if electron_id.lower() == "fail":
+            return 0
+        elif electron_id.lower() == "veto":
+            return 1
+        elif electron_id.lower() == "loose":
+            return 2
+        elif electron_id.lower() == "medium":
+            return 3
+        elif electron_id.lower() == "tight":
+            return 4
+        else:
+            raise ValueError(f"{electron_id} is not a supported cutBased electron ID")
+    else:
+        return electron_id
+
+
+def muon_iso_level(muon_iso: int | str) -> int:
+    if isinstance(muon_iso, str):
+        # 1=PFIsoVeryLoose, 2=PFIsoLoose, 3=PFIsoMedium, 4=PFIsoTight, 5=PFIsoVeryTight, 6=PFIsoVeryVeryTight
+        if muon_iso.lower() in ["fail", "pfisoveryveryloose"]:
+            return 0
+        elif muon_iso.lower() in ["pfisoveryloose", "veryloose"]:
+            return 1
+        elif muon_iso.lower() in ["pfisoloose", "loose"]:
+            return 2
+        elif muon_iso.lower() in ["pfisomedium", "medium"]:
+            return 3
+        elif muon_iso.lower() in ["pfisotight", "tight"]:
+            return 4
+        elif muon_iso.lower() in ["pfisoverytight", "verytight"]:
+            return 5
+        elif muon_iso.lower() in ["pfisoveryverytight", "veryverytight"]:
+            return 6
+        else:
+            raise ValueError(f"{muon_iso} is not a supported cutBased muon ID")
+    else:
+        return muon_iso
+
+
 def select_electrons_cutBased(
     events: Any,
     input_collection: str,
@@ -67,26 +118,34 @@ def select_electrons_cutBased(
     invert_cuts: list[str] | None = None,
     sort_column: str | None = "pt",
     sort_ascending: bool = False,
+    schema: DatasetSchema | None = None,
 ) -> Any:
+    if is_columnar(events):
+        from rdframework.columnar.selections import (
+            select_electrons_cutBased as columnar_select_electrons,
+        )
+
+        return columnar_select_electrons(
+            events,
+            input_collection,
+            output_collection,
+            columns,
+            electron_id,
+            min_pt,
+            max_eta=max_eta,
+            max_ip3d_barrel=max_ip3d_barrel,
+            max_ip3d_endcap=max_ip3d_endcap,
+            max_dz_barrel=max_dz_barrel,
+            max_dz_endcap=max_dz_endcap,
+            invert_cuts=invert_cuts,
+            sort_column=sort_column,
+            sort_ascending=sort_ascending,
+        )
     if not input_collection.endswith("_"):
         input_collection += "_"
     if not output_collection.endswith("_"):
         output_collection += "_"
-    if isinstance(electron_id, str):
-        if electron_id.lower() == "fail":
-            e_id = 0
-        elif electron_id.lower() == "veto":
-            e_id = 1
-        elif electron_id.lower() == "loose":
-            e_id = 2
-        elif electron_id.lower() == "medium":
-            e_id = 3
-        elif electron_id.lower() == "tight":
-            e_id = 4
-        else:
-            raise ValueError(f"{electron_id} is not a supported cutBased electron ID")
-    else:
-        e_id = electron_id
+    e_id = electron_id_level(electron_id)
 
     # We apply the EGamma recommendations
     mask = f"""auto emask =
@@ -110,7 +169,10 @@ def select_electrons_cutBased(
         cln_invert_cuts = [cut.split("_")[-1] for cut in invert_cuts]
         # add unpacked columns to dataset
         events, vid_cuts = vidUnpackedWP(
-            events, return_columns=True, input_collection=input_collection
+            events,
+            return_columns=True,
+            input_collection=input_collection,
+            schema=schema,
         )
         for name in vid_cuts:
             if name not in cln_invert_cuts:
@@ -123,16 +185,9 @@ def select_electrons_cutBased(
         mask += f"\n && ({input_collection}cutBased >= {e_id})"
     mask += "; return emask;"
 
-    avail_columns = [
-        str(col)
-        for col in events.GetColumnNames()
-        if str(col).startswith(input_collection)
-    ]
+    avail_columns = collection_columns(events, input_collection, schema)
     if f"{input_collection}idx" not in avail_columns:
-        events = events.Define(
-            f"{input_collection}idx",
-            f"ROOT::VecOps::RVec<UInt_t> empty = {{}}; return {avail_columns[0]}.size() > 0 ? ROOT::VecOps::RVec<UInt_t>(Combinations({avail_columns[0]}, 1).at(0)) : empty;",
-        )
+        events = define_indices(events, input_collection, avail_columns[0])
     events = events.Define(f"{output_collection}elmask", mask)
 
     # Now define all our columns... what about sorting!?
@@ -145,9 +200,10 @@ def select_electrons_cutBased(
     elif isinstance(columns, str):
         raise NotImplementedError("regexp not currently supported")
     else:
-        sel_columns = [col[len(input_collection) :] for col in avail_columns] + [
-            f"{input_collection}idx"
-        ]
+        # idx carries the original indices of the selected objects
+        sel_columns = [col[len(input_collection) :] for col in avail_columns]
+        if "idx" not in sel_columns:
+            sel_columns.append("idx")
 
     if sort_column:
         # Build a take vector that must be applied to the SLICED variables
@@ -165,7 +221,7 @@ def select_electrons_cutBased(
     else:
         events = events.Define(
             f"{output_collection}eltake",
-            f"return {input_collection}idx[{output_collection}elmask];",
+            f"return Enumerate({input_collection}idx[{output_collection}elmask]);",
         )
 
     events = events.Define(
@@ -194,32 +250,34 @@ def select_muons_cutBased(
     invert_iso: bool = False,
     sort_column: str | None = "pt",
     sort_ascending: bool = False,
+    schema: DatasetSchema | None = None,
 ) -> Any:
+    if is_columnar(events):
+        from rdframework.columnar.selections import (
+            select_muons_cutBased as columnar_select_muons,
+        )
+
+        return columnar_select_muons(
+            events,
+            input_collection,
+            output_collection,
+            columns,
+            muon_id,
+            muon_iso,
+            min_pt,
+            max_eta=max_eta,
+            max_ip3d=max_ip3d,
+            max_dz=max_dz,
+            invert_iso=invert_iso,
+            sort_column=sort_column,
+            sort_ascending=sort_ascending,
+        )
     if not input_collection.endswith("_"):
         input_collection += "_"
     if not output_collection.endswith("_"):
         output_collection += "_"
 
-    if isinstance(muon_iso, str):
-        # 1=PFIsoVeryLoose, 2=PFIsoLoose, 3=PFIsoMedium, 4=PFIsoTight, 5=PFIsoVeryTight, 6=PFIsoVeryVeryTight
-        if muon_iso.lower() in ["fail", "pfisoveryveryloose"]:
-            m_iso = 0
-        elif muon_iso.lower() in ["pfisoveryloose", "veryloose"]:
-            m_iso = 1
-        elif muon_iso.lower() in ["pfisoloose", "loose"]:
-            m_iso = 2
-        elif muon_iso.lower() in ["pfisomedium", "medium"]:
-            m_iso = 3
-        elif muon_iso.lower() in ["pfisotight", "tight"]:
-            m_iso = 4
-        elif muon_iso.lower() in ["pfisoverytight", "verytight"]:
-            m_iso = 5
-        elif muon_iso.lower() in ["pfisoveryverytight", "veryverytight"]:
-            m_iso = 6
-        else:
-            raise ValueError(f"{muon_iso} is not a supported cutBased muon ID")
-    else:
-        m_iso = muon_iso
+    m_iso = muon_iso_level(muon_iso)
 
     # We apply the cuts
     mask = f"""auto mmask = (
@@ -247,16 +305,9 @@ def select_muons_cutBased(
 
     mask += "; return mmask;"
 
-    avail_columns = [
-        str(col)
-        for col in events.GetColumnNames()
-        if str(col).startswith(input_collection)
-    ]
+    avail_columns = collection_columns(events, input_collection, schema)
     if f"{input_collection}idx" not in avail_columns:
-        events = events.Define(
-            f"{input_collection}idx",
-            f"ROOT::VecOps::RVec<UInt_t> empty = {{}}; return {avail_columns[0]}.size() > 0 ? ROOT::VecOps::RVec<UInt_t>(Combinations({avail_columns[0]}, 1).at(0)) : empty;",
-        )
+        events = define_indices(events, input_collection, avail_columns[0])
     events = events.Define(f"{output_collection}mumask", mask)
 
     # Now define all our columns... what about sorting!?
@@ -269,9 +320,10 @@ def select_muons_cutBased(
     elif isinstance(columns, str):
         raise NotImplementedError("regexp not currently supported")
     else:
-        sel_columns = [col[len(input_collection) :] for col in avail_columns] + [
-            f"{input_collection}idx"
-        ]
+        # idx carries the original indices of the selected objects
+        sel_columns = [col[len(input_collection) :] for col in avail_columns]
+        if "idx" not in sel_columns:
+            sel_columns.append("idx")
 
     if sort_column:
         # Build a take vector that must be applied to the SLICED variables
@@ -289,7 +341,7 @@ def select_muons_cutBased(
     else:
         events = events.Define(
             f"{output_collection}mutake",
-            f"return {input_collection}idx[{output_collection}mumask];",
+            f"return Enumerate({input_collection}idx[{output_collection}mumask]);",
         )
     events = events.Define(
         f"n{output_collection[:-1]}", f"return Sum({output_collection}mumask);"
@@ -0,0 +1,46 @@
+#include <ROOT/RVec.hxx>
+#include <RtypesCore.h>
+
+#include <cmath>
+#include <cstddef>
+
+namespace rdfw {
+
+// The gen values matched to each reco object through its gen index, e.g. GenJet_pt for Jet_genJetIdx, or fallback
+// for unmatched objects (negative or out of range index). One pass over the reco objects.
+template <typename T, typename I>
+ROOT::VecOps::RVec<T> GatherMatched(const ROOT::VecOps::RVec<T>& genValues, const ROOT::VecOps::RVec<I>& genIdx,
+                                    typename ROOT::VecOps::RVec<T>::value_type fallback)
+{
+  ROOT::VecOps::RVec<T> matched(genIdx.size(), fallback);
+  for (std::size_t i = 0; i < genIdx.size(); ++i) {
+    const auto index = static_cast<long long>(genIdx[i]);
+    if (index >= 0 && static_cast<std::size_t>(index) < genValues.size()) matched[i] = genValues[index];
+  }
+  return matched;
+}
+
+// Gen index of the closest gen object within maxDeltaR of each reco object, -1 if there is none, for collections
+// without a NanoAOD gen index
+template <typename T, typename U>
+ROOT::VecOps::RVec<Int_t> DeltaRMatch(const ROOT::VecOps::RVec<T>& eta, const ROOT::VecOps::RVec<T>& phi,
+                                      const ROOT::VecOps::RVec<U>& genEta, const ROOT::VecOps::RVec<U>& genPhi,
+                                      double maxDeltaR)
+{
+  ROOT::VecOps::RVec<Int_t> matched(eta.size(), -1);
+  for (std::size_t i = 0; i < eta.size(); ++i) {
+    double best = maxDeltaR * maxDeltaR;
+    for (std::size_t j = 0; j < genEta.size(); ++j) {
+      const double deta = eta[i] - genEta[j];
+      const double dphi = std::remainder(phi[i] - genPhi[j], 2 * M_PI);
+      const double dr2 = deta * deta + dphi * dphi;
+      if (dr2 < best) {
+        best = dr2;
+        matched[i] = static_cast<Int_t>(j);
+      }
+    }
+  }
+  return matched;
+}
+
+} // namespace rdfw
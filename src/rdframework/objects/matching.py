@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+
+from rdframework.io.schema import DatasetSchema, collection_columns
+from rdframework.utils import declare_cpp
+
+# NanoAOD collection -> (its gen index field, the gen collection indexed)
+GEN_INDICES = {
+    "Jet": ("genJetIdx", "GenJet"),
+    "FatJet": ("genJetAK8Idx", "GenJetAK8"),
+    "Electron": ("genPartIdx", "GenPart"),
+    "Muon": ("genPartIdx", "GenPart"),
+    "Photon": ("genPartIdx", "GenPart"),
+    "Tau": ("genPartIdx", "GenPart"),
+}
+
+
+def _declare() -> None:
+    declare_cpp(Path(__file__).parent / "matching.cpp", "rdfw::GatherMatched")
+
+
+def _prefix(collection: str) -> str:
+    return collection if collection.endswith("_") else collection + "_"
+
+
+def _gen_collection(input_collection: str, gen_collection: str | None) -> str:
+    if gen_collection is None:
+        if input_collection[:-1] not in GEN_INDICES:
+            raise ValueError(
+                f"No gen collection known for {input_collection[:-1]}, pass gen_collection"
+            )
+        gen_collection = GEN_INDICES[input_collection[:-1]][1]
+    return _prefix(gen_collection)
+
+
+def gen_match_indices(
+    events: Any,
+    collection: str,
+    input_collection: str | None = None,
+    gen_collection: str | None = None,
+    max_dR: float = 0.4,
+    schema: DatasetSchema | None = None,
+) -> Any:
+    """Define {collection}genIdx, the index in the gen collection of each object of collection, -1 if unmatched.
+
+    collection is a NanoAOD collection, or one selected from input_collection (e.g. selJet from Jet by select_jets),
+    whose {collection}idx holds the original index of every selected object: the NanoAOD gen index (e.g.
+    Jet_genJetIdx) is then taken through it, so the matching follows the mask and sort of the selector. Only
+    collections without a gen index (or selected without their idx) are matched in DeltaR, to the closest gen
+    object within max_dR."""
+    collection = _prefix(collection)
+    input_collection = _prefix(input_collection or collection)
+    gen_collection = _gen_collection(input_collection, gen_collection)
+    field = GEN_INDICES.get(input_collection[:-1], (None, None))[0]
+    columns = set(collection_columns(events, collection, schema))
+    if input_collection != collection:
+        columns |= set(collection_columns(events, input_collection, schema))
+    if field is not None and f"{collection}{field}" in columns:
+        # the selector carried the gen index over, already aligned
+        return events.Define(f"{collection}genIdx", f"{collection}{field}")
+    if (
+        field is not None
+        and f"{input_collection}{field}" in columns
+        and f"{collection}idx" in columns
+    ):
+        return events.Define(
+            f"{collection}genIdx", f"Take({input_collection}{field}, {collection}idx)"
+        )
+    _declare()
+    return events.Define(
+        f"{collection}genIdx",
+        f"rdfw::DeltaRMatch({collection}eta, {collection}phi, {gen_collection}eta, {gen_collection}phi, {max_dR!r})",
+    )
+
+
+def match_to_gen(
+    events: Any,
+    collection: str,
+    input_collection: str | None = None,
+    fields: list[str] | None = None,
+    gen_collection: str | None = None,
+    max_dR: float = 0.4,
+    fallback: float = -1.0,
+    is_mc: bool = True,
+    schema: DatasetSchema | None = None,
+) -> Any:
+    """Define {collection}genIdx (see gen_match_indices) and {collection}gen_{field} for every field of the gen
+    collection (by default pt, eta, phi and mass), holding fallback for unmatched objects. The gen values are
+    gathered in one pass over the reco objects. Data has no gen collections, so nothing is defined for it."""
+    if not is_mc:
+        return events
+    collection = _prefix(collection)
+    input_collection = _prefix(input_collection or collection)
+    gen_collection = _gen_collection(input_collection, gen_collection)
+    events = gen_match_indices(
+        events, collection, input_collection, gen_collection, max_dR, schema
+    )
+    _declare()
+    for field in fields or ["pt", "eta", "phi", "mass"]:
+        events = events.Define(
+            f"{collection}gen_{field}",
+            f"rdfw::GatherMatched({gen_collection}{field}, {collection}genIdx, {fallback!r})",
+        )
+    return events
@@ -0,0 +1,5 @@
+"Code related to running configured pipelines over datasets, such as the rdframework command line entry point and progress reporting"
+
+from __future__ import annotations
+
+__all__ = ["cli", "config", "pipeline", "preview", "progress"]
@@ -0,0 +1,137 @@
+"""The rdframework command: run a pipeline config over its datasets, e.g.
+
+    rdframework pipeline.json --threads 8 --processes 2
+
+Each process runs the graphs of its share of the datasets concurrently with ROOT.RDF.RunGraphs on --threads
+threads, printing events/s, MB/s and ETA per dataset while running."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import sys
+from typing import Any
+
+from rdframework.runner.config import PipelineConfig, load_config
+
+
+def _run_share(
+    args: tuple[str, list[str], int | None, float | None, float | None],
+) -> list[dict[str, Any]]:
+    from rdframework.runner.pipeline import run_datasets
+
+    config_path, names, threads, interval, preview = args
+    return run_datasets(load_config(config_path), names, threads, interval, preview)
+
+
+def split_datasets(config: PipelineConfig, processes: int) -> list[list[str]]:
+    """Deal the datasets out to processes, largest (by number of files) first, so the shares are balanced"""
+    entries = sorted(
+        config.datasets, key=lambda entry: len(entry.dataset.files()), reverse=True
+    )
+    shares: list[list[str]] = [[] for _ in range(max(1, min(processes, len(entries))))]
+    loads = [0] * len(shares)
+    for entry in entries:
+        i = loads.index(min(loads))
+        shares[i].append(entry.dataset.name())
+        loads[i] += len(entry.dataset.files())
+    return shares
+
+
+def describe(config: PipelineConfig) -> str:
+    lines = [f"era {config.era}, {len(config.datasets)} datasets:"]
+    lines += [
+        f"  {entry.dataset.name()} ({'MC' if entry.dataset.is_mc() else 'data'}, "
+        f"{len(entry.dataset.files())} files) {entry.options or ''}"
+        for entry in config.datasets
+    ]
+    lines.append("steps:")
+    lines += [f"  {step.helper} {json.dumps(step.args)}" for step in config.steps]
+    outputs = config.outputs
+    lines.append(
+        f"outputs in {outputs.directory}: {len(outputs.histograms)} histogram variables, "
+        f"snapshot {'on' if outputs.snapshot else 'off'}"
+    )
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="rdframework", description="Run an rdframework pipeline config"
+    )
+    parser.add_argument("config", help="pipeline config (JSON)")
+    parser.add_argument(
+        "--threads", type=int, help="threads per process (0 for all cores)"
+    )
+    parser.add_argument(
+        "--processes", type=int, help="processes to spread datasets over"
+    )
+    parser.add_argument("--datasets", nargs="+", help="only run these datasets")
+    parser.add_argument(
+        "--progress-interval",
+        type=float,
+        default=10.0,
+        help="seconds between progress lines, 0 to disable",
+    )
+    parser.add_argument(
+        "--preview",
+        type=float,
+        metavar="FRACTION",
+        help="only process this fraction of each dataset's clusters, extrapolating the results",
+    )
+    parser.add_argument("--summary", help="write the per-dataset throughput as JSON")
+    parser.add_argument(
+        "--dry-run", action="store_true", help="only validate and describe the config"
+    )
+    args = parser.parse_args(argv)
+
+    config = load_config(args.config)
+    if args.preview is not None and not 0 < args.preview <= 1:
+        parser.error("--preview must be in (0, 1]")
+    if args.datasets:
+        unknown = set(args.datasets) - {e.dataset.name() for e in config.datasets}
+        if unknown:
+            parser.error(f"unknown datasets {sorted(unknown)}")
+        config = config._replace(
+            datasets=[e for e in config.datasets if e.dataset.name() in args.datasets]
+        )
+    if args.dry_run:
+        print(describe(config))
+        return 0
+
+    processes = config.processes if args.processes is None else args.processes
+    interval = args.progress_interval if args.progress_interval > 0 else None
+    shares = [
+        (args.config, share, args.threads, interval, args.preview)
+        for share in split_datasets(config, processes)
+    ]
+    if len(shares) == 1:
+        summaries = _run_share(shares[0])
+    else:
+        # spawn, as forking a process that has already loaded ROOT is not safe
+        with multiprocessing.get_context("spawn").Pool(len(shares)) as pool:
+            summaries = [s for share in pool.map(_run_share, shares) for s in share]
+
+    for summary in summaries:
+        rate = summary.get("events_per_second", 0.0)
+        mbps = summary.get("MB_per_second")
+        print(
+            f"{summary['dataset']}: {summary.get('events', 0):.0f} events, {rate:.0f} events/s"
+            + (f", {mbps:.1f} MB/s" if mbps is not None else "")
+        )
+        if "preview_fraction" in summary:
+            print(f"  preview of {summary['preview_fraction']:.2%} of the entries")
+            for cut, (count, error) in summary["cutflow"].items():
+                print(f"  {cut:<30} {count:14.1f} +- {error:.1f}")
+        else:
+            for cut, count in summary.get("cutflow", {}).items():
+                print(f"  {cut:<30} {count:14.0f}")
+    if args.summary:
+        with open(args.summary, "w") as f:
+            json.dump(summaries, f, indent=1)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import json
+from typing import Any, NamedTuple
+
+from rdframework.histograms.booking import HistogramVariable
+from rdframework.io.dataset import SimpleDataset
+from rdframework.io.precision import ColumnPrecision, parse_precision
+
+# helper name -> module providing it, imported only when a pipeline uses it (some modules load ROOT on import)
+HELPERS = {
+    "PV_MET_filter": "rdframework.filters.cuts",
+    "certified_lumi_filter": "rdframework.filters.cuts",
+    "lepton_channel_categorization": "rdframework.filters.categorization",
+    "dilepton_trigger_selection": "rdframework.filters.categorization",
+    "btag_jets": "rdframework.objects.jets",
+    "select_jets": "rdframework.objects.jets",
+    "vidUnpackedWP": "rdframework.objects.leptons",
+    "select_electrons_cutBased": "rdframework.objects.leptons",
+    "select_muons_cutBased": "rdframework.objects.leptons",
+    "match_to_gen": "rdframework.objects.matching",
+    "MET_xy_corrector": "rdframework.corrections.met",
+    "correct_electron_energies": "rdframework.corrections.electrons",
+}
+# steps calling the dataframe directly, with their required arguments
+DIRECT_STEPS = {"Define": ["name", "expression"], "Filter": ["expression"]}
+# per-dataset settings passed to every helper accepting them, unless the step sets them itself
+DATASET_OPTIONS = ["run_period", "data_stream", "pre_post_VFP"]
+
+
+class PipelineStep(NamedTuple):
+    helper: str
+    args: dict[str, Any]
+
+
+class DatasetEntry(NamedTuple):
+    dataset: SimpleDataset
+    options: dict[str, Any]
+
+
+class OutputConfig(NamedTuple):
+    directory: str
+    histograms: list[HistogramVariable]
+    channels: list[str] | None
+    weights: dict[str, str] | None
+    snapshot: bool
+    snapshot_columns: list[str] | None
+    snapshot_precision: list[ColumnPrecision]
+    column_variations: bool
+
+
+class PipelineConfig(NamedTuple):
+    """A pipeline: the datasets to process, the helper steps applied to each of them in order, and the outputs.
+    entry_lists, when set, names a directory and the number of leading steps forming the preselection, whose
+    passing entries are indexed per file so later runs read only those. schema_cache, when set, is a directory
+    caching each dataset's columns, keyed on each file's path, size and modification time (datasets carry no
+    checksums), which are passed to the helpers accepting a schema. staging, when set, names a
+    local directory and a budget in GB to copy the input files to before reading them (without entry lists or
+    previews). threads and processes set
+    the default execution layout, overridable from the command line."""
+
+    era: str
+    is_ultra_legacy: bool
+    tree: str
+    datasets: list[DatasetEntry]
+    steps: list[PipelineStep]
+    outputs: OutputConfig
+    normalization: dict[str, Any] | None
+    entry_lists: dict[str, Any] | None
+    schema_cache: str | None
+    staging: dict[str, Any] | None
+    threads: int
+    processes: int
+
+
+def _require(raw: dict[str, Any], key: str, where: str) -> Any:
+    if key not in raw:
+        raise ValueError(f"{where} is missing the required key {key!r}")
+    return raw[key]
+
+
+def parse_step(raw: dict[str, Any]) -> PipelineStep:
+    helper = _require(raw, "helper", "pipeline step")
+    args = dict(raw.get("args", {}))
+    if helper in DIRECT_STEPS:
+        for key in DIRECT_STEPS[helper]:
+            _require(args, key, f"{helper} step")
+    elif helper not in HELPERS:
+        raise ValueError(
+            f"Unknown helper {helper}, choose one of {sorted(HELPERS) + sorted(DIRECT_STEPS)}"
+        )
+    return PipelineStep(helper, args)
+
+
+def parse_dataset(raw: dict[str, Any]) -> DatasetEntry:
+    name = _require(raw, "name", "dataset")
+    is_mc = bool(_require(raw, "is_mc", f"dataset {name}"))
+    dataset = SimpleDataset(
+        name,
+        float(raw.get("xsec", 1.0)),
+        is_mc,
+        float(raw.get("effective_luminosity", 1.0)),
+        raw.get("latex_name", name),
+        list(_require(raw, "files", f"dataset {name}")),
+        bool(raw.get("is_skimmed", False)),
+        raw.get("skimming_description"),
+    )
+    options = {key: raw[key] for key in DATASET_OPTIONS if key in raw}
+    return DatasetEntry(dataset, options)
+
+
+def parse_outputs(raw: dict[str, Any]) -> OutputConfig:
+    histograms = [
+        HistogramVariable(
+            var["name"],
+            var.get("expression", var["name"]),
+            var["bins"],
+            float(var.get("low", 0.0)),
+            float(var.get("high", 1.0)),
+            var.get("title", ""),
+        )
+        for var in raw.get("histograms", [])
+    ]
+    return OutputConfig(
+        raw.get("directory", "."),
+        histograms,
+        raw.get("channels"),
+        raw.get("weights"),
+        bool(raw.get("snapshot", False)),
+        raw.get("snapshot_columns"),
+        parse_precision(raw.get("snapshot_precision")),
+        bool(raw.get("column_variations", False)),
+    )
+
+
+def parse_entry_lists(
+    raw: dict[str, Any] | None, steps: list[PipelineStep]
+) -> dict[str, Any] | None:
+    if raw is None:
+        return None
+    _require(raw, "directory", "entry_lists")
+    preselection = int(_require(raw, "preselection", "entry_lists"))
+    if not 0 < preselection <= len(steps):
+        raise ValueError(
+            f"entry_lists preselection must be between 1 and the {len(steps)} steps, got {preselection}"
+        )
+    return dict(raw, preselection=preselection)
+
+
+def parse_staging(raw: dict[str, Any] | None) -> dict[str, Any] | None:
+    if raw is None:
+        return None
+    _require(raw, "directory", "staging")
+    budget_gb = float(_require(raw, "budget_gb", "staging"))
+    if budget_gb <= 0:
+        raise ValueError(f"staging budget_gb must be positive, got {budget_gb}")
+    return dict(raw, budget_gb=budget_gb)
+
+
+def parse_config(raw: dict[str, Any]) -> PipelineConfig:
+    datasets = [parse_dataset(ds) for ds in _require(raw, "datasets", "config")]
+    names = [entry.dataset.name() for entry in datasets]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Dataset names must be unique, got {names}")
+    steps = [parse_step(step) for step in raw.get("steps", [])]
+    return PipelineConfig(
+        str(_require(raw, "era", "config")),
+        bool(raw.get("is_ultra_legacy", True)),
+        raw.get("tree", "Events"),
+        datasets,
+        steps,
+        parse_outputs(raw.get("outputs", {})),
+        raw.get("normalization"),
+        parse_entry_lists(raw.get("entry_lists"), steps),
+        raw.get("schema_cache"),
+        parse_staging(raw.get("staging")),
+        int(raw.get("threads", 0)),
+        int(raw.get("processes", 1)),
+    )
+
+
+def load_config(path: str) -> PipelineConfig:
+    with open(path) as f:
+        return parse_config(json.load(f))
@@ -0,0 +1,343 @@
+from __future__ import annotations
+
+import importlib
+import inspect
+import os
+from typing import Any
+
+from rdframework.histograms.booking import BookedHistograms, book_histograms
+from rdframework.io.precision import (
+    ColumnPrecision,
+    decode_columns,
+    encode_columns,
+    read_precision,
+    write_precision,
+)
+from rdframework.io.staging import StagingCache
+from rdframework.runner.config import (
+    HELPERS,
+    DatasetEntry,
+    PipelineConfig,
+    PipelineStep,
+)
+from rdframework.runner.preview import (
+    PreviewSample,
+    extrapolate_cutflow,
+    extrapolate_histogram,
+    preview_chain,
+    preview_sample,
+)
+from rdframework.runner.progress import Progress, local_file_bytes
+
+
+def helper_function(name: str) -> Any:
+    return getattr(importlib.import_module(HELPERS[name]), name)
+
+
+def helper_kwargs(
+    function: Any, step_args: dict[str, Any], context: dict[str, Any]
+) -> dict[str, Any]:
+    """The keyword arguments of a helper call: the step's own arguments, plus any dataset-level setting (era,
+    is_mc, ...) the helper accepts and the step did not set"""
+    parameters = inspect.signature(function).parameters
+    kwargs = {
+        key: value
+        for key, value in context.items()
+        if key in parameters and key not in step_args
+    }
+    kwargs.update(step_args)
+    return kwargs
+
+
+def apply_step(events: Any, step: PipelineStep, context: dict[str, Any]) -> Any:
+    if step.helper == "Define":
+        return events.Define(step.args["name"], step.args["expression"])
+    if step.helper == "Filter":
+        return events.Filter(step.args["expression"], step.args.get("name", ""))
+    function = helper_function(step.helper)
+    result = function(events, **helper_kwargs(function, step.args, context))
+    # helpers asked to also return e.g. the applied flags return (events, extra)
+    return result[0] if isinstance(result, (tuple, list)) else result
+
+
+def dataset_context(entry: DatasetEntry, config: PipelineConfig) -> dict[str, Any]:
+    context = {
+        "era": config.era,
+        "is_mc": entry.dataset.is_mc(),
+        "is_ultra_legacy": config.is_ultra_legacy,
+    }
+    context.update(entry.options)
+    return context
+
+
+def preselection_description(
+    entry: DatasetEntry, config: PipelineConfig, context: dict[str, Any]
+) -> dict[str, Any]:
+    """What the preselection of a dataset depends on, identifying its entry lists"""
+    assert config.entry_lists is not None
+    nsteps = config.entry_lists["preselection"]
+    return {
+        "tree": config.tree,
+        "context": {key: value for key, value in context.items() if key != "schema"},
+        "steps": [step._asdict() for step in config.steps[:nsteps]],
+    }
+
+
+def preselected_chain(
+    entry: DatasetEntry, config: PipelineConfig, context: dict[str, Any]
+) -> Any:
+    """A chain of the dataset's files reading only the entries passing the preselection, first building the
+    entry lists of files not yet indexed"""
+    from rdframework.io.entrylist import (
+        EntryListIndex,
+        build_entry_lists,
+        preselection_identity,
+    )
+
+    entry_lists = config.entry_lists
+    assert entry_lists is not None
+    description = preselection_description(entry, config, context)
+    index = EntryListIndex(
+        entry_lists["directory"],
+        preselection_identity(description),
+        config.tree,
+        description,
+    )
+    nsteps = entry_lists["preselection"]
+
+    def preselect(events: Any) -> Any:
+        for step in config.steps[:nsteps]:
+            events = apply_step(events, step, context)
+        return events
+
+    build_entry_lists(index, entry.dataset.files(), preselect)
+    return index.chain(entry.dataset.files())
+
+
+class DatasetGraph:
+    """The booked graph of one dataset: its final node, histograms, snapshot and cutflow report"""
+
+    def __init__(
+        self,
+        entry: DatasetEntry,
+        chain: Any,
+        events: Any,
+        histograms: BookedHistograms | None,
+        snapshot: Any,
+        report: Any,
+        progress: Progress | None,
+        preview: PreviewSample | None = None,
+        snapshot_path: str | None = None,
+        precision: list[ColumnPrecision] | None = None,
+    ):
+        self._entry = entry
+        self._chain = chain  # the dataframe reads from the chain, keep it alive
+        self._events = events
+        self._histograms = histograms
+        self._snapshot = snapshot
+        self._report = report
+        self._progress = progress
+        self._preview = preview
+        self._snapshot_path = snapshot_path
+        self._precision = precision or []
+
+    def name(self) -> str:
+        return self._entry.dataset.name()
+
+    def events(self) -> Any:
+        return self._events
+
+    def results(self) -> list[Any]:
+        """The booked results, to run every dataset's graph concurrently with ROOT.RDF.RunGraphs"""
+        results = [self._report]
+        if self._histograms is not None:
+            results += list(self._histograms.results().values())
+        if self._snapshot is not None:
+            results.append(self._snapshot)
+        return results
+
+    def write(self, directory: str) -> dict[str, Any]:
+        """Write the histograms, record the encoding of reduced-precision snapshot columns, and return the
+        dataset's summary, with its cutflow. Previews extrapolate the histograms and cutflow to the full dataset.
+        """
+        import ROOT
+
+        summary: dict[str, Any] = {"dataset": self.name()}
+        fraction = self._preview.fraction() if self._preview is not None else None
+        if self._histograms is not None:
+            path = os.path.join(
+                directory, f"{self.name()}{'_preview' if fraction else ''}.root"
+            )
+            out = ROOT.TFile.Open(path, "RECREATE")
+            for hname, hist in self._histograms.split().items():
+                if fraction:
+                    hist = extrapolate_histogram(hist, fraction)
+                out.WriteObject(hist, hname)
+            out.Close()
+            summary["histograms"] = path
+        if self._snapshot_path is not None:
+            if self._precision:
+                write_precision(self._snapshot_path, self._precision)
+            summary["snapshot"] = self._snapshot_path
+        from rdframework.io.checkpoint import report_cutflow
+
+        cutflow = report_cutflow(self._report)
+        if fraction:
+            summary["preview_fraction"] = fraction
+            summary["cutflow"] = extrapolate_cutflow(cutflow, fraction)
+        else:
+            summary["cutflow"] = cutflow
+        if self._progress is not None:
+            summary.update(self._progress.finish())
+        return summary
+
+
+def build_graph(
+    entry: DatasetEntry,
+    config: PipelineConfig,
+    progress_interval: float | None = 10.0,
+    preview: float | None = None,
+    staging: StagingCache | None = None,
+) -> DatasetGraph:
+    """Book the configured steps and outputs for one dataset, without running the event loop. A preview reads
+    only the given fraction of the dataset's clusters (from the full files, without entry lists). With a staging
+    cache, the files are read from their local copies, staging them first."""
+    import ROOT
+
+    files = entry.dataset.files()
+    context = dataset_context(entry, config)
+    if config.schema_cache is not None:
+        from rdframework.io.schema import SchemaCache, dataset_schema
+
+        context["schema"] = dataset_schema(
+            files, SchemaCache(config.schema_cache), config.tree
+        )
+    sample = None
+    if preview is not None:
+        sample = preview_sample(files, preview, config.tree, entry.dataset.name())
+        chain = preview_chain(sample, config.tree)
+        entries = sample.sampled_entries
+    elif config.entry_lists is not None:
+        # the preselection steps still run below, defining their columns, but only over the listed entries
+        chain = preselected_chain(entry, config, context)
+        entries = int(chain.GetEntryList().GetN())
+    else:
+        if staging is not None:
+            files = staging.files(files)
+        chain = ROOT.TChain(config.tree)
+        for f in files:
+            chain.Add(f)
+        entries = int(chain.GetEntries())
+    events = ROOT.RDF.AsRNode(ROOT.RDataFrame(chain))
+    if entry.dataset.is_skimmed():
+        # skims written with snapshot_precision store some columns as fixed-point codes
+        events = decode_columns(events, read_precision(files[0]))
+
+    progress = None
+    if progress_interval is not None:
+        progress = Progress(
+            entry.dataset.name(),
+            int(events.GetNSlots()),
+            entries,
+            local_file_bytes(files),
+            progress_interval,
+        )
+        events = progress.attach(events)
+
+    if entry.dataset.is_mc() and config.normalization is not None:
+        from rdframework.io.normalization import (
+            SumwCache,
+            dataset_sums,
+            define_normalized_weights,
+        )
+
+        cache_path = config.normalization.get("cache")
+        cache = SumwCache(cache_path) if cache_path else None
+        events = define_normalized_weights(
+            events,
+            entry.dataset,
+            dataset_sums(entry.dataset, cache),
+            float(config.normalization["luminosity"]),
+        )
+
+    for step in config.steps:
+        events = apply_step(events, step, context)
+
+    outputs = config.outputs
+    os.makedirs(outputs.directory, exist_ok=True)
+    histograms = None
+    if outputs.histograms:
+        events, histograms = book_histograms(
+            events,
+            outputs.histograms,
+            outputs.channels,
+            outputs.weights,
+            column_variations=outputs.column_variations,
+        )
+    snapshot = None
+    snapshot_path = None
+    if outputs.snapshot:
+        options = ROOT.RDF.RSnapshotOptions()
+        options.fLazy = True
+        columns = outputs.snapshot_columns if outputs.snapshot_columns else ""
+        snapshot_path = os.path.join(
+            outputs.directory, f"{entry.dataset.name()}_snapshot.root"
+        )
+        snapshot = encode_columns(events, outputs.snapshot_precision).Snapshot(
+            config.tree, snapshot_path, columns, options
+        )
+    return DatasetGraph(
+        entry,
+        chain,
+        events,
+        histograms,
+        snapshot,
+        events.Report(),
+        progress,
+        sample,
+        snapshot_path,
+        outputs.snapshot_precision,
+    )
+
+
+def run_datasets(
+    config: PipelineConfig,
+    names: list[str] | None = None,
+    threads: int | None = None,
+    progress_interval: float | None = 10.0,
+    preview: float | None = None,
+) -> list[dict[str, Any]]:
+    """Build the graphs of the selected (by default all) datasets and run them concurrently in one event loop per
+    dataset with ROOT.RDF.RunGraphs, using threads threads (0 for all cores, 1 for sequential processing).
+    preview, a fraction, only processes that fraction of each dataset's clusters. With staging configured, every
+    dataset's files are copied to the local cache in the background while the graphs are booked.
+    """
+    import ROOT
+
+    threads = config.threads if threads is None else threads
+    if threads != 1:
+        ROOT.EnableImplicitMT(threads)
+    entries = [
+        entry
+        for entry in config.datasets
+        if names is None or entry.dataset.name() in names
+    ]
+    staging = None
+    # entry lists are keyed by the source files, and previews read too little of each file to stage it
+    if config.staging is not None and preview is None and config.entry_lists is None:
+        staging = StagingCache(
+            config.staging["directory"],
+            int(config.staging["budget_gb"] * 1e9),
+            int(config.staging.get("workers", 2)),
+        )
+        staging.prefetch([f for entry in entries for f in entry.dataset.files()])
+    try:
+        graphs = [
+            build_graph(entry, config, progress_interval, preview, staging)
+            for entry in entries
+        ]
+        ROOT.RDF.RunGraphs([result for graph in graphs for result in graph.results()])
+        return [graph.write(config.outputs.directory) for graph in graphs]
+    finally:
+        if staging is not None:
+            staging.close()
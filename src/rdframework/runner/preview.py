@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import hashlib
+import math
+from typing import Any, NamedTuple
+
+
+class PreviewSample(NamedTuple):
+    """The clusters sampled from a dataset for a preview: the [first, last) entry ranges read per file, and the
+    sampled and total numbers of entries"""
+
+    ranges: dict[str, list[tuple[int, int]]]
+    sampled_entries: int
+    total_entries: int
+
+    def fraction(self) -> float:
+        return self.sampled_entries / self.total_entries if self.total_entries else 0.0
+
+
+def cluster_ranges(path: str, tree: str = "Events") -> list[tuple[int, int]]:
+    """The [first, last) entry ranges of the clusters of a file's tree, read from its metadata only"""
+    import ROOT
+
+    infile = ROOT.TFile.Open(path)
+    if not infile or infile.IsZombie():
+        raise OSError(f"Could not open {path}")
+    events = infile.Get(tree)
+    if not events:
+        raise KeyError(f"{path} has no {tree} tree")
+    nentries = int(events.GetEntries())
+    clusters = events.GetClusterIterator(0)
+    ranges = []
+    start = int(clusters())
+    while start < nentries:
+        end = min(int(clusters.GetNextEntry()), nentries)
+        ranges.append((start, end))
+        start = int(clusters())
+    infile.Close()
+    return ranges
+
+
+def _offset(seed: str) -> float:
+    return int(hashlib.sha1(seed.encode()).hexdigest()[:8], 16) / 16**8
+
+
+def sample_clusters(
+    clusters: dict[str, list[tuple[int, int]]], fraction: float, seed: str = ""
+) -> PreviewSample:
+    """Systematically sample a fraction of the clusters of all files: taken in file order, every 1/fraction-th
+    cluster is kept, starting from an offset derived from seed. The sample is thus deterministic and spread
+    evenly over every file (and over time, for data), and holds at least one cluster."""
+    if not 0 < fraction <= 1:
+        raise ValueError(f"fraction must be in (0, 1], got {fraction}")
+    offset = _offset(seed)
+    ranges: dict[str, list[tuple[int, int]]] = {}
+    sampled = total = 0
+    position = 0
+    for path, file_clusters in clusters.items():
+        for first, last in file_clusters:
+            # keep the cluster if a multiple of 1/fraction falls in [position, position + 1)
+            if math.floor((position + 1) * fraction + offset) > math.floor(
+                position * fraction + offset
+            ):
+                ranges.setdefault(path, []).append((first, last))
+                sampled += last - first
+            position += 1
+            total += last - first
+    if not ranges and position > 0:
+        path = next(p for p, c in clusters.items() if c)
+        ranges[path] = [clusters[path][0]]
+        sampled = clusters[path][0][1] - clusters[path][0][0]
+    return PreviewSample(ranges, sampled, total)
+
+
+def preview_sample(
+    files: list[str], fraction: float, tree: str = "Events", seed: str = ""
+) -> PreviewSample:
+    return sample_clusters({f: cluster_ranges(f, tree) for f in files}, fraction, seed)
+
+
+def preview_chain(sample: PreviewSample, tree: str = "Events") -> Any:
+    """A TChain reading only the sampled clusters, through an entry list rather than Range, so it also runs
+    with ImplicitMT"""
+    from rdframework.io.entrylist import chain_with_entry_list, range_entry_list
+
+    return chain_with_entry_list(
+        tree, list(sample.ranges), range_entry_list(tree, sample.ranges)
+    )
+
+
+def extrapolated_count(count: float, fraction: float) -> tuple[float, float]:
+    """Estimate and sampling uncertainty of a full-dataset count from the count of the sampled fraction,
+    count / fraction +- sqrt(count * (1 - fraction)) / fraction"""
+    return (
+        count / fraction,
+        math.sqrt(max(count, 0.0) * (1.0 - fraction)) / fraction,
+    )
+
+
+def extrapolate_cutflow(
+    cutflow: dict[str, float], fraction: float
+) -> dict[str, tuple[float, float]]:
+    return {
+        name: extrapolated_count(count, fraction) for name, count in cutflow.items()
+    }
+
+
+def extrapolate_histogram(hist: Any, fraction: float) -> Any:
+    """Scale a sampled histogram in place to the full dataset. Bin errors become the sampling uncertainty of the
+    extrapolated content, sqrt((1 - fraction) * sumw2) / fraction, treating the sampled events as independent."""
+    if hist.GetSumw2N() == 0:
+        hist.Sumw2()
+    hist.Scale(1.0 / fraction)
+    correction = math.sqrt(1.0 - fraction)
+    for i in range(hist.GetNcells()):
+        hist.SetBinError(i, hist.GetBinError(i) * correction)
+    return hist
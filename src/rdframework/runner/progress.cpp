@@ -0,0 +1,103 @@
+#include <RtypesCore.h>
+
+#include <atomic>
+#include <chrono>
+#include <cstddef>
+#include <cstdio>
+#include <string>
+#include <vector>
+
+namespace rdfw {
+
+// Counts processed entries per slot and, at most every `interval` seconds, prints the events/s, MB/s (of input
+// file size, assuming it is spread evenly over the entries) and ETA from whichever slot notices the interval has
+// passed. Slots only write their own cache-line aligned counter; the clock is read once every 1024 entries of a
+// slot. The rate is measured from the first processed entry, so it excludes the jitting before the event loop.
+class ProgressMonitor {
+public:
+  ProgressMonitor(const std::string& label, ULong64_t total_entries, double total_bytes, std::size_t nslots,
+                  double interval)
+    : fLabel(label), fTotalEntries(total_entries), fTotalBytes(total_bytes), fInterval(Seconds(interval)),
+      fSlots(nslots > 0 ? nslots : 1)
+  {
+    fLastPrint = Now();
+  }
+
+  bool Tick(unsigned int slot)
+  {
+    const ULong64_t n = fSlots[slot].entries.fetch_add(1, std::memory_order_relaxed) + 1;
+    if (n == 1) {
+      Long64_t expected = 0;
+      fStart.compare_exchange_strong(expected, Now());
+    }
+    if ((n & 1023) == 0) MaybePrint();
+    return true;
+  }
+
+  ULong64_t Processed() const
+  {
+    ULong64_t total = 0;
+    for (const auto& s : fSlots) total += s.entries.load(std::memory_order_relaxed);
+    return total;
+  }
+
+  // Seconds since the first processed entry
+  double Elapsed() const
+  {
+    const Long64_t start = fStart.load();
+    return start == 0 ? 0. : (Now() - start) * 1e-9;
+  }
+
+  void Finish() { Print(true); }
+
+private:
+  static Long64_t Now()
+  {
+    return std::chrono::duration_cast<std::chrono::nanoseconds>(std::chrono::steady_clock::now().time_since_epoch())
+      .count();
+  }
+  static Long64_t Seconds(double s) { return static_cast<Long64_t>(s * 1e9); }
+
+  void MaybePrint()
+  {
+    const Long64_t now = Now();
+    Long64_t last = fLastPrint.load(std::memory_order_relaxed);
+    if (now - last < fInterval) return;
+    // only one slot prints per interval
+    if (!fLastPrint.compare_exchange_strong(last, now)) return;
+    Print(false);
+  }
+
+  void Print(bool final) const
+  {
+    const ULong64_t processed = Processed();
+    const double elapsed = Elapsed();
+    const double rate = elapsed > 0 ? processed / elapsed : 0.;
+    char mbps[32] = "";
+    if (fTotalBytes > 0 && fTotalEntries > 0 && elapsed > 0)
+      std::snprintf(mbps, sizeof(mbps), ", %.1f MB/s", processed * (fTotalBytes / fTotalEntries) / elapsed / 1e6);
+    char eta[32] = "";
+    if (!final && fTotalEntries > processed && rate > 0) {
+      const auto remaining = static_cast<long long>((fTotalEntries - processed) / rate);
+      std::snprintf(eta, sizeof(eta), ", ETA %lld:%02lld:%02lld", remaining / 3600, (remaining / 60) % 60,
+                    remaining % 60);
+    }
+    std::fprintf(stderr, "[%s] %s%llu/%llu events in %.1f s, %.0f events/s%s%s\n", fLabel.c_str(),
+                 final ? "done, " : "", static_cast<unsigned long long>(processed),
+                 static_cast<unsigned long long>(fTotalEntries), elapsed, rate, mbps, eta);
+  }
+
+  struct alignas(64) Slot {
+    std::atomic<ULong64_t> entries{0};
+  };
+
+  std::string fLabel;
+  ULong64_t fTotalEntries;
+  double fTotalBytes;
+  Long64_t fInterval;
+  std::vector<Slot> fSlots;
+  std::atomic<Long64_t> fStart{0};
+  std::atomic<Long64_t> fLastPrint{0};
+};
+
+} // namespace rdfw
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Any
+
+from rdframework.utils import cpp_reference, declare_cpp
+
+
+def local_file_bytes(files: list[str]) -> float:
+    """Total size of the local input files, remote files (e.g. root://) are not counted"""
+    return float(
+        sum(os.path.getsize(f) for f in files if "://" not in f and os.path.exists(f))
+    )
+
+
+class Progress:
+    """Live events/s, MB/s and ETA printing for one event loop. The monitor prints from inside the event loop
+    (to stderr), so it also reports while the python thread is blocked waiting for the results."""
+
+    def __init__(
+        self,
+        label: str,
+        nslots: int,
+        total_entries: int = 0,
+        total_bytes: float = 0.0,
+        interval: float = 10.0,
+    ):
+        ROOT = declare_cpp(
+            Path(__file__).parent / "progress.cpp", "rdfw::ProgressMonitor"
+        )
+        self._monitor = ROOT.rdfw.ProgressMonitor(
+            label, total_entries, total_bytes, nslots, interval
+        )
+        self._total_bytes = total_bytes
+        self._total_entries = total_entries
+
+    def attach(self, events: Any) -> Any:
+        ref = cpp_reference(self._monitor, "rdfw::ProgressMonitor")
+        return events.Filter(f"return {ref}.Tick(rdfslot_);")
+
+    def processed(self) -> int:
+        return int(self._monitor.Processed())
+
+    def elapsed(self) -> float:
+        return float(self._monitor.Elapsed())
+
+    def finish(self) -> dict[str, float]:
+        """Print the final line and return the throughput of the event loop"""
+        self._monitor.Finish()
+        processed = self.processed()
+        elapsed = self.elapsed()
+        throughput = {
+            "events": float(processed),
+            "seconds": elapsed,
+            "events_per_second": processed / elapsed if elapsed > 0 else 0.0,
+        }
+        if self._total_bytes > 0 and self._total_entries > 0:
+            throughput["MB_per_second"] = (
+                throughput["events_per_second"]
+                * self._total_bytes
+                / self._total_entries
+                / 1e6
+            )
+        return throughput
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+
+
+def declare_cpp(source: Path | str, symbol: str) -> Any:
+    """Load a C++ source file into the ROOT interpreter, unless symbol (e.g. 'rdfw::BuildFillPlan') is already known,
+    and return the ROOT module. ROOT is imported here so modules can be imported (and partially used) without it
+    """
+    import ROOT
+
+    scope = ROOT
+    for part in symbol.split("::"):
+        if not hasattr(scope, part):
+            ROOT.gROOT.ProcessLine(f".L {source}")
+            break
+        scope = getattr(scope, part)
+    return ROOT
+
+
+def cpp_reference(obj: Any, cpp_type: str) -> str:
+    """Return a C++ expression referring to an object created from python, for use in jitted Define/Filter strings.
+    The python object must be kept alive for as long as the event loop may run"""
+    import ROOT
+
+    return f"(*reinterpret_cast<{cpp_type}*>({ROOT.addressof(obj)}))"
+
+
+def is_columnar(events: Any) -> bool:
+    """True for rdframework.columnar.ColumnarEvents, which the helpers evaluate with NumPy instead of RDataFrame"""
+    return getattr(events, "rdframework_backend", None) == "columnar"
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import pytest
+
+from rdframework.io.arrow_writer import column_layout
+
+
+def test_column_layout():
+    assert column_layout("Float_t") == ("float32", False)
+    assert column_layout("ROOT::VecOps::RVec<int>") == ("int32", True)
+    assert column_layout("ROOT::RVec<unsigned char>") == ("uint8", True)
+    assert column_layout("RVec<Bool_t>") == ("bool", True)
+    with pytest.raises(TypeError):
+        column_layout("std::string")
+
+
+def test_write_parquet(tmp_path):
+    ROOT = pytest.importorskip("ROOT")
+    pq = pytest.importorskip("pyarrow.parquet")
+    from rdframework.io.arrow_writer import write_arrow
+
+    events = ROOT.RDataFrame(1000).Define("x", "float(rdfentry_)")
+    events = events.Define("v", "ROOT::VecOps::RVec<int>(rdfentry_ % 3, 7)")
+    events = events.Filter("rdfentry_ % 2 == 0")
+    files = write_arrow(events, str(tmp_path), ["x", "v"], rows_per_group=64)
+    table = pq.read_table(files[0]) if len(files) == 1 else pq.read_table(str(tmp_path))
+    assert table.num_rows == 500
+    assert sorted(table.column("x").to_pylist())[:2] == [0.0, 2.0]
+    assert sum(len(v) for v in table.column("v").to_pylist()) == 500
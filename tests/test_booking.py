@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import pytest
+
+from rdframework.histograms.booking import (
+    BookedHistograms,
+    HistogramVariable,
+    _fill_plan_expression,
+    book_histograms,
+)
+from rdframework.histograms.weights import WeightSet
+
+
+def test_fill_plan_expression():
+    expr = _fill_plan_expression(
+        ["channel_ee_OS", "channel_mumu_OS"], {"nominal": "w", "puUp": "w * 1.1"}
+    )
+    assert (
+        "static_cast<bool>(channel_ee_OS), static_cast<bool>(channel_mumu_OS)" in expr
+    )
+    assert "static_cast<double>(w), static_cast<double>(w * 1.1)" in expr
+
+
+def test_category_bins_and_names():
+    booked = BookedHistograms(
+        [HistogramVariable("HT", "HT", 10, 0.0, 1000.0)],
+        ["channel_ee_OS", "channel_emu_OS", "channel_mumu_OS"],
+        ["nominal", "puUp", "puDown"],
+        {},
+        "{channel}__{variable}__{systematic}",
+    )
+    assert booked.category_bin("channel_ee_OS", "nominal") == 1
+    assert booked.category_bin("channel_ee_OS", "puDown") == 3
+    assert booked.category_bin("channel_mumu_OS", "puUp") == 8
+    assert (
+        booked.histogram_name("HT", "channel_emu_OS", "puUp")
+        == "channel_emu_OS__HT__puUp"
+    )
+
+
+def test_weight_set():
+    weights = (
+        WeightSet("genWeight * puWeight")
+        .add_up_down("pu", "genWeight * puWeightUp", "genWeight * puWeightDown")
+        .add_vector("pdf", "LHEPdfWeight", 3)
+    )
+    assert weights.names() == [
+        "nominal",
+        "puUp",
+        "puDown",
+        "pdf_0",
+        "pdf_1",
+        "pdf_2",
+    ]
+    assert weights.index("pdf_1") == 4
+    expr = weights.expression()
+    assert "RVec<double> rdfw_weights(6)" in expr
+    assert "rdfw_weights[2] = static_cast<double>(genWeight * puWeightDown)" in expr
+    assert "rdfw_weights[3 + i]" in expr
+    with pytest.raises(ValueError):
+        weights.add("puUp", "1.0")
+    assert _fill_plan_expression(["channel_ee_OS"], "hb_weights").endswith(
+        "RVec<bool>{static_cast<bool>(channel_ee_OS)}, hb_weights);"
+    )
+
+
+class _VariedResults(dict):
+    def GetKeys(self) -> list[str]:
+        return list(self)
+
+
+def test_column_variations():
+    keys = ["nominal", "electronScale:up", "electronScale:down"]
+    booked = BookedHistograms(
+        [HistogramVariable("HT", "HT", 10, 0.0, 1000.0)],
+        ["channel_ee_OS"],
+        ["nominal", "puUp"],
+        {},
+        "{channel}__{variable}__{systematic}",
+        {"HT": _VariedResults.fromkeys(keys)},
+    )
+    assert booked.column_variations() == ["electronScaleUp", "electronScaleDown"]
+    assert booked.systematics() == ["nominal", "puUp"]
+
+
+CHANNELS = ["channel_ee_OS", "channel_mumu_OS"]
+
+
+def test_book_histograms():
+    ROOT = pytest.importorskip("ROOT")
+    events = (
+        ROOT.RDataFrame(200)
+        .Define("x", "(rdfentry_ % 10) * 10.0 + 5.0")
+        .Define("channel_ee_OS", "rdfentry_ % 2 == 0")
+        .Define("channel_mumu_OS", "rdfentry_ % 3 == 0")
+        .Define("w", "1.0 + rdfentry_ % 4")
+        .Define("w_up", "1.5 * w")
+        # every fifth event has a single pdf weight, the nominal one is used for the other two
+        .Define(
+            "pdf",
+            "rdfentry_ % 5 ? ROOT::VecOps::RVec<float>{0.5f, 2.f, 3.f}"
+            " : ROOT::VecOps::RVec<float>{0.5f}",
+        )
+    )
+    variables = [HistogramVariable("x", "x", 10, 0.0, 100.0)]
+    weights = {"nominal": "w", "puUp": "w_up"}
+    events, booked = book_histograms(events, variables, list(CHANNELS), weights)
+    weight_set = (
+        WeightSet("w").add("puUp", "w_up").add_vector("pdf", "pdf", 3, relative=True)
+    )
+    events, booked_set = book_histograms(
+        events, variables, list(CHANNELS), weight_set, prefix="ws_"
+    )
+    expected = {
+        "nominal": "w",
+        "puUp": "w_up",
+        "pdf_0": "w * pdf[0]",
+        "pdf_1": "pdf.size() > 1 ? w * pdf[1] : w",
+        "pdf_2": "pdf.size() > 2 ? w * pdf[2] : w",
+    }
+    set_sums = {
+        (channel, name): events.Filter(channel)
+        .Define("expected_weight", f"return double({weight});")
+        .Sum("expected_weight")
+        for channel in CHANNELS
+        for name, weight in expected.items()
+    }
+    sums = {
+        (channel, systematic): (
+            events.Filter(channel).Sum(weight),
+            events.Filter(channel).Define("w2", f"{weight} * {weight}").Sum("w2"),
+            events.Filter(f"{channel} && x < 10").Sum(weight),
+        )
+        for channel in CHANNELS
+        for systematic, weight in weights.items()
+    }
+    for (channel, systematic), (sumw, sumw2, first_bin) in sums.items():
+        hist = booked.histogram("x", channel, systematic)
+        assert hist.GetName() == f"{channel}__x__{systematic}"
+        assert hist.Integral() == pytest.approx(sumw.GetValue())
+        assert hist.GetBinContent(1) == pytest.approx(first_bin.GetValue())
+        errors = sum(hist.GetBinError(i) ** 2 for i in range(1, 11))
+        assert errors == pytest.approx(sumw2.GetValue())
+    assert booked_set.systematics() == list(expected)
+    for (channel, name), sumw in set_sums.items():
+        hist = booked_set.histogram("x", channel, name)
+        assert hist.Integral() == pytest.approx(sumw.GetValue()), name
+    # the histograms and the sums booked alongside them filled in one event loop
+    assert events.GetNRuns() == 1
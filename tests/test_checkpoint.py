@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import pytest
+
+from rdframework.io.checkpoint import (
+    CheckpointStore,
+    UnitResult,
+    file_units,
+    run_checkpointed,
+    unit_id,
+)
+from rdframework.io.dataset import SimpleDataset
+from rdframework.io.staging import StagingCache
+
+
+def test_file_units():
+    files = [f"f{i}.root" for i in range(5)]
+    assert file_units(files, 2) == [
+        ["f0.root", "f1.root"],
+        ["f2.root", "f3.root"],
+        ["f4.root"],
+    ]
+    assert unit_id(0, files[:2]) == unit_id(0, files[:2])
+    assert unit_id(0, files[:2]) != unit_id(0, files[1:3])
+    with pytest.raises(ValueError):
+        file_units(files, 0)
+
+
+def test_resume(tmp_path):
+    dataset = SimpleDataset(
+        "ttbar", 1.0, True, 1.0, "ttbar", [f"f{i}.root" for i in range(5)], False, None
+    )
+    processed = []
+
+    def interrupted(files: list[str], snapshot_path: str) -> UnitResult:
+        if files[0] == "f2.root":
+            raise RuntimeError("preempted")
+        processed.append(files)
+        return UnitResult({}, {"(all)": 10 * len(files), "pass": len(files)})
+
+    with pytest.raises(RuntimeError):
+        run_checkpointed(dataset, interrupted, str(tmp_path), files_per_unit=2)
+    assert processed == [["f0.root", "f1.root"]]
+
+    def resumed(files: list[str], snapshot_path: str) -> UnitResult:
+        processed.append(files)
+        return UnitResult({}, {"(all)": 10 * len(files), "pass": len(files)})
+
+    merged = run_checkpointed(dataset, resumed, str(tmp_path), files_per_unit=2)
+    assert processed[1:] == [["f2.root", "f3.root"], ["f4.root"]]
+    assert merged.cutflow == {"(all)": 50, "pass": 5}
+    assert merged.snapshots == []
+
+    store = CheckpointStore(str(tmp_path), "ttbar")
+    assert len(store.completed_units()) == 3
+    assert list(tmp_path.glob("ttbar/*.tmp")) == []
+
+
+def test_staged_units(tmp_path):
+    remote = tmp_path / "remote"
+    remote.mkdir()
+    files = []
+    for i in range(3):
+        (remote / f"f{i}.root").write_bytes(b"x" * 100)
+        files.append(str(remote / f"f{i}.root"))
+    dataset = SimpleDataset("ttbar", 1.0, True, 1.0, "ttbar", files, False, None)
+    read = []
+
+    def process(files: list[str], snapshot_path: str) -> UnitResult:
+        read.extend(files)
+        return UnitResult({}, {"(all)": len(files)})
+
+    with StagingCache(str(tmp_path / "cache"), budget=1000) as staging:
+        merged = run_checkpointed(dataset, process, str(tmp_path / "units"), 2, staging)
+    assert merged.cutflow == {"(all)": 3}
+    assert all(path.startswith(str(tmp_path / "cache")) for path in read)
+    # the manifests record the source files
+    manifests = CheckpointStore(str(tmp_path / "units"), "ttbar")
+    assert manifests.load_manifest(manifests.completed_units()[0])["files"][0] in files
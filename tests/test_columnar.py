@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from rdframework.columnar.events import ColumnarEvents, JaggedArray  # noqa: E402
+from rdframework.filters.categorization import (  # noqa: E402
+    lepton_channel_categorization,
+)
+from rdframework.filters.cuts import MET_filter_flags, PV_MET_filter  # noqa: E402
+from rdframework.objects.jets import select_jets  # noqa: E402
+from rdframework.objects.leptons import (  # noqa: E402
+    select_electrons_cutBased,
+    select_muons_cutBased,
+)
+
+
+def test_jagged_array():
+    arr = JaggedArray.from_lists([[1, 2], [], [3]])
+    assert arr.content.dtype.kind == "i"
+    assert arr.counts().tolist() == [2, 0, 1]
+    assert arr.local_index().tolist() == [0, 1, 0]
+    assert arr.sum().tolist() == [3, 0, 3]
+    assert arr.at(1, -1).tolist() == [2, -1, -1]
+    assert arr.filter_elements([True, False, True]).tolist() == [[1], [], [3]]
+    assert arr.filter_events([False, True, True]).tolist() == [[], [3]]
+    with pytest.raises(ValueError):
+        JaggedArray([1, 2], [0, 1])
+
+
+def test_columnar_events():
+    events = ColumnarEvents(
+        {"x": np.array([1.0, 2.0, 3.0]), "y": JaggedArray.from_lists([[1], [], [2]])}
+    )
+    assert events.Count() == 3
+    events = events.Define("z", events["x"] * 2)
+    with pytest.raises(ValueError):
+        events.Define("z", events["x"])
+    filtered = events.Filter(events["x"] > 1.5)
+    assert filtered["z"].tolist() == [4.0, 6.0]
+    assert filtered["y"].tolist() == [[], [2]]
+    assert len(events) == 3
+
+
+def _jets_and_muons() -> ColumnarEvents:
+    return ColumnarEvents(
+        {
+            "Jet_pt": JaggedArray.from_lists([[40.0, 80.0, 25.0, 15.0], [60.0]]),
+            "Jet_eta": JaggedArray.from_lists([[0.1, -1.0, 2.0, 0.0], [3.0]]),
+            "Jet_phi": JaggedArray.from_lists([[0.0, 1.0, 2.0, 3.0], [0.0]]),
+            "Jet_jetId": JaggedArray.from_lists([[6, 6, 0, 6], [6]]),
+            "Muon_pt": JaggedArray.from_lists([[30.0, 5.0], []]),
+            "Muon_eta": JaggedArray.from_lists([[0.1, 0.5], []]),
+            "Muon_phi": JaggedArray.from_lists([[0.0, 2.0], []]),
+            "Muon_ip3d": JaggedArray.from_lists([[0.01, 0.01], []]),
+            "Muon_dz": JaggedArray.from_lists([[0.01, 0.01], []]),
+            "Muon_pfIsoId": JaggedArray.from_lists([[4, 4], []]),
+            "Muon_mediumId": JaggedArray.from_lists([[True, True], []]),
+            "Muon_charge": JaggedArray.from_lists([[-1, 1], []]),
+            "Muon_jetIdx": JaggedArray.from_lists([[0, -1], []]),
+        }
+    )
+
+
+def test_select_jets_columnar():
+    events = _jets_and_muons()
+    events = select_muons_cutBased(
+        events, "Muon", "iso_muon", None, "medium", "tight", min_pt=10.0
+    )
+    assert events["niso_muon"].tolist() == [1, 0]
+    assert events["iso_muon_idx"].tolist() == [[0], []]
+
+    pf = select_jets(
+        events, "Jet", "pf_jet", None, ["iso_muon"], "PFMatching", 20.0, 2.4, "tight"
+    )
+    # the first jet is matched to the muon, the third fails the jet ID, the fourth the pt cut
+    assert pf["npf_jet"].tolist() == [1, 0]
+    assert pf["pf_jet_idx"].tolist() == [[1], []]
+
+    dr = select_jets(
+        events, "Jet", "dr_jet", None, ["iso_muon"], 0.4, 20.0, 2.4, "loose"
+    )
+    assert dr["dr_jet_pt"].tolist() == [[80.0], []]
+    assert dr["dr_jet_idx"].tolist() == [[1], []]
+
+    ascending = select_jets(
+        events,
+        "Jet",
+        "asc_jet",
+        None,
+        None,
+        0.4,
+        10.0,
+        2.4,
+        "loose",
+        sort_ascending=True,
+    )
+    assert ascending["asc_jet_pt"].tolist() == [[15.0, 40.0, 80.0], []]
+    assert ascending["asc_jet_jettake"].tolist() == [[2, 0, 1], []]
+
+
+def test_lepton_channel_categorization_columnar():
+    events = ColumnarEvents(
+        {
+            "niso_e": np.array([0, 1, 2]),
+            "iso_e_charge": JaggedArray.from_lists([[], [1], [1, 1]]),
+            "niso_mu": np.array([2, 1, 0]),
+            "iso_mu_charge": JaggedArray.from_lists([[1, -1], [1], []]),
+        }
+    )
+    events = lepton_channel_categorization(events, "iso_mu", "iso_e", "2018", True)
+    assert events["channel_mumu_OS"].tolist() == [True, False, False]
+    assert events["channel_emu_SS"].tolist() == [False, True, False]
+    assert events["channel_ee_SS"].tolist() == [False, False, True]
+    assert events["sum_charge_iso_lep"].tolist() == [0, 2, 2]
+
+
+# reproducible per-event random collections for the parity test, each column seeded from the entry and its name
+_RANDOM_COLUMNS = """
+#ifndef RDFW_TEST_RANDOM
+#define RDFW_TEST_RANDOM
+template <typename T>
+ROOT::VecOps::RVec<T> rdfw_test_random(ULong64_t entry, int column, unsigned int n, double low, double high)
+{
+  TRandom3 r(entry * 100 + column + 1);
+  ROOT::VecOps::RVec<T> values(n);
+  for (auto& x : values) x = std::is_integral<T>::value ? T(std::floor(r.Uniform(low, high + 1))) : T(r.Uniform(low, high));
+  return values;
+}
+#endif
+"""
+
+
+def _random_events(ROOT, nevents: int) -> tuple[object, list[str]]:
+    ROOT.gInterpreter.Declare(_RANDOM_COLUMNS)
+    columns = {
+        "PV_ndof": ("float", "", 0, 10),
+        "PV_z": ("float", "", -30, 30),
+        "PV_x": ("float", "", -1, 1),
+        "PV_y": ("float", "", -1, 1),
+        "Jet_pt": ("float", "nJet", 10, 100),
+        "Jet_eta": ("float", "nJet", -3, 3),
+        "Jet_phi": ("float", "nJet", -3.14, 3.14),
+        "Jet_jetId": ("int", "nJet", 0, 6),
+    }
+    for lepton in ["Muon", "Electron"]:
+        columns.update(
+            {
+                f"{lepton}_pt": ("float", f"n{lepton}", 5, 60),
+                f"{lepton}_eta": ("float", f"n{lepton}", -2.6, 2.6),
+                f"{lepton}_phi": ("float", f"n{lepton}", -3.14, 3.14),
+                f"{lepton}_ip3d": ("float", f"n{lepton}", 0, 0.12),
+                f"{lepton}_dz": ("float", f"n{lepton}", -0.25, 0.25),
+                f"{lepton}_charge": ("int", f"n{lepton}", -1, 0),
+                f"{lepton}_jetIdx": ("int", f"n{lepton}", -1, 3),
+            }
+        )
+    columns.update(
+        {
+            "Muon_pfIsoId": ("int", "nMuon", 0, 6),
+            "Muon_mediumId": ("bool", "nMuon", 0, 1),
+            "Electron_cutBased": ("int", "nElectron", 0, 4),
+        }
+    )
+    events = (
+        ROOT.RDataFrame(nevents)
+        .Define("nJet", "UInt_t(TRandom3(rdfentry_ + 1).Integer(7))")
+        .Define("nMuon", "UInt_t(TRandom3(rdfentry_ + 2).Integer(4))")
+        .Define("nElectron", "UInt_t(TRandom3(rdfentry_ + 3).Integer(4))")
+    )
+    for i, (name, (kind, size, low, high)) in enumerate(columns.items()):
+        values = f"rdfw_test_random<{'int' if kind != 'float' else 'float'}>(rdfentry_, {i}, {size or 1}, {low}, {high})"
+        if name.endswith("_charge"):
+            values = f"2 * {values} + 1"
+        if kind == "bool":
+            values = f"auto v = {values}; return ROOT::VecOps::RVec<bool>(v.begin(), v.end());"
+        events = events.Define(name, f"{values}[0]" if not size else values)
+    for i, flag in enumerate(MET_filter_flags("2018", True)):
+        events = events.Define(
+            flag, f"TRandom3(rdfentry_ * 100 + {50 + i}).Uniform() > 0.02"
+        )
+    return events, [str(col) for col in events.GetDefinedColumnNames()]
+
+
+def _select_and_categorize(events):
+    events = PV_MET_filter(events, "2018", True)
+    events = select_muons_cutBased(
+        events, "Muon", "iso_muon", None, "medium", "tight", min_pt=10.0
+    )
+    events = select_electrons_cutBased(events, "Electron", "iso_e", None, "tight", 15.0)
+    events = select_jets(
+        events,
+        "Jet",
+        "pf_jet",
+        None,
+        ["iso_muon", "iso_e"],
+        "PFMatching",
+        25.0,
+        2.4,
+        "tight",
+    )
+    events = select_jets(
+        events, "Jet", "dr_jet", None, ["iso_muon", "iso_e"], 0.4, 25.0, 2.4, "tight"
+    )
+    return lepton_channel_categorization(events, "iso_muon", "iso_e", "2018", True)
+
+
+def test_columnar_matches_rdataframe():
+    ROOT = pytest.importorskip("ROOT")
+    events, inputs = _random_events(ROOT, 500)
+    rdf = _select_and_categorize(events)
+    columnar = _select_and_categorize(ColumnarEvents.from_rdataframe(events, inputs))
+    outputs = [
+        f"{prefix}{column}"
+        for prefix in ["iso_muon_", "iso_e_", "pf_jet_", "dr_jet_"]
+        for column in ["pt", "eta", "idx"]
+    ]
+    outputs += ["niso_muon", "niso_e", "npf_jet", "ndr_jet", "sum_charge_iso_lep"]
+    outputs += [
+        str(col)
+        for col in rdf.GetDefinedColumnNames()
+        if str(col).startswith("channel_")
+    ]
+    expected = rdf.AsNumpy(outputs)
+    assert 0 < len(columnar) < 500 and len(expected["niso_muon"]) == len(columnar)
+    for name in outputs:
+        values = columnar[name]
+        if isinstance(values, JaggedArray):
+            assert [len(v) for v in expected[name]] == values.counts().tolist(), name
+            flat = [x for v in expected[name] for x in v]
+            assert flat == pytest.approx([x for v in values.tolist() for x in v]), name
+        else:
+            assert expected[name].tolist() == values.tolist(), name
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import itertools
+import math
+
+import pytest
+
+ROOT = pytest.importorskip("ROOT")
+
+from rdframework.objects.combinatorics import (  # noqa: E402
+    best_mass_pair,
+    best_mass_triplet,
+    define_indices,
+    define_pairs,
+    define_triplets,
+    min_delta_r_pair,
+)
+
+
+def _mass(objects):
+    e = px = py = pz = 0.0
+    for pt, eta, phi, m in objects:
+        px += pt * math.cos(phi)
+        py += pt * math.sin(phi)
+        pz += pt * math.sinh(eta)
+        e += math.sqrt((pt * math.cosh(eta)) ** 2 + m**2)
+    return math.sqrt(max(e**2 - px**2 - py**2 - pz**2, 0.0))
+
+
+def test_kernels():
+    events = (
+        ROOT.RDataFrame(20)
+        .Define("nJet", "int(rdfentry_ % 6)")
+        .Define(
+            "Jet_pt",
+            "ROOT::VecOps::RVec<float> v(nJet); for (auto i = 0; i < nJet; ++i) v[i] = 30.f + 17.f * ((i * 7 + rdfentry_) % 5); return v;",
+        )
+        .Define(
+            "Jet_eta",
+            "ROOT::VecOps::RVec<float> v(nJet); for (auto i = 0; i < nJet; ++i) v[i] = -2.f + 0.7f * ((i * 3 + rdfentry_) % 6); return v;",
+        )
+        .Define(
+            "Jet_phi",
+            "ROOT::VecOps::RVec<float> v(nJet); for (auto i = 0; i < nJet; ++i) v[i] = -3.f + 1.1f * ((i * 5 + rdfentry_) % 6); return v;",
+        )
+        .Define("Jet_mass", "ROOT::VecOps::RVec<float> v(nJet, 5.f); return v;")
+    )
+    events = define_indices(events, "Jet_", "Jet_pt")
+    events = define_pairs(events, "Jet_", "Jet_pairs")
+    events = define_triplets(events, "Jet_", "Jet_triplets")
+    events = events.Define("Jet_combinations2", "Combinations(Jet_pt, 2)")
+    events = best_mass_pair(events, "Jet_", "Dijet_", 91.0)
+    events = best_mass_triplet(events, "Jet_", "Top_", 172.5)
+    events = min_delta_r_pair(events, "Jet_", "Closest_")
+    columns = [
+        "Jet_pt",
+        "Jet_eta",
+        "Jet_phi",
+        "Jet_mass",
+        "Jet_idx",
+        "Jet_pairs",
+        "Jet_triplets",
+        "Jet_combinations2",
+        "Dijet_idx",
+        "Dijet_mass",
+        "Top_idx",
+        "Top_mass",
+        "Closest_idx",
+        "Closest_dR",
+    ]
+    data = events.AsNumpy(columns)
+    for ev in range(20):
+        jets = list(
+            zip(*(list(data[f"Jet_{f}"][ev]) for f in ["pt", "eta", "phi", "mass"]))
+        )
+        n = len(jets)
+        assert list(data["Jet_idx"][ev]) == list(range(n))
+        pairs = [list(v) for v in data["Jet_pairs"][ev]]
+        assert pairs == [list(v) for v in data["Jet_combinations2"][ev]]
+        assert len(data["Jet_triplets"][ev][0]) == n * (n - 1) * (n - 2) // 6
+
+        if n < 2:
+            assert len(data["Dijet_idx"][ev]) == 0
+            assert data["Closest_dR"][ev] == -1
+            continue
+        best = min(
+            itertools.combinations(range(n), 2),
+            key=lambda c: abs(_mass([jets[i] for i in c]) - 91.0),
+        )
+        assert tuple(data["Dijet_idx"][ev]) == best
+        assert data["Dijet_mass"][ev] == pytest.approx(_mass([jets[i] for i in best]))
+        closest = min(
+            itertools.combinations(range(n), 2),
+            key=lambda c: ROOT.VecOps.DeltaR(
+                jets[c[0]][1], jets[c[1]][1], jets[c[0]][2], jets[c[1]][2]
+            ),
+        )
+        assert tuple(data["Closest_idx"][ev]) == closest
+        if n >= 3:
+            best = min(
+                itertools.combinations(range(n), 3),
+                key=lambda c: abs(_mass([jets[i] for i in c]) - 172.5),
+            )
+            assert tuple(data["Top_idx"][ev]) == best
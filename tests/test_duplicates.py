@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import pytest
+
+from rdframework.filters.duplicates import merged_data_stream_files
+from rdframework.io.dataset import SimpleDataset
+
+
+def _stream(name: str, files: list[str], is_mc: bool = False) -> SimpleDataset:
+    return SimpleDataset(name, 1.0, is_mc, 1.0, name, files, False, None)
+
+
+def test_merged_data_stream_files():
+    files = merged_data_stream_files(
+        [
+            _stream("MuonEG", ["a.root", "b.root"]),
+            _stream("DoubleMuon", ["c.root", "a.root"]),
+        ]
+    )
+    assert files == ["a.root", "b.root", "c.root"]
+
+
+def test_merged_data_stream_files_rejects_mc():
+    with pytest.raises(ValueError):
+        merged_data_stream_files([_stream("tt", ["tt.root"], is_mc=True)])
+
+
+def test_duplicate_event_filter(tmp_path):
+    ROOT = pytest.importorskip("ROOT")
+    from rdframework.filters.duplicates import DuplicateEventFilter
+
+    # two streams sharing the events 5 to 9
+    paths = []
+    for name, first in [("MuonEG", 0), ("DoubleMuon", 5)]:
+        path = str(tmp_path / f"{name}.root")
+        ROOT.RDataFrame(10).Define("run", "1u").Define("luminosityBlock", "1u").Define(
+            "event", f"ULong64_t(rdfentry_ + {first})"
+        ).Snapshot("Events", path)
+        paths.append(path)
+    state = str(tmp_path / "seen.bin")
+    duplicates = DuplicateEventFilter(max_events=100, state_file=state)
+    events = duplicates.apply(ROOT.RDataFrame("Events", paths))
+    assert events.Count().GetValue() == 15
+    # a second event loop over the same graph sees the same events
+    assert events.Count().GetValue() == 15
+    duplicates.save()
+
+    # a later partial run drops the events stored by the first one, however small its limit
+    reloaded = DuplicateEventFilter(max_events=1, state_file=state)
+    assert reloaded.size() == 15
+    events = reloaded.apply(ROOT.RDataFrame("Events", paths[1]))
+    assert events.Count().GetValue() == 0
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from rdframework.corrections.electrons import (
+    ElectronEnergyCorrections,
+    correct_electron_energies,
+)
+from rdframework.corrections.tables import CorrectionTable
+from rdframework.histograms.booking import HistogramVariable, book_histograms
+
+TABLES = {
+    "scale": {
+        "run": [0, 300000, 400000],
+        "eta": [0.0, 1.5, 2.5],
+        "r9": [0.0, 1.0],
+        "pt": [0.0, 1e6],
+        "values": [[[[1.01]], [[0.98]]], [[[1.02]], [[0.97]]]],
+        "errors": [0.01, 0.02, 0.01, 0.02],
+    },
+    "smearing": {
+        "eta": [0.0, 1.5, 2.5],
+        "r9": [0.0, 0.94, 1.0],
+        "values": [[0.01, 0.02], [0.03, 0.04]],
+        "errors": [[0.005] * 2] * 2,
+    },
+}
+
+
+def test_correction_tables(tmp_path):
+    path = tmp_path / "electrons.json"
+    path.write_text(json.dumps(TABLES))
+    corrections = ElectronEnergyCorrections.from_json(str(path))
+    assert corrections.scale(320000, -2.0, 0.9, 40.0) == 0.97
+    # outside the binning, the nearest bin
+    assert corrections.scale(1, 0.5, 1.2, 40.0) == 1.01
+    assert corrections.scale(1, 0.5, 0.5, 40.0, variation=-1) == pytest.approx(1.0)
+    assert corrections.smearing(1.6, 0.95) == 0.04
+    assert corrections.smearing(0.0, 0.5, variation=1) == pytest.approx(0.015)
+    with pytest.raises(ValueError):
+        CorrectionTable([[0.0, 1.0], [0.0, 1.0, 2.0]], [1.0])
+    with pytest.raises(ValueError):
+        ElectronEnergyCorrections(
+            CorrectionTable([[0.0, 1.0]], [1.0]),
+            CorrectionTable([[0.0, 1.0]] * 2, [0.0]),
+        )
+    with pytest.raises(ValueError):
+        CorrectionTable.from_dict(TABLES["smearing"], ["eta", "r9", "pt"])
+
+
+def test_correct_electron_energies():
+    ROOT = pytest.importorskip("ROOT")
+    corrections = ElectronEnergyCorrections(
+        CorrectionTable.from_dict(TABLES["scale"], ["run", "eta", "r9", "pt"]),
+        CorrectionTable.from_dict(TABLES["smearing"], ["eta", "r9"]),
+    )
+    events = (
+        ROOT.RDataFrame(1000)
+        .Define("run", "320000u")
+        .Define("luminosityBlock", "1u")
+        .Define("event", "ULong64_t(rdfentry_)")
+        .Define("Electron_pt", "ROOT::VecOps::RVec<float>{30.f, 20.f}")
+        .Define("Electron_eta", "ROOT::VecOps::RVec<float>{0.5f, -2.f}")
+        .Define("Electron_deltaEtaSC", "ROOT::VecOps::RVec<float>{0.f, 0.f}")
+        .Define("Electron_r9", "ROOT::VecOps::RVec<float>{0.9f, 0.96f}")
+    )
+    data = correct_electron_energies(events, corrections, is_mc=False).AsNumpy(
+        ["Electron_pt", "Electron_uncorrected_pt"]
+    )
+    assert list(data["Electron_pt"][0]) == pytest.approx([30.6, 19.4])
+    assert list(data["Electron_uncorrected_pt"][0]) == [30.0, 20.0]
+
+    mc = correct_electron_energies(events, corrections, is_mc=True)
+    mc = mc.Define("lead_pt", "Electron_pt[0]").Define("passing", "Electron_pt[0] > 30")
+    variable = HistogramVariable("lead_pt", "lead_pt", 1, 0.0, 100.0)
+    mc, booked = book_histograms(
+        mc, [variable], ["passing"], {"nominal": "1.0"}, column_variations=True
+    )
+    assert booked.column_variations() == [
+        "electronScaleUp",
+        "electronScaleDown",
+        "electronSmearUp",
+        "electronSmearDown",
+    ]
+    nominal = booked.histogram("lead_pt", "passing", "nominal")
+    scale_up = booked.histogram("lead_pt", "passing", "electronScaleUp")
+    scale_down = booked.histogram("lead_pt", "passing", "electronScaleDown")
+    # the variations change which events pass the cut on the corrected pt
+    assert scale_up.GetEntries() > nominal.GetEntries() > scale_down.GetEntries()
+    assert len(booked.split()) == 5
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import pytest
+
+from rdframework.io.entrylist import (
+    EntryListIndex,
+    build_entry_lists,
+    preselection_identity,
+)
+
+
+def test_preselection_identity():
+    steps = [{"helper": "PV_MET_filter", "args": {}}]
+    description = {"era": "2018", "steps": steps}
+    assert preselection_identity(description) == preselection_identity(
+        {"steps": steps, "era": "2018"}
+    )
+    assert preselection_identity(description) != preselection_identity(
+        {"era": "2017", "steps": steps}
+    )
+
+
+def test_missing(tmp_path):
+    index = EntryListIndex(str(tmp_path / "lists"), "abc", description={"era": "2018"})
+    assert (tmp_path / "lists" / "abc" / "preselection.json").exists()
+    files = [str(tmp_path / "a.root"), "root://host//store/b.root"]
+    (tmp_path / "a.root").write_bytes(b"")
+    assert index.missing(files) == files
+    assert not index.has(files[1], "adler32:1234")
+
+
+def test_build_and_read(tmp_path):
+    ROOT = pytest.importorskip("ROOT")
+    paths = []
+    for i, n in enumerate([100, 50]):
+        path = str(tmp_path / f"f{i}.root")
+        ROOT.RDataFrame(n).Define("x", "int(rdfentry_)").Snapshot("Events", path)
+        paths.append(path)
+    index = EntryListIndex(str(tmp_path / "lists"), "even")
+
+    def preselect(events):
+        return events.Filter("x % 2 == 0")
+
+    assert build_entry_lists(index, paths, preselect) == {paths[0]: 50, paths[1]: 25}
+    assert index.missing(paths) == []
+    assert build_entry_lists(index, paths, preselect) == {}
+    assert index.selected(paths) == (75, 150)
+
+    chain = index.chain(paths)
+    xs = ROOT.RDataFrame(chain).Take["int"]("x").GetValue()
+    assert sorted(xs) == list(range(0, 100, 2)) + list(range(0, 50, 2))
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import pytest
+
+from rdframework.filters.fake_rate import FakeRates, book_fake_prediction
+from rdframework.histograms.booking import HistogramVariable
+
+RATES = FakeRates(
+    [10.0, 20.0, 50.0], [0.0, 1.5, 2.5], [[0.2, 0.3], [0.1, 0.5]], [[0.05] * 2] * 2
+)
+
+
+def test_fake_rates():
+    assert RATES.rate(15.0, -2.0) == 0.3
+    # outside the binning, the nearest bin
+    assert RATES.rate(5.0, 0.5) == 0.2 and RATES.rate(500.0, 3.0) == 0.5
+    assert RATES.rate(15.0, 0.0, variation=1) == pytest.approx(0.25)
+    assert RATES.transfer_factor(30.0, 2.0) == pytest.approx(1.0)
+    with pytest.raises(ValueError):
+        FakeRates([10.0, 20.0], [0.0, 2.5], [[1.0]])
+    with pytest.raises(ValueError):
+        FakeRates([10.0, 20.0], [0.0, 2.5], [[0.1, 0.2]])
+
+
+def test_book_fake_prediction():
+    ROOT = pytest.importorskip("ROOT")
+    events = (
+        ROOT.RDataFrame(100)
+        .Define("channel_e_nim_OS", "rdfentry_ % 2 == 0")
+        .Define("channel_mu_nie_OS", "false")
+        .Define("NonIsoMuon_pt", "ROOT::VecOps::RVec<float>(channel_e_nim_OS, 30.f)")
+        .Define("NonIsoMuon_eta", "ROOT::VecOps::RVec<float>(channel_e_nim_OS, 2.f)")
+        .Define("NonIsoElectron_pt", "ROOT::VecOps::RVec<float>()")
+        .Define("NonIsoElectron_eta", "ROOT::VecOps::RVec<float>()")
+        .Define("ht", "100.0")
+    )
+    events, fakes = book_fake_prediction(
+        events,
+        [HistogramVariable("ht", "ht", 1, 0.0, 200.0)],
+        RATES,
+        RATES,
+        "NonIsoElectron",
+        "NonIsoMuon",
+        regions={"emu_OS": ["channel_e_nim_OS", "channel_mu_nie_OS"]},
+    )
+    assert fakes.prediction("ht", "emu_OS").GetBinContent(1) == pytest.approx(50.0)
+    up = fakes.prediction("ht", "emu_OS", "fakeRateUp").GetBinContent(1)
+    assert up == pytest.approx(50 * 0.55 / 0.45)
+    assert len(fakes.histograms()) == 3
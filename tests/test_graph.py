@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from rdframework.diagnostics.graph import analyse, record
+from rdframework.objects.leptons import select_muons_cutBased
+
+
+class _Node:
+    """Stand-in for an RDataFrame node, only tracking column names"""
+
+    def __init__(self, columns: list[str]):
+        self._columns = columns
+
+    def GetColumnNames(self) -> list[str]:
+        return list(self._columns)
+
+    def Define(self, name: str, expression: str) -> _Node:
+        return _Node(self._columns + [name])
+
+    def Alias(self, alias: str, column: str) -> _Node:
+        return _Node(self._columns + [alias])
+
+    def Filter(self, expression: str, name: str = "") -> _Node:
+        return _Node(self._columns)
+
+    def Histo1D(self, model: tuple, column: str, weight: str = "") -> None:
+        return None
+
+
+MUON_COLUMNS = [
+    "nMuon",
+    "Muon_pt",
+    "Muon_eta",
+    "Muon_ip3d",
+    "Muon_dz",
+    "Muon_pfIsoId",
+    "Muon_mediumId",
+]
+
+
+def test_graph_redundancy():
+    events = record(_Node(MUON_COLUMNS))
+    events = select_muons_cutBased(
+        events, "Muon", "iso_muon", None, "medium", "tight", min_pt=20.0
+    )
+    events = events.Define("lead_pt", "iso_muon_pt.size() > 0 ? iso_muon_pt[0] : -1.0")
+    events = events.Define(
+        "lead_pt_again", "return (iso_muon_pt.size()>0 ? iso_muon_pt[0] : -1.);"
+    )
+    events = events.Alias("leading_pt", "lead_pt")
+    events = events.Define("lead_pt_alias", "leading_pt")
+    events = events.Filter("lead_pt > 25", "leading muon")
+    events.Histo1D(("h", "", 10, 0.0, 100.0), "lead_pt_again")
+
+    report = analyse(events, keep=["iso_muon_eta"])
+    nodes = report.nodes()
+    helper = "rdframework.objects.leptons.select_muons_cutBased"
+    # the innermost helper: the indices are defined by the one select_muons_cutBased calls
+    assert {node.helper for node in report.added_nodes()} == {
+        helper,
+        "rdframework.objects.combinatorics.define_indices",
+    }
+    assert nodes[-1].kind == "Histo1D"
+    assert report.helper_counts()["(direct)"] == 6
+
+    duplicates = [{node.name for node in group} for group in report.duplicates()]
+    assert {"lead_pt", "lead_pt_again", "lead_pt_alias"} in duplicates
+
+    dead = {node.name for node in report.dead_columns()}
+    assert "iso_muon_dz" in dead
+    assert "iso_muon_eta" not in dead
+    assert "lead_pt" not in dead and "lead_pt_again" not in dead
+    assert "lead_pt_alias" in dead
+
+    counts = report.collection_counts()
+    assert counts["iso_muon"] == len(
+        [n for n in nodes if n.name.startswith("iso_muon_") or n.name == "niso_muon"]
+    )
+    assert counts["(event)"] == 4
+    assert "lead_pt_alias" in report.summary()
+
+
+def test_graph_export(tmp_path):
+    events = record(_Node(["nJet", "Jet_pt"]))
+    events = events.Define("ht", "Sum(Jet_pt)")
+    report = analyse(events)
+    report.to_dot(str(tmp_path / "graph.dot"))
+    report.to_json(str(tmp_path / "graph.json"))
+    assert "n0" in (tmp_path / "graph.dot").read_text()
+    assert [node.name for node in report.dead_columns()] == ["ht"]
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from rdframework.histograms.grouping import (  # noqa: E402
+    GroupedResults,
+    ProcessGroup,
+    process_groups,
+    result_store_loader,
+)
+from rdframework.io.dataset import SimpleDataset  # noqa: E402
+from rdframework.io.resultstore import ResultWriter  # noqa: E402
+
+DATASETS = [
+    SimpleDataset("TTTo2L2Nu", 88.3, True, 1000.0, "tt", [], False, None),
+    SimpleDataset("TTToSemiLeptonic", 365.3, True, 500.0, "tt", [], False, None),
+    SimpleDataset("DYJetsToLL", 6077.2, True, 100.0, "DY", [], False, None),
+    SimpleDataset("MuonEG_B", 1.0, False, 1.0, "data", [], False, None),
+]
+
+
+def test_process_groups():
+    groups = process_groups(
+        {"ttbar": ["TTTo2L2Nu"], "DY": {"datasets": ["DYJetsToLL"], "latex_name": "Z"}}
+    )
+    assert groups == [
+        ProcessGroup("ttbar", ["TTTo2L2Nu"]),
+        ProcessGroup("DY", ["DYJetsToLL"], "Z"),
+    ]
+
+
+def test_grouped_results(tmp_path):
+    for dataset in DATASETS:
+        with ResultWriter(str(tmp_path / f"{dataset.name()}.rdfr")) as writer:
+            writer.add_histogram("ee_OS__ht", [[0.0, 100.0]], np.full(3, 2.0))
+    reads = []
+    load = result_store_loader(str(tmp_path))
+
+    def counting_load(dataset: str, name: str):
+        reads.append(dataset)
+        return load(dataset, name)
+
+    groups = process_groups(
+        {
+            "ttbar": ["TTTo2L2Nu", "TTToSemiLeptonic"],
+            "DY": ["DYJetsToLL"],
+            "data": ["MuonEG_B"],
+        }
+    )
+    grouped = GroupedResults(DATASETS, groups, counting_load, luminosity=1000.0)
+    assert reads == []
+    ttbar = grouped.histogram("ttbar", "ee_OS__ht")
+    assert ttbar.name == "ttbar__ee_OS__ht"
+    assert list(ttbar.contents) == [2.0 * (1 + 2)] * 3
+    assert list(ttbar.sumw2) == [2.0 * (1 + 4)] * 3
+    assert grouped.histogram("ttbar", "ee_OS__ht") is ttbar
+    assert list(grouped.stack("ee_OS__ht")) == ["ttbar", "DY", "data"]
+    assert grouped.stack("ee_OS__ht")["data"].contents[1] == 2.0
+    assert len(reads) == 4
+
+    merged = grouped.regroup(
+        process_groups({"background": [d.name() for d in DATASETS[:3]]})
+    )
+    assert merged.histogram("background", "ee_OS__ht").contents[0] == 2.0 * 13
+    assert len(reads) == 4
+    with pytest.raises(ValueError):
+        grouped.regroup([ProcessGroup("ttH", ["ttHTobb"])])
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from rdframework.filters.cuts import certified_lumi_filter
+from rdframework.filters.lumimask import LumiMask, load_brilcalc_csv
+
+
+def test_lumimask_lookup(tmp_path):
+    golden = tmp_path / "golden.json"
+    golden.write_text(
+        json.dumps({"315257": [[1, 3], [10, 20], [4, 6]], "315259": [[1, 1]]})
+    )
+    mask = LumiMask.from_json(str(golden))
+    assert mask.runs() == [315257, 315259]
+    assert mask.ranges(315257) == [(1, 6), (10, 20)]
+    assert mask.accept(315257, 1)
+    assert mask.accept(315257, 6)
+    assert not mask.accept(315257, 7)
+    assert (315257, 20) in mask
+    assert (315257, 21) not in mask
+    assert (315258, 1) not in mask
+    assert (315259, 1) in mask
+
+
+def test_integrated_luminosity(tmp_path):
+    table = tmp_path / "lumi.csv"
+    table.write_text(
+        "#Data tag : 23v1 , Norm tag: None\n"
+        "#run:fill,ls,time,beamstatus,E(GeV),delivered(/pb),recorded(/pb),avgpu,source\n"
+        "315257:6524,1:1,06/04/18 01:40:53,STABLE BEAMS,6500,0.5,0.4,1.2,HFOC\n"
+        "315257:6524,2:2,06/04/18 01:41:16,STABLE BEAMS,6500,0.5,0.3,1.2,HFOC\n"
+        "315257:6524,7:7,06/04/18 01:43:10,STABLE BEAMS,6500,0.5,0.2,1.2,HFOC\n"
+        "#Summary:\n"
+    )
+    lumis = load_brilcalc_csv(str(table))
+    assert lumis[(315257, 2)] == 0.3
+    mask = LumiMask({315257: [(1, 5)]})
+    assert abs(mask.certified_luminosity(lumis) - 0.7) < 1e-12
+    assert (
+        abs(mask.integrated_luminosity(lumis, [(315257, 2), (315257, 7)]) - 0.3) < 1e-12
+    )
+
+
+def test_lumimask_filter():
+    ROOT = pytest.importorskip("ROOT")
+    mask = LumiMask({315257: [(1, 3), (10, 20), (4, 6)], 315259: [(1, 1), (25, 30)]})
+    events = (
+        ROOT.RDataFrame(3000)
+        .Define("run", "UInt_t(315257 + rdfentry_ % 3)")
+        .Define("luminosityBlock", "UInt_t(rdfentry_ / 10 % 30 + 1)")
+    )
+    blocks = [(315257 + entry % 3, entry // 10 % 30 + 1) for entry in range(3000)]
+    accepted = [block for block in blocks if mask.accept(*block)]
+    assert certified_lumi_filter(events, True, mask) is events
+
+    filtered = certified_lumi_filter(events, False, mask)
+    count = filtered.Count()
+    # the compiled lookup, built by apply, agrees with the python one on every block
+    compiled = mask._compile(1)
+    unique = sorted(set(blocks))
+    assert [compiled.Accept(*block) for block in unique] == [
+        mask.accept(*block) for block in unique
+    ]
+    assert count.GetValue() == len(accepted)
+    assert mask.recorded_blocks() == sorted(set(accepted))
+    assert (315259, 25) in mask.recorded_blocks()
+    assert (315257, 7) not in mask.recorded_blocks()
+
+    unrecorded = LumiMask({315257: [(1, 5)]})
+    expected = sum(unrecorded.accept(*block) for block in blocks)
+    assert unrecorded.apply(events, record=False).Count().GetValue() == expected
+    assert unrecorded.recorded_blocks() == []
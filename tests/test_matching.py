@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import pytest
+
+from rdframework.io.schema import DatasetSchema
+from rdframework.objects.matching import gen_match_indices, match_to_gen
+
+SCHEMA = DatasetSchema(
+    {
+        "nJet": "UInt_t",
+        "Jet_pt": "ROOT::VecOps::RVec<Float_t>",
+        "Jet_genJetIdx": "ROOT::VecOps::RVec<Int_t>",
+        "nMuon": "UInt_t",
+        "Muon_pt": "ROOT::VecOps::RVec<Float_t>",
+        "Muon_genPartIdx": "ROOT::VecOps::RVec<Int_t>",
+    }
+)
+
+
+class _Node:
+    def __init__(self, defined: list[str]):
+        self.defined = {name: "" for name in defined}
+
+    def GetDefinedColumnNames(self) -> list[str]:
+        return list(self.defined)
+
+    def Define(self, name: str, expression: str) -> _Node:
+        self.defined[name] = expression
+        return self
+
+
+def test_index_matching():
+    node = gen_match_indices(_Node([]), "Jet", schema=SCHEMA)
+    assert node.defined["Jet_genIdx"] == "Jet_genJetIdx"
+    # selected collections take the gen index through their original indices
+    node = gen_match_indices(_Node(["selMuon_idx"]), "selMuon", "Muon", schema=SCHEMA)
+    assert node.defined["selMuon_genIdx"] == "Take(Muon_genPartIdx, selMuon_idx)"
+    node = gen_match_indices(
+        _Node(["selJet_idx", "selJet_genJetIdx"]), "selJet", "Jet", schema=SCHEMA
+    )
+    assert node.defined["selJet_genIdx"] == "selJet_genJetIdx"
+    assert match_to_gen(_Node([]), "Jet", is_mc=False).defined == {}
+    with pytest.raises(ValueError):
+        gen_match_indices(_Node([]), "IsoTrack", schema=SCHEMA)
+
+
+def test_gather_matched():
+    ROOT = pytest.importorskip("ROOT")
+    events = (
+        ROOT.RDataFrame(1)
+        .Define("Jet_pt", "ROOT::VecOps::RVec<float>{50.f, 40.f, 30.f}")
+        .Define("Jet_eta", "ROOT::VecOps::RVec<float>{0.f, 1.f, 2.f}")
+        .Define("Jet_phi", "ROOT::VecOps::RVec<float>{0.f, 3.1f, 1.f}")
+        .Define("Jet_genJetIdx", "ROOT::VecOps::RVec<int>{1, -1, 0}")
+        .Define("selJet_idx", "ROOT::VecOps::RVec<UInt_t>{2, 0}")
+        .Define("GenJet_pt", "ROOT::VecOps::RVec<float>{31.f, 52.f}")
+        .Define("GenJet_eta", "ROOT::VecOps::RVec<float>{2.f, 0.f}")
+        .Define("GenJet_phi", "ROOT::VecOps::RVec<float>{1.f, 0.1f}")
+        .Define("GenJet_mass", "ROOT::VecOps::RVec<float>{5.f, 6.f}")
+    )
+    events = match_to_gen(events, "selJet", "Jet", fields=["pt"])
+    events = match_to_gen(events, "Jet", gen_collection="GenJet", fields=["pt"])
+    events = gen_match_indices(
+        events.Define("Tag_eta", "Jet_eta").Define("Tag_phi", "Jet_phi"),
+        "Tag",
+        gen_collection="GenJet",
+    )
+    data = events.AsNumpy(["selJet_gen_pt", "Jet_gen_pt", "Tag_genIdx"])
+    assert list(data["selJet_gen_pt"][0]) == [31.0, 52.0]
+    assert list(data["Jet_gen_pt"][0]) == [52.0, -1.0, 31.0]
+    assert list(data["Tag_genIdx"][0]) == [1, -1, 0]
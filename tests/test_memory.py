@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+import pytest
+
+ROOT = pytest.importorskip("ROOT")
+
+from rdframework.diagnostics.memory import profile_memory  # noqa: E402
+
+
+def test_profile_memory():
+    events = ROOT.RDataFrame(100).Define("n", "int(rdfentry_ % 4)")
+    events = events.Define("values", "ROOT::VecOps::RVec<float>(n, 1.f)")
+    events = events.Define("scalar", "2.0 * n")
+    events, profile = profile_memory(events, columns=["values", "scalar"])
+    sizes = profile.bytes_per_event()
+    assert profile.events() == 100
+    assert list(sizes) == ["values", "scalar"]
+    assert sizes["scalar"] == 8.0
+    assert sizes["values"] > 1.5 * 4
+    assert max(profile.peak_rss_per_slot()) > 0
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import os
+from array import array
+
+import pytest
+
+from rdframework.io.dataset import SimpleDataset
+from rdframework.io.normalization import (
+    GeneratorSums,
+    SumwCache,
+    dataset_sums,
+    define_normalized_weights,
+    file_fingerprint,
+    read_runs_tree,
+)
+
+
+def test_generator_sums():
+    first = GeneratorSums(10.0, 20.0, 5.0, [9.0, 11.0], [])
+    second = GeneratorSums(30.0, 40.0, 15.0, [33.0, 27.0], [30.0])
+    merged = first.merged(second)
+    assert merged.sumw == 40.0
+    assert merged.event_count == 20.0
+    assert merged.scale_normalization() == [1.05, 0.95]
+    assert merged.pdf_normalization() == [0.75]
+    with pytest.raises(ValueError):
+        merged.merged(GeneratorSums(1.0, 1.0, 1.0, [1.0], []))
+
+
+def test_cached_dataset_sums(tmp_path):
+    files = []
+    for i in range(2):
+        path = tmp_path / f"nano_{i}.root"
+        path.write_bytes(b"not read")
+        files.append(str(path))
+    dataset = SimpleDataset("ttbar", 831.76, True, 1.0, "ttbar", files, False, None)
+
+    cache = SumwCache(str(tmp_path / "sumw.json"))
+    for i, path in enumerate(files):
+        cache.put(file_fingerprint(path), GeneratorSums(1.0 + i, 1.0, 2.0, [], []))
+    cache.save()
+
+    # every file is in the cache, so no Runs tree is read
+    sums = dataset_sums(dataset, SumwCache(str(tmp_path / "sumw.json")))
+    assert sums == GeneratorSums(3.0, 2.0, 4.0, [], [])
+
+    fingerprint = file_fingerprint(files[0])
+    os.utime(files[0], ns=(0, 0))
+    assert file_fingerprint(files[0]) != fingerprint
+    assert file_fingerprint(files[0], "adler32:1a2b3c4d").endswith("#adler32:1a2b3c4d")
+
+    data = SimpleDataset("MuonEG", 1.0, False, 1.0, "data", files, False, None)
+    with pytest.raises(ValueError):
+        dataset_sums(data)
+
+
+def _write_runs_tree(ROOT, path: str) -> None:
+    # two Runs entries, as in NanoAOD: the sums, and the LHE scale sums relative to genEventSumw
+    outfile = ROOT.TFile.Open(path, "RECREATE")
+    runs = ROOT.TTree("Runs", "Runs")
+    sumw, sumw2 = array("d", [0.0]), array("d", [0.0])
+    count, nscale = array("q", [0]), array("i", [2])
+    scale = array("d", [0.9, 1.1])
+    runs.Branch("genEventSumw", sumw, "genEventSumw/D")
+    runs.Branch("genEventSumw2", sumw2, "genEventSumw2/D")
+    runs.Branch("genEventCount", count, "genEventCount/L")
+    runs.Branch("nLHEScaleSumw", nscale, "nLHEScaleSumw/I")
+    runs.Branch("LHEScaleSumw", scale, "LHEScaleSumw[nLHEScaleSumw]/D")
+    for i in range(2):
+        sumw[0], sumw2[0], count[0] = 100.0 * (i + 1), 10.0, 50 * (i + 1)
+        runs.Fill()
+    outfile.Write()
+    outfile.Close()
+
+
+def test_normalized_weights(tmp_path):
+    ROOT = pytest.importorskip("ROOT")
+    path = str(tmp_path / "nano.root")
+    _write_runs_tree(ROOT, path)
+    sums = read_runs_tree(path)
+    assert (sums.sumw, sums.sumw2, sums.event_count) == (300.0, 20.0, 150.0)
+    assert sums.lhe_scale_sumw == pytest.approx([270.0, 330.0])
+    assert sums.lhe_pdf_sumw == []
+
+    dataset = SimpleDataset("ttbar", 3.0, True, 1.0, "ttbar", [path], False, None)
+    cache = SumwCache(str(tmp_path / "sumw.json"))
+    assert dataset_sums(dataset, cache) == sums
+    assert len(cache) == 1
+    assert SumwCache(str(tmp_path / "sumw.json")).get(file_fingerprint(path)) == sums
+
+    events = (
+        ROOT.RDataFrame(10)
+        .Define("genWeight", "rdfentry_ % 2 ? 2.f : -2.f")
+        .Define("LHEScaleWeight", "ROOT::VecOps::RVec<float>{0.9f, 1.1f}")
+    )
+    # xsec * luminosity / sumw = 3.0 * 100.0 / 300.0
+    events = define_normalized_weights(events, dataset, sums, 100.0)
+    data = events.AsNumpy(["genWeight", "norm_weight", "norm_scale_weights"])
+    assert list(data["norm_weight"]) == pytest.approx(list(data["genWeight"]))
+    assert list(data["norm_scale_weights"][1]) == pytest.approx([2.0, 2.0])
+    assert events.Sum("norm_weight").GetValue() == pytest.approx(0.0)
+    assert "norm_pdf_weights" not in [str(c) for c in events.GetColumnNames()]
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import pytest
+
+from rdframework.io.precision import (
+    ColumnPrecision,
+    PrecisionReport,
+    format_precision_report,
+    parse_precision,
+)
+
+
+def test_parse_precision():
+    eta, pt = parse_precision(
+        {"selJet_eta": 10, "selJet_pt": {"bits": 12, "range": [0, 2000]}}
+    )
+    assert eta == ColumnPrecision("selJet_eta", 10)
+    assert not eta.is_fixed() and eta.decode() == "selJet_eta"
+    assert eta.encode() == "rdfw::RoundMantissa(selJet_eta, 10)"
+    assert eta.max_error() == 2.0**-11
+    assert pt.is_fixed() and pt.code_type() == "UShort_t"
+    assert pt.max_error() == pytest.approx(2000 / 4095 / 2)
+    assert pt.decode("x") == "rdfw::FromFixed(x, 0.0, 2000.0, 12)"
+    assert parse_precision(None) == []
+    for raw in [{"x": 0}, {"x": 24}, {"x": {"bits": 33, "range": [0, 1]}}]:
+        with pytest.raises(ValueError):
+            parse_precision(raw)
+    with pytest.raises(ValueError):
+        parse_precision({"x": {"bits": 8, "range": [1, 1]}})
+
+
+def test_format_report():
+    reports = [PrecisionReport("a", 2000, 500, 0.01), PrecisionReport("b", 0, 0, 0.0)]
+    assert reports[0].saved() == 0.75 and reports[1].saved() == 0.0
+    assert "75.0%" in format_precision_report(reports).splitlines()[-1]
+
+
+def test_round_trip(tmp_path):
+    ROOT = pytest.importorskip("ROOT")
+    from rdframework.io.precision import (
+        encode_columns,
+        measure_precision,
+        read_skim,
+        write_precision,
+    )
+
+    events = (
+        ROOT.RDataFrame(5000)
+        .Define("eta", "float(gRandom->Uniform(-2.5, 2.5))")
+        .Define("pt", "ROOT::VecOps::RVec<float>{20.f + rdfentry_ % 500, 35.5f}")
+    )
+    events = ROOT.RDF.AsRNode(events.Snapshot("Events", str(tmp_path / "in.root")))
+    precisions = parse_precision({"eta": 8, "pt": {"bits": 10, "range": [0, 1000]}})
+    reports = measure_precision(events, precisions, str(tmp_path / "measure"))
+    assert all(report.reduced_bytes < report.full_bytes for report in reports)
+    assert reports[0].max_error <= 2.5 * precisions[0].max_error()
+    assert reports[1].max_error <= precisions[1].max_error() * 1.0001
+
+    path = str(tmp_path / "skim.root")
+    encode_columns(events, precisions).Snapshot("Events", path)
+    write_precision(path, precisions)
+    decoded = read_skim([path]).AsNumpy(["pt"])["pt"]
+    assert abs(decoded[0][1] - 35.5) <= precisions[1].max_error() * 1.0001
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import math
+
+import pytest
+
+from rdframework.runner.preview import (
+    extrapolate_cutflow,
+    extrapolated_count,
+    preview_chain,
+    preview_sample,
+    sample_clusters,
+)
+
+
+def _clusters(nfiles, nclusters, size=1000):
+    return {
+        f"f{i}.root": [(j * size, (j + 1) * size) for j in range(nclusters)]
+        for i in range(nfiles)
+    }
+
+
+def test_sample_clusters():
+    clusters = _clusters(4, 25)
+    sample = sample_clusters(clusters, 0.1, seed="ttbar")
+    assert sample == sample_clusters(clusters, 0.1, seed="ttbar")
+    assert sample.total_entries == 100_000
+    assert sample.sampled_entries == 10_000
+    assert sample.fraction() == pytest.approx(0.1)
+    # spread over every file
+    assert sorted(sample.ranges) == sorted(clusters)
+
+    assert sample_clusters(clusters, 1.0).sampled_entries == 100_000
+    tiny = sample_clusters(_clusters(1, 3), 0.01)
+    assert tiny.sampled_entries == 1000
+    with pytest.raises(ValueError):
+        sample_clusters(clusters, 0.0)
+
+
+def test_extrapolation():
+    assert extrapolated_count(100, 0.25) == (400.0, math.sqrt(75) / 0.25)
+    assert extrapolated_count(100, 1.0) == (100.0, 0.0)
+    cutflow = extrapolate_cutflow({"(all)": 1000, "pass": 10}, 0.5)
+    assert cutflow["pass"][0] == 20.0
+
+
+def test_preview_chain(tmp_path):
+    ROOT = pytest.importorskip("ROOT")
+    paths = []
+    for i in range(2):
+        path = str(tmp_path / f"f{i}.root")
+        options = ROOT.RDF.RSnapshotOptions()
+        options.fAutoFlush = 100
+        ROOT.RDataFrame(1000).Define("x", "1.0").Snapshot("Events", path, "", options)
+        paths.append(path)
+    sample = preview_sample(paths, 0.2, seed="test")
+    assert sample.total_entries == 2000
+    count = ROOT.RDataFrame(preview_chain(sample)).Count().GetValue()
+    assert count == sample.sampled_entries
+    assert sample.fraction() == pytest.approx(0.2, abs=0.05)
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import pytest
+
+from rdframework.corrections.random import RandomStreams, stream_id
+
+
+def test_stream_id():
+    assert stream_id("jer") == stream_id("jer", 0)
+    assert stream_id("jer") != stream_id("jer", 1)
+    assert stream_id("jer") != stream_id("electron_smearing")
+    assert 0 <= stream_id("jer") < 2**64
+
+
+def test_reproducible_draws():
+    ROOT = pytest.importorskip("ROOT")
+    values = []
+    for nslots in [1, 4]:
+        if nslots > 1:
+            ROOT.EnableImplicitMT(nslots)
+        try:
+            events = (
+                ROOT.RDataFrame(20000)
+                .Define("run", "1u")
+                .Define("luminosityBlock", "UInt_t(rdfentry_ / 100)")
+                .Define("event", "ULong64_t(rdfentry_)")
+                .Define("sigma", "ROOT::VecOps::RVec<float>(3, 0.1f)")
+            )
+            assert events.GetNSlots() == nslots
+            streams = RandomStreams("jer", nslots)
+            smeared = streams.gaus(events, "smear", "sigma")
+            smeared = streams.uniform(smeared, "u", "sigma.size()")
+            data = smeared.AsNumpy(["event", "smear", "u"])
+        finally:
+            ROOT.DisableImplicitMT()
+        # with several threads the events arrive in any order
+        values.append(
+            {
+                int(event): (list(smear), list(u))
+                for event, smear, u in zip(data["event"], data["smear"], data["u"])
+            }
+        )
+    assert values[0] == values[1]
+    draws = [x for smear, _ in values[0].values() for x in smear]
+    assert abs(sum(draws) / len(draws)) < 0.01
+    assert values[0][0][0][0] != values[0][0][0][1]
+
+
+class _Events:
+    """Stand-in for an RDataFrame node run with ImplicitMT on 4 slots"""
+
+    def GetNSlots(self) -> int:
+        return 4
+
+
+def test_too_few_slots():
+    pytest.importorskip("ROOT")
+    streams = RandomStreams("jer", 2)
+    with pytest.raises(ValueError):
+        streams.gaus(_Events(), "smear", "sigma")
+    with pytest.raises(ValueError):
+        streams.uniform(_Events(), "u", "nJet")
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from rdframework.io.resultstore import (  # noqa: E402
+    ResultStore,
+    ResultWriter,
+    merge_stores,
+    merge_tree,
+)
+
+EDGES = [[0.0, 50.0, 100.0]]
+
+
+def _write(path, scale: float, extra: bool = False) -> str:
+    with ResultWriter(str(path)) as writer:
+        writer.add_histogram("ttbar__ht", EDGES, np.arange(4.0) * scale, title="HT")
+        writer.add_histogram(
+            "ttbar__mjj", [[0.0, 1.0], [0.0, 1.0, 2.0]], np.full((3, 4), scale)
+        )
+        if extra:
+            writer.add_histogram("DY__ht", EDGES, np.ones(4))
+        writer.add_table("cutflow_ttbar", {"(all)": 10 * scale, "pass": scale})
+    return str(path)
+
+
+def test_write_read(tmp_path):
+    store = ResultStore(_write(tmp_path / "a.rdfr", 2.0))
+    assert store.histogram_names() == ["ttbar__ht", "ttbar__mjj"]
+    hist = store.histogram("ttbar__ht")
+    assert hist.title == "HT" and hist.edges == EDGES
+    assert list(hist.contents) == [0.0, 2.0, 4.0, 6.0]
+    assert hist.sumw2.shape == (4,)
+    assert store.histogram("ttbar__mjj").contents.shape == (3, 4)
+    assert store.table("cutflow_ttbar") == {"(all)": 20.0, "pass": 2.0}
+    with pytest.raises(ValueError):
+        with ResultWriter(str(tmp_path / "b.rdfr")) as writer:
+            writer.add_histogram("bad", EDGES, np.zeros(3))
+    assert not list(tmp_path.glob("b.rdfr*"))
+
+
+def test_merge(tmp_path):
+    paths = [
+        _write(tmp_path / f"{i}.rdfr", float(i + 1), extra=i == 3) for i in range(5)
+    ]
+    merged = ResultStore(merge_stores(paths, str(tmp_path / "merged.rdfr")))
+    tree = ResultStore(merge_tree(paths, str(tmp_path / "tree.rdfr"), fan_in=2))
+    for store in [merged, tree]:
+        assert list(store.histogram("ttbar__ht").contents) == [0.0, 15.0, 30.0, 45.0]
+        assert list(store.histogram("DY__ht").contents) == [1.0] * 4
+        assert store.table("cutflow_ttbar") == {"(all)": 150.0, "pass": 15.0}
+    with ResultWriter(str(tmp_path / "other.rdfr")) as writer:
+        writer.add_histogram("ttbar__ht", [[0.0, 40.0, 100.0]], np.zeros(4))
+    with pytest.raises(ValueError):
+        merge_stores(
+            [paths[0], str(tmp_path / "other.rdfr")], str(tmp_path / "bad.rdfr")
+        )
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from rdframework.filters.categorization import lepton_channel_categorization
+from rdframework.runner.cli import main, split_datasets
+from rdframework.runner.config import parse_config
+from rdframework.runner.pipeline import (
+    dataset_context,
+    helper_kwargs,
+    preselection_description,
+)
+
+CONFIG = {
+    "era": "2018",
+    "datasets": [
+        {
+            "name": "ttbar",
+            "is_mc": True,
+            "xsec": 831.76,
+            "files": ["a.root", "b.root", "c.root"],
+        },
+        {
+            "name": "MuonEG_B",
+            "is_mc": False,
+            "files": ["d.root"],
+            "run_period": "B",
+            "data_stream": "MuonEG",
+        },
+        {"name": "DY", "is_mc": True, "files": ["e.root", "f.root"]},
+    ],
+    "steps": [
+        {"helper": "PV_MET_filter"},
+        {"helper": "select_muons_cutBased", "args": {"input_collection": "Muon"}},
+        {"helper": "Define", "args": {"name": "ht", "expression": "Sum(Jet_pt)"}},
+    ],
+    "outputs": {"histograms": [{"name": "ht", "bins": 10, "high": 1000}]},
+}
+
+
+def test_parse_config():
+    config = parse_config(CONFIG)
+    assert [e.dataset.name() for e in config.datasets] == ["ttbar", "MuonEG_B", "DY"]
+    assert config.datasets[1].options == {"run_period": "B", "data_stream": "MuonEG"}
+    assert config.outputs.histograms[0].expression == "ht"
+    assert config.tree == "Events"
+    assert config.outputs.snapshot_precision == []
+    assert not config.outputs.column_variations
+    assert config.staging is None
+    staging = {"directory": "/scratch/stage", "budget_gb": 50}
+    assert parse_config({**CONFIG, "staging": staging}).staging["budget_gb"] == 50.0
+    with pytest.raises(ValueError):
+        parse_config({**CONFIG, "staging": {"directory": "/scratch/stage"}})
+
+    with pytest.raises(ValueError):
+        parse_config({**CONFIG, "steps": [{"helper": "select_taus"}]})
+    with pytest.raises(ValueError):
+        parse_config({**CONFIG, "steps": [{"helper": "Define", "args": {"name": "x"}}]})
+    with pytest.raises(ValueError):
+        parse_config({**CONFIG, "datasets": CONFIG["datasets"] * 2})
+
+
+def test_entry_lists_config():
+    assert parse_config(CONFIG).entry_lists is None
+    config = parse_config(
+        {**CONFIG, "entry_lists": {"directory": "lists", "preselection": 2}}
+    )
+    assert config.entry_lists == {"directory": "lists", "preselection": 2}
+    description = preselection_description(
+        config.datasets[0], config, dataset_context(config.datasets[0], config)
+    )
+    assert [step["helper"] for step in description["steps"]] == [
+        "PV_MET_filter",
+        "select_muons_cutBased",
+    ]
+    for preselection in [0, 4]:
+        with pytest.raises(ValueError):
+            parse_config(
+                {
+                    **CONFIG,
+                    "entry_lists": {"directory": "lists", "preselection": preselection},
+                }
+            )
+
+
+def test_helper_kwargs():
+    config = parse_config(CONFIG)
+    context = dataset_context(config.datasets[1], config)
+    kwargs = helper_kwargs(
+        lepton_channel_categorization,
+        {"iso_muons": "m", "iso_electrons": "e", "era": "2017"},
+        context,
+    )
+    assert kwargs == {
+        "iso_muons": "m",
+        "iso_electrons": "e",
+        "era": "2017",
+        "is_mc": False,
+        "run_period": "B",
+    }
+
+
+def test_split_datasets():
+    config = parse_config(CONFIG)
+    assert split_datasets(config, 2) == [["ttbar"], ["DY", "MuonEG_B"]]
+    assert split_datasets(config, 10) == [["ttbar"], ["DY"], ["MuonEG_B"]]
+
+
+def test_dry_run(tmp_path, capsys):
+    path = tmp_path / "pipeline.json"
+    path.write_text(json.dumps(CONFIG))
+    assert main([str(path), "--dry-run", "--datasets", "DY"]) == 0
+    out = capsys.readouterr().out
+    assert "DY (MC, 2 files)" in out
+    assert "ttbar" not in out
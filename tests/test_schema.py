@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import pytest
+
+from rdframework.io.schema import (
+    DatasetSchema,
+    SchemaCache,
+    collection_columns,
+    dataset_schema,
+)
+
+COLUMNS = {
+    "run": "UInt_t",
+    "nJet": "UInt_t",
+    "Jet_pt": "ROOT::VecOps::RVec<Float_t>",
+    "Jet_eta": "ROOT::VecOps::RVec<Float_t>",
+    "nElectron": "UInt_t",
+    "Electron_pt": "ROOT::VecOps::RVec<Float_t>",
+    "MET_pt": "Float_t",
+    "HLT_IsoMu24": "Bool_t",
+}
+
+
+class _Node:
+    def __init__(self, defined: list[str]):
+        self._defined = defined
+
+    def GetColumnNames(self) -> list[str]:
+        return self._defined + list(COLUMNS)
+
+    def GetDefinedColumnNames(self) -> list[str]:
+        return self._defined
+
+
+def test_schema():
+    schema = DatasetSchema(COLUMNS)
+    assert "Jet_pt" in schema and "Jet_phi" not in schema
+    assert schema.column_type("MET_pt") == "Float_t"
+    assert schema.collection("Jet_") == ["Jet_pt", "Jet_eta"]
+    assert schema.collection("HLT_Iso") == ["HLT_IsoMu24"]
+    assert schema.collections() == ["Jet", "Electron"]
+    assert schema.counter("Jet_") == "nJet" and schema.counter("MET") is None
+    assert DatasetSchema.from_json(schema.to_json()).names() == schema.names()
+    other = DatasetSchema({**COLUMNS, "Jet_eta": "ROOT::VecOps::RVec<Double_t>"})
+    assert "Jet_eta" not in schema.intersection(other)
+
+
+def test_collection_columns():
+    node = _Node(["Jet_idx", "ht"])
+    schema = DatasetSchema(COLUMNS)
+    assert collection_columns(node, "Jet_", schema) == collection_columns(node, "Jet_")
+
+
+def test_cache(tmp_path):
+    path = tmp_path / "a.root"
+    path.write_bytes(b"")
+    cache = SchemaCache(str(tmp_path / "schemas"))
+    from rdframework.io.normalization import file_fingerprint
+
+    cache.put(file_fingerprint(str(path)), DatasetSchema(COLUMNS))
+    # served from the cache, the (empty) file is never opened
+    assert len(dataset_schema([str(path)], cache)) == len(COLUMNS)
+    with pytest.raises(ValueError):
+        dataset_schema([], cache)
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import os
+import zlib
+from pathlib import Path
+
+from rdframework.io.staging import StagingCache, adler32
+
+
+def _sources(directory, sizes):
+    # a local directory stands in for the shared storage
+    directory.mkdir()
+    paths = []
+    for i, size in enumerate(sizes):
+        path = directory / f"nano_{i}.root"
+        path.write_bytes(bytes([i]) * size)
+        paths.append(str(path))
+    return paths
+
+
+def test_adler32(tmp_path):
+    path = tmp_path / "a.root"
+    path.write_bytes(b"rdframework" * 1000)
+    assert adler32(str(path), chunk_size=7) == f"{zlib.adler32(path.read_bytes()):08x}"
+
+
+def test_stage_and_evict(tmp_path):
+    sources = _sources(tmp_path / "remote", [400, 400, 400, 2000])
+    with StagingCache(str(tmp_path / "cache"), budget=1000) as cache:
+        local = cache.files(sources[:2])
+        assert all(path.startswith(str(tmp_path / "cache")) for path in local)
+        assert Path(local[0]).read_bytes() == Path(sources[0]).read_bytes()
+        # the pinned copies are not evicted, so the third file is read from its source
+        assert cache.files(sources[2:3]) == sources[2:3]
+        cache.release(local)
+        cache.staged(sources[1])  # used more recently than the first
+        third = cache.files(sources[2:3])[0]
+        assert third != sources[2] and cache.usage() == 800
+        assert cache.staged(sources[0]) is None and cache.staged(sources[1])
+        # larger than the whole budget
+        assert cache.files(sources[3:]) == sources[3:]
+        cache.release([third])
+
+    # a later job reuses the complete copies
+    with StagingCache(str(tmp_path / "cache"), budget=1000) as cache:
+        assert cache.staged(sources[2]) == third
+        assert cache.usage() == 800
+
+
+def test_prefetch_and_checksum(tmp_path):
+    sources = _sources(tmp_path / "remote", [100, 100])
+    checksums = {sources[0]: adler32(sources[0]), sources[1]: "00000000"}
+    with StagingCache(str(tmp_path / "cache"), budget=1000) as cache:
+        cache.prefetch(sources, checksums)
+        paths = cache.files(sources, checksums)
+        # the corrupt copy is discarded and the source read instead
+        assert paths[1] == sources[1] and paths[0] != sources[0]
+        assert cache.usage() == 100
+    assert not [name for name in os.listdir(tmp_path / "cache") if "part" in name]
+
+
+def test_prefetch_past_budget(tmp_path):
+    sources = _sources(tmp_path / "remote", [400, 400, 400, 400])
+    with StagingCache(str(tmp_path / "cache"), budget=1000) as cache:
+        cache.prefetch(sources)
+        paths = cache.files(sources[:2])
+        # the later prefetches do not evict the earlier copies before they are handed out
+        assert all(os.path.exists(path) for path in paths)
+        assert (
+            paths[0] != sources[0]
+            and Path(paths[1]).read_bytes() == Path(sources[1]).read_bytes()
+        )
+        assert cache.files(sources[2:]) == sources[2:]
+        cache.release(paths)
+
+
+def test_stale_partial_copies(tmp_path):
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    # an interrupted copy, and one another job is still writing
+    stale, fresh = cache_dir / "0.root.part", cache_dir / "1.root.part"
+    stale.write_bytes(b"0")
+    fresh.write_bytes(b"1")
+    os.utime(stale, (0, 0))
+    StagingCache(str(cache_dir), budget=1000, stale_after=3600).close()
+    assert not stale.exists() and fresh.exists()
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import math
+
+import pytest
+
+from rdframework.filters.trigger_efficiency import (
+    EfficiencyBin,
+    book_trigger_efficiency,
+    scale_factors,
+    weighted_efficiency,
+)
+from rdframework.histograms.booking import HistogramVariable
+
+
+def test_weighted_efficiency():
+    # unit weights reduce to the binomial uncertainty
+    eff, error = weighted_efficiency(80, 80, 100, 100)
+    assert eff == 0.8
+    assert error == pytest.approx(math.sqrt(0.8 * 0.2 / 100))
+    assert weighted_efficiency(0, 0, 0, 0) == (0.0, 0.0)
+
+
+def test_scale_factors():
+    data = [EfficiencyBin(0, 50, 45, 50, 0.9, 0.05, 0.04)]
+    mc = [EfficiencyBin(0, 50, 0, 0, 0.95, 0.01, 0.02)]
+    (sf,) = scale_factors(data, mc)
+    assert sf.efficiency == pytest.approx(0.9 / 0.95)
+    assert sf.error_low == pytest.approx(
+        sf.efficiency * math.hypot(0.05 / 0.9, 0.02 / 0.95)
+    )
+    with pytest.raises(ValueError):
+        scale_factors(data, [mc[0]._replace(high=60)])
+
+
+def test_book_trigger_efficiency():
+    ROOT = pytest.importorskip("ROOT")
+    events = (
+        ROOT.RDataFrame(1000)
+        .Define("channel_ee_OS", "rdfentry_ % 2 == 0")
+        .Define("channel_emu_OS", "rdfentry_ % 2 == 1")
+        .Define("channel_mumu_OS", "false")
+        .Define("lep_pt", "double(rdfentry_ % 100)")
+        .Define("trig_ee_MET", "rdfentry_ % 4 == 0 || rdfentry_ % 4 == 1")
+        .Define("trig_emu_MET", "trig_ee_MET")
+        .Define("trig_mumu_MET", "trig_ee_MET")
+        .Define("trig_ee", "lep_pt > 50")
+        .Define("trig_emu", "true")
+        .Define("trig_mumu", "true")
+    )
+    events, efficiency = book_trigger_efficiency(
+        events, [HistogramVariable("lep_pt", "lep_pt", 2, 0.0, 100.0)]
+    )
+    ee = efficiency.efficiency("lep_pt", "ee")
+    assert [b.efficiency for b in ee] == [0.0, 1.0]
+    assert [b.total for b in ee] == [125, 125]
+    emu = efficiency.efficiency("lep_pt", "emu")
+    assert [b.efficiency for b in emu] == [1.0, 1.0]
+    assert emu[0].error_high == 0.0 and emu[0].error_low > 0
+    assert len(efficiency.histograms()) == 6